@@ -0,0 +1,154 @@
+# cogs/__db_writer.py
+# Arquivo de suporte (ignorado pelo carregador de cogs por começar com "__").
+# Escritor único por banco de dados, com commit em grupo.
+import aiosqlite
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger('discord_bot')
+
+MAX_BATCH_SIZE = 256
+MAX_BATCH_DELAY = 0.005  # segundos
+
+class DatabaseWriter:
+    """Serializa todas as escritas de um arquivo SQLite em uma única conexão.
+
+    As operações enfileiradas por qualquer cog são executadas em grupo dentro de uma só transação
+    (até MAX_BATCH_SIZE operações ou MAX_BATCH_DELAY segundos de espera), evitando a disputa pelo
+    lock de escrita entre várias conexões e o custo de um commit por instrução. Se uma operação
+    falhar, só ela é desfeita (instruções isoladas já são atômicas no SQLite; unidades com várias
+    instruções rodam em um SAVEPOINT) e a exceção vai para o seu future. Os futures só são
+    resolvidos depois do COMMIT do grupo. Operações que precisam da conexão fora de transação (como
+    ATTACH/DETACH) entram na mesma fila com run_standalone e rodam sozinhas, entre dois grupos.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def submit_op(self, op: Callable[[aiosqlite.Connection], Awaitable[Any]], single_statement: bool = False, standalone: bool = False) -> asyncio.Future:
+        """Enfileira uma operação arbitrária (recebe a conexão) e retorna o future do seu resultado."""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((op, future, single_statement, standalone))
+        return future
+
+    def submit(self, sql: str, params: tuple = ()) -> asyncio.Future:
+        """Enfileira uma instrução sem esperar; o future resolve com o cursor após o commit."""
+        return self.submit_op(lambda db: db.execute(sql, params), single_statement=True)
+
+    async def execute(self, sql: str, params: tuple = ()) -> aiosqlite.Cursor:
+        return await self.submit(sql, params)
+
+    async def executemany(self, sql: str, seq_of_params) -> aiosqlite.Cursor:
+        return await self.submit_op(lambda db: db.executemany(sql, seq_of_params), single_statement=True)
+
+    async def run(self, op: Callable[[aiosqlite.Connection], Awaitable[Any]]) -> Any:
+        """Executa várias instruções como uma unidade atômica dentro do próximo grupo."""
+        return await self.submit_op(op)
+
+    async def run_standalone(self, op: Callable[[aiosqlite.Connection], Awaitable[Any]]) -> Any:
+        """Executa 'op' sozinha, sem transação aberta (a conexão está em autocommit); ela controla as
+        próprias transações e deve deixar a conexão como a recebeu (sem transação e sem anexos)."""
+        return await self.submit_op(op, standalone=True)
+
+    async def flush(self):
+        """Aguarda até que tudo o que foi enfileirado antes desta chamada esteja gravado (leitura após escrita)."""
+        await self.submit_op(_noop, single_statement=True)
+
+    async def _run(self):
+        async with aiosqlite.connect(self.path, isolation_level=None) as db:
+            await db.execute("PRAGMA journal_mode=WAL")
+            await db.execute("PRAGMA synchronous=NORMAL")
+            while True:
+                batch = [await self._queue.get()]
+                deadline = asyncio.get_running_loop().time() + MAX_BATCH_DELAY
+                while len(batch) < MAX_BATCH_SIZE:
+                    timeout = deadline - asyncio.get_running_loop().time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                # Operações avulsas dividem o lote: o que veio antes é gravado, ela roda e o resto segue.
+                start = 0
+                for index, (op, future, _, standalone) in enumerate(batch):
+                    if not standalone:
+                        continue
+                    if start < index:
+                        await self._commit_batch(db, batch[start:index])
+                    await self._run_standalone(db, op, future)
+                    start = index + 1
+                if start < len(batch):
+                    await self._commit_batch(db, batch[start:])
+
+    async def _run_standalone(self, db: aiosqlite.Connection, op, future: asyncio.Future):
+        try:
+            result = await op(db)
+        except Exception as e:
+            if db.in_transaction:
+                await db.execute("ROLLBACK")
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(result)
+
+    async def _commit_batch(self, db: aiosqlite.Connection, batch: list):
+        results = []
+        try:
+            await db.execute("BEGIN IMMEDIATE")
+            for op, future, single_statement, _ in batch:
+                if single_statement:
+                    try:
+                        results.append((future, await op(db), None))
+                    except Exception as e:
+                        results.append((future, None, e))
+                    continue
+                await db.execute("SAVEPOINT op")
+                try:
+                    results.append((future, await op(db), None))
+                    await db.execute("RELEASE op")
+                except Exception as e:
+                    await db.execute("ROLLBACK TO op")
+                    await db.execute("RELEASE op")
+                    results.append((future, None, e))
+            await db.execute("COMMIT")
+        except Exception as e:
+            logger.error(f"Falha no commit em grupo de '{self.path}' ({len(batch)} operações): {e}", exc_info=True)
+            if db.in_transaction:
+                await db.execute("ROLLBACK")
+            for _, future, _, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, result, error in results:
+            if future.done():
+                continue
+            if error:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+async def _noop(db: aiosqlite.Connection):
+    return None
+
+def log_write_failure(future: asyncio.Future):
+    """Callback para escritas enfileiradas sem espera: registra a falha, já que ninguém aguarda o future."""
+    if not future.cancelled() and (error := future.exception()):
+        logger.error(f"Falha em escrita enfileirada no banco: {error}", exc_info=error)
+
+_writers: dict[str, DatabaseWriter] = {}
+
+def get_writer(path: str) -> DatabaseWriter:
+    """Retorna o escritor compartilhado do arquivo (criado sob demanda)."""
+    if path not in _writers:
+        _writers[path] = DatabaseWriter(path)
+    return _writers[path]
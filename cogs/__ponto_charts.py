@@ -0,0 +1,99 @@
+# cogs/__ponto_charts.py
+# Arquivo de suporte (ignorado pelo carregador de cogs por começar com "__").
+# Gráficos do ponto, renderizados em processos separados para não travar o loop de eventos.
+import asyncio
+import io
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import matplotlib.style
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from cogs.__ponto_intervals import WEEKDAY_LABELS
+
+logger = logging.getLogger('discord_bot')
+
+# --- Funções executadas nos processos de trabalho ---
+# Usam apenas a API orientada a objetos (Figure + FigureCanvasAgg), sem o estado global do pyplot.
+def render_activity_chart(labels: list[str], hours: list[float], title: str, xlabel: str) -> bytes:
+    """Desenha o gráfico de barras de horas por período (já agregadas no SQLite) e devolve o PNG."""
+    with matplotlib.style.context('seaborn-v0_8-darkgrid'):
+        fig = Figure(figsize=(12, 7))
+        FigureCanvasAgg(fig)
+        ax = fig.subplots()
+        positions = range(len(labels))
+        ax.bar(positions, hours, color='#7289DA', width=0.6)
+        ax.set_title(title, fontsize=16, pad=20)
+        ax.set_xlabel(xlabel, fontsize=12)
+        ax.set_ylabel('Total de Horas Trabalhadas', fontsize=12)
+        ax.set_xticks(positions)
+        ax.set_xticklabels(labels, rotation=45, ha='right')
+        ax.grid(axis='y', linestyle='--', alpha=0.7)
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png')
+    return buffer.getvalue()
+
+def render_coverage_heatmap(coverage: list[list[float]], title: str) -> bytes:
+    """Desenha o mapa de calor 7x24 (dia da semana x hora) da média de pessoas em serviço e devolve o PNG."""
+    with matplotlib.style.context('seaborn-v0_8-darkgrid'):
+        fig = Figure(figsize=(14, 6))
+        FigureCanvasAgg(fig)
+        ax = fig.subplots()
+        image = ax.imshow(coverage, cmap='YlGnBu', aspect='auto')
+        ax.set_title(title, fontsize=16, pad=20)
+        ax.set_xlabel('Hora do dia', fontsize=12)
+        ax.set_xticks(range(24))
+        ax.set_xticklabels([f"{hour:02d}h" for hour in range(24)])
+        ax.set_yticks(range(7))
+        ax.set_yticklabels(WEEKDAY_LABELS)
+        ax.grid(False)
+        for day, row in enumerate(coverage):
+            for hour, value in enumerate(row):
+                ax.text(hour, day, f"{value:.1f}", ha='center', va='center', fontsize=8, color='white' if image.norm(value) > 0.5 else 'black')
+        fig.colorbar(image, ax=ax, label='Média de pessoas em serviço')
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png')
+    return buffer.getvalue()
+
+# --- Pool de Renderização ---
+class ChartRenderer:
+    """Pool limitado de processos para gráficos, com tempo máximo de espera e métricas simples.
+
+    'pending' é a profundidade da fila (gráficos pedidos e ainda não entregues). Ao estourar o
+    timeout o pedido é abandonado, mas o processo só fica livre quando a renderização terminar.
+    """
+    def __init__(self, max_workers: int, timeout: float):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.pending = 0
+        self.rendered = 0
+        self.timeouts = 0
+        self._executor: ProcessPoolExecutor | None = None
+
+    async def render(self, func, *args) -> bytes:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        self.pending += 1
+        try:
+            result = await asyncio.wait_for(asyncio.get_running_loop().run_in_executor(self._executor, func, *args), self.timeout)
+            self.rendered += 1
+            return result
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning(f"Renderização de gráfico excedeu {self.timeout}s e foi abandonada ({self.pending - 1} ainda na fila).")
+            raise
+        except BrokenProcessPool:
+            logger.error("O pool de renderização de gráficos foi interrompido; um novo será criado no próximo pedido.")
+            self._executor = None
+            raise
+        finally:
+            self.pending -= 1
+
+    def shutdown(self):
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,283 @@
+# cogs/__ponto_db.py
+# Arquivo de suporte (ignorado pelo carregador de cogs por começar com "__").
+# Reúne as rotinas de banco do ponto que são usadas por mais de um cog.
+import aiosqlite
+import json
+import logging
+import os
+import re
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from cogs.__db_writer import get_writer
+
+DB_FILE = "clock.sqlite"
+
+# --- Consolidação Diária (daily_rollup) ---
+async def setup_daily_rollup(db: aiosqlite.Connection) -> bool:
+    """Cria a tabela 'daily_rollup' se necessário. Retorna True se ela acabou de ser criada."""
+    cursor = await db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'daily_rollup'")
+    existed = await cursor.fetchone() is not None
+    await db.execute('''
+        CREATE TABLE IF NOT EXISTS daily_rollup (
+            staff_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            seconds INTEGER NOT NULL DEFAULT 0,
+            sessions INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (staff_id, day)
+        ) WITHOUT ROWID
+    ''')
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_daily_rollup_day ON daily_rollup (day)")
+    return not existed
+
+def split_by_day(start: datetime, end: datetime) -> list[tuple[str, int]]:
+    """Divide um intervalo nas viradas de dia, retornando (dia ISO, segundos) para cada dia tocado."""
+    parts = []
+    cursor = start
+    while cursor < end:
+        next_midnight = datetime.combine(cursor.date() + timedelta(days=1), datetime.min.time())
+        part_end = min(end, next_midnight)
+        parts.append((cursor.date().isoformat(), int((part_end - cursor).total_seconds())))
+        cursor = part_end
+    return parts
+
+async def add_to_daily_rollup(db: aiosqlite.Connection, staff_id: int, start: datetime, end: datetime):
+    """Soma uma sessão encerrada à consolidação diária. Não faz commit; roda na transação de quem chama."""
+    await db.executemany(
+        """INSERT INTO daily_rollup (staff_id, day, seconds, sessions) VALUES (?, ?, ?, 1)
+           ON CONFLICT(staff_id, day) DO UPDATE SET seconds = seconds + excluded.seconds, sessions = sessions + 1""",
+        [(staff_id, day, seconds) for day, seconds in split_by_day(start, end)]
+    )
+
+async def adjust_daily_rollup(db: aiosqlite.Connection, source_sql: str, params: tuple = (), sign: int = 1):
+    """Soma à consolidação diária as sessões retornadas por 'source_sql' (staff_id, clock_in_time,
+    clock_out_time), ou as subtrai com sign=-1. Só os dias que essas sessões tocam são alterados, então
+    as linhas de sessões já arquivadas continuam valendo.
+
+    Sessões que começam e terminam no mesmo dia (a grande maioria) são somadas direto no SQLite com
+    GROUP BY; só as que atravessam a meia-noite são lidas em streaming e divididas por dia em Python.
+    Sessões abertas ou invertidas não contam, como em add_to_daily_rollup. Não faz commit.
+    """
+    source = f"WITH source AS ({source_sql}) SELECT staff_id, clock_in_time, clock_out_time FROM source WHERE clock_out_time > clock_in_time"
+    same_day = "substr(clock_in_time, 1, 10) = substr(clock_out_time, 1, 10)"
+    upsert = "ON CONFLICT(staff_id, day) DO UPDATE SET seconds = seconds + excluded.seconds, sessions = sessions + excluded.sessions"
+    # Segundos inteiros truncados, como int(timedelta.total_seconds()) em split_by_day.
+    await db.execute(f"""
+        INSERT INTO daily_rollup (staff_id, day, seconds, sessions)
+        SELECT staff_id, substr(clock_in_time, 1, 10),
+               {sign} * SUM(CAST(ROUND((julianday(clock_out_time) - julianday(clock_in_time)) * 86400000) AS INTEGER) / 1000), {sign} * COUNT(*)
+        FROM ({source}) WHERE {same_day}
+        GROUP BY staff_id, substr(clock_in_time, 1, 10)
+        {upsert}
+    """, params)
+
+    totals: dict[tuple[int, str], list[int]] = {}
+    async with db.execute(f"SELECT * FROM ({source}) WHERE NOT ({same_day})", params) as cursor:
+        async for staff_id, clock_in, clock_out in cursor:
+            for day, seconds in split_by_day(datetime.fromisoformat(clock_in), datetime.fromisoformat(clock_out)):
+                entry = totals.setdefault((staff_id, day), [0, 0])
+                entry[0] += sign * seconds
+                entry[1] += sign
+
+    await db.executemany(
+        f"INSERT INTO daily_rollup (staff_id, day, seconds, sessions) VALUES (?, ?, ?, ?) {upsert}",
+        [(staff_id, day, seconds, count) for (staff_id, day), (seconds, count) in totals.items()]
+    )
+    if sign < 0:
+        await db.execute("DELETE FROM daily_rollup WHERE sessions <= 0")
+
+async def rebuild_daily_rollup(db: aiosqlite.Connection) -> int:
+    """Recalcula toda a consolidação diária a partir das sessões encerradas do banco principal.
+
+    Só é usada quando a tabela acaba de ser criada: depois de um arquivamento, as sessões antigas não
+    estão mais em 'sessions', e correções pontuais devem usar adjust_daily_rollup. Retorna o número
+    de linhas gravadas. Não faz commit.
+    """
+    await db.execute("DELETE FROM daily_rollup")
+    await adjust_daily_rollup(db, "SELECT staff_id, clock_in_time, clock_out_time FROM sessions")
+    cursor = await db.execute("SELECT COUNT(*) FROM daily_rollup")
+    return (await cursor.fetchone())[0]
+
+# --- Diretório de Membros (members) ---
+UPSERT_MEMBER_SQL = """
+    INSERT INTO members (user_id, display_name, updated_at) VALUES (?, ?, ?)
+    ON CONFLICT(user_id) DO UPDATE SET display_name = excluded.display_name, updated_at = excluded.updated_at
+    WHERE display_name != excluded.display_name
+"""
+
+async def setup_members(db: aiosqlite.Connection):
+    """Cria o diretório 'members' e migra para ele os nomes que antes eram copiados em cada sessão.
+
+    Na migração, cada membro recebe o nome da sua sessão mais recente e a coluna 'sessions.staff_name'
+    é removida. Não faz commit.
+    """
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS members (
+            user_id INTEGER PRIMARY KEY,
+            display_name TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+    """)
+    cursor = await db.execute("PRAGMA table_info(sessions)")
+    if 'staff_name' not in {row[1] for row in await cursor.fetchall()}:
+        return
+    cursor = await db.execute("""
+        INSERT OR IGNORE INTO members (user_id, display_name, updated_at)
+        SELECT staff_id, staff_name, clock_in_time FROM (
+            SELECT staff_id, staff_name, clock_in_time,
+                   ROW_NUMBER() OVER (PARTITION BY staff_id ORDER BY clock_in_time DESC, session_id DESC) AS position
+            FROM sessions
+        ) WHERE position = 1
+    """)
+    await db.execute("ALTER TABLE sessions DROP COLUMN staff_name")
+    logging.getLogger('discord_bot').info(f"Diretório 'members' criado com {cursor.rowcount} membros; coluna 'sessions.staff_name' removida.")
+
+async def get_display_names(user_ids: list[int]) -> dict[int, str]:
+    """Busca no diretório os nomes dos membros indicados, inclusive de quem já saiu do servidor."""
+    async with aiosqlite.connect(DB_FILE) as db:
+        try:
+            cursor = await db.execute(
+                "SELECT user_id, display_name FROM members WHERE user_id IN (SELECT value FROM json_each(?))",
+                (json.dumps(list(user_ids)),)
+            )
+        except aiosqlite.OperationalError:
+            return {}  # Diretório ainda não criado.
+        return {user_id: display_name for user_id, display_name in await cursor.fetchall()}
+
+# --- Arquivamento Anual (clock_YYYY.sqlite) ---
+ARCHIVE_FILE_TEMPLATE = "clock_{year}.sqlite"
+MAX_ATTACHED_ARCHIVES = 9  # O SQLite permite 10 bancos anexados por conexão por padrão.
+
+def list_archives() -> dict[int, str]:
+    """Retorna {ano: arquivo} dos arquivos de sessões arquivadas existentes."""
+    archives = {}
+    for filename in os.listdir('.'):
+        match = re.fullmatch(ARCHIVE_FILE_TEMPLATE.format(year=r"(\d{4})").replace('.', r'\.'), filename)
+        if match:
+            archives[int(match.group(1))] = filename
+    return dict(sorted(archives.items()))
+
+async def setup_archive_state(db: aiosqlite.Connection):
+    await db.execute("CREATE TABLE IF NOT EXISTS archive_state (key TEXT PRIMARY KEY, value TEXT)")
+
+async def get_archived_before(db: aiosqlite.Connection) -> str | None:
+    """Data ISO antes da qual as sessões encerradas podem estar em arquivos anuais (None se nunca houve arquivamento)."""
+    try:
+        cursor = await db.execute("SELECT value FROM archive_state WHERE key = 'archived_before'")
+    except aiosqlite.OperationalError:
+        return None  # Tabela ainda não criada: nada foi arquivado.
+    row = await cursor.fetchone()
+    return row[0] if row else None
+
+async def archive_sessions(cutoff: datetime) -> dict[int, int]:
+    """Move as sessões encerradas antes de 'cutoff' para clock_YYYY.sqlite, um arquivo por ano de entrada.
+
+    Roda no escritor único do clock.sqlite, como operação avulsa (o ATTACH não pode acontecer dentro
+    de uma transação). A consolidação diária fica no banco principal, então os totais por membro
+    continuam completos. Cada ano é copiado e removido em uma única transação, e só são removidas as
+    sessões que estão de fato no arquivo. Retorna {ano: sessões movidas}.
+    """
+    cutoff_iso = cutoff.isoformat()
+
+    async def move(db: aiosqlite.Connection) -> dict[int, int]:
+        moved = {}
+        await setup_archive_state(db)
+        cursor = await db.execute(
+            "SELECT DISTINCT substr(clock_in_time, 1, 4) FROM sessions WHERE clock_out_time IS NOT NULL AND clock_out_time < ?",
+            (cutoff_iso,)
+        )
+        years = [int(row[0]) for row in await cursor.fetchall()]
+        cursor = await db.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'sessions'")
+        create_sql = (await cursor.fetchone())[0]
+        cursor = await db.execute("PRAGMA table_info(sessions)")
+        main_columns = [row[1] for row in await cursor.fetchall()]
+
+        for year in years:
+            await db.execute("ATTACH DATABASE ? AS archive", (ARCHIVE_FILE_TEMPLATE.format(year=year),))
+            try:
+                await db.execute(create_sql.replace("CREATE TABLE sessions", "CREATE TABLE IF NOT EXISTS archive.sessions", 1))
+                cursor = await db.execute("PRAGMA archive.table_info(sessions)")
+                archive_info = await cursor.fetchall()
+                archive_columns = {row[1] for row in archive_info}
+                for column in main_columns:
+                    if column not in archive_columns:
+                        await db.execute(f"ALTER TABLE archive.sessions ADD COLUMN {column}")
+                await db.execute("CREATE INDEX IF NOT EXISTS archive.idx_sessions_staff_clock_in ON sessions (staff_id, clock_in_time, session_id)")
+
+                # Colunas obrigatórias que só existem no arquivo (como o antigo staff_name) recebem texto vazio.
+                legacy_columns = [row[1] for row in archive_info if row[1] not in main_columns and row[3] and row[4] is None]
+                columns = ", ".join(main_columns + legacy_columns)
+                values = ", ".join(main_columns + ["''"] * len(legacy_columns))
+                where = "clock_out_time IS NOT NULL AND clock_out_time < ? AND substr(clock_in_time, 1, 4) = ?"
+                await db.execute("BEGIN IMMEDIATE")
+                try:
+                    await db.execute(f"INSERT OR IGNORE INTO archive.sessions ({columns}) SELECT {values} FROM main.sessions WHERE {where}", (cutoff_iso, str(year)))
+                    # O que o INSERT OR IGNORE não gravou e não estava no arquivo continua no banco principal.
+                    cursor = await db.execute(
+                        f"DELETE FROM main.sessions WHERE {where} AND session_id IN (SELECT session_id FROM archive.sessions)",
+                        (cutoff_iso, str(year))
+                    )
+                    moved[year] = cursor.rowcount
+                    await db.execute("COMMIT")
+                except BaseException:
+                    if db.in_transaction:
+                        await db.execute("ROLLBACK")
+                    raise
+            finally:
+                await db.execute("DETACH DATABASE archive")
+
+        previous = await get_archived_before(db)
+        if not previous or previous < cutoff_iso:
+            await db.execute("INSERT OR REPLACE INTO archive_state (key, value) VALUES ('archived_before', ?)", (cutoff_iso,))
+        return moved
+
+    return await get_writer(DB_FILE).run_standalone(move)
+
+@asynccontextmanager
+async def connect_sessions(since: str | None = None, until: str | None = None):
+    """Abre o clock.sqlite para leitura de sessões no intervalo [since, until).
+
+    Se o intervalo alcança sessões já arquivadas, os arquivos anuais necessários são anexados
+    (ATTACH) e uma view temporária 'sessions' une o banco principal e os arquivos, de modo que
+    as consultas existentes funcionam sem mudanças. Caso contrário, só o banco principal é usado.
+    Se forem necessários mais arquivos do que o SQLite deixa anexar, os anos mais antigos são
+    copiados, um de cada vez, para uma tabela temporária indexada que entra na view no lugar deles.
+    A conexão é apenas de leitura para 'sessions': a view não aceita INSERT/UPDATE.
+    """
+    async with aiosqlite.connect(DB_FILE) as db:
+        archived_before = await get_archived_before(db)
+        archives = list_archives() if archived_before and (since is None or since < archived_before) else {}
+        selected = [
+            (year, path) for year, path in archives.items()
+            if (since is None or year >= int(since[:4])) and (until is None or year <= int(until[:4]))
+        ]
+
+        if selected:
+            cursor = await db.execute("PRAGMA main.table_info(sessions)")
+            main_columns = [row[1] for row in await cursor.fetchall()]
+            selects = [f"SELECT {', '.join(main_columns)} FROM main.sessions"]
+
+            async def archive_select(alias: str) -> str:
+                cursor = await db.execute(f"PRAGMA {alias}.table_info(sessions)")
+                archive_columns = {row[1] for row in await cursor.fetchall()}
+                return "SELECT " + ", ".join(c if c in archive_columns else f"NULL AS {c}" for c in main_columns) + f" FROM {alias}.sessions"
+
+            overflow = max(0, len(selected) - MAX_ATTACHED_ARCHIVES)
+            if overflow:
+                logging.getLogger('discord_bot').info(f"Consulta de sessões alcança {len(selected)} arquivos anuais; os {overflow} mais antigos serão copiados para uma tabela temporária.")
+                await db.execute(f"CREATE TEMP TABLE older_sessions AS SELECT {', '.join(main_columns)} FROM main.sessions WHERE 0")
+                for year, path in selected[:overflow]:
+                    await db.execute("ATTACH DATABASE ? AS archive_copy", (path,))
+                    try:
+                        await db.execute(f"INSERT INTO temp.older_sessions {await archive_select('archive_copy')}")
+                        await db.commit()  # O DETACH não pode acontecer com a transação aberta.
+                    finally:
+                        await db.execute("DETACH DATABASE archive_copy")
+                await db.execute("CREATE INDEX temp.idx_older_sessions_staff_clock_in ON older_sessions (staff_id, clock_in_time, session_id)")
+                selects.append(f"SELECT {', '.join(main_columns)} FROM temp.older_sessions")
+
+            for year, path in selected[overflow:]:
+                alias = f"archive_{year}"
+                await db.execute(f"ATTACH DATABASE ? AS {alias}", (path,))
+                selects.append(await archive_select(alias))
+            await db.execute(f"CREATE TEMP VIEW sessions AS {' UNION ALL '.join(selects)}")
+        yield db
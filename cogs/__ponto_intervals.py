@@ -0,0 +1,65 @@
+# cogs/__ponto_intervals.py
+# Arquivo de suporte (ignorado pelo carregador de cogs por começar com "__").
+# Divisão vetorizada (NumPy) de sessões em faixas de tempo fixas: horas, dias e horas da semana.
+import numpy as np
+
+HOUR = 3600
+DAY = 86400
+# 01/01/1970 (dia 0 do epoch) foi uma quinta-feira; com segunda = 0, o dia da semana é (dia + 3) % 7.
+EPOCH_WEEKDAY = 3
+WEEKDAY_LABELS = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"]
+
+def split_intervals(starts: np.ndarray, ends: np.ndarray, bucket: int) -> tuple[int, np.ndarray]:
+    """Distribui os intervalos [início, fim) em faixas de 'bucket' segundos, sem laço por sessão.
+
+    Os instantes são segundos desde o epoch tratando o horário local como UTC, de modo que as
+    faixas caem nas viradas de hora/dia do relógio de parede. Retorna (índice da primeira faixa,
+    segundos por faixa). A parte inicial e a final de cada sessão são somadas com bincount; as
+    faixas cheias no meio entram por um vetor de diferenças acumulado com cumsum.
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    valid = ends > starts
+    starts, ends = starts[valid], ends[valid]
+    if not len(starts):
+        return 0, np.zeros(0)
+
+    first = starts // bucket
+    last = (ends - 1) // bucket
+    base = int(first.min())
+    size = int(last.max()) - base + 1
+    first -= base
+    last -= base
+
+    same = first == last
+    totals = np.zeros(size)
+    totals += np.bincount(first[same], weights=(ends - starts)[same], minlength=size)
+    cross = ~same
+    first, last, starts, ends = first[cross], last[cross], starts[cross], ends[cross]
+    totals += np.bincount(first, weights=(first + base + 1) * bucket - starts, minlength=size)
+    totals += np.bincount(last, weights=ends - (last + base) * bucket, minlength=size)
+    full = np.bincount(first + 1, minlength=size + 1)[:size] - np.bincount(last, minlength=size + 1)[:size]
+    totals += np.cumsum(full) * bucket
+    return base, totals
+
+def hour_of_week_slots(first_hour: int, count: int) -> np.ndarray:
+    """Posição (dia da semana * 24 + hora) de cada uma das 'count' horas a partir de first_hour."""
+    hours = np.arange(first_hour, first_hour + count, dtype=np.int64)
+    return ((hours // 24 + EPOCH_WEEKDAY) % 7) * 24 + hours % 24
+
+def hour_of_week_coverage(starts: np.ndarray, ends: np.ndarray, period_start: int, period_end: int) -> np.ndarray:
+    """Matriz 7x24 (segunda a domingo x hora) com a média de pessoas em serviço em cada hora da semana.
+
+    As sessões são cortadas ao período [period_start, period_end); o total de segundos de cada
+    posição é dividido pela quantidade de vezes que aquela hora da semana ocorre no período.
+    """
+    starts = np.clip(np.asarray(starts, dtype=np.int64), period_start, period_end)
+    ends = np.clip(np.asarray(ends, dtype=np.int64), period_start, period_end)
+    base, per_hour = split_intervals(starts, ends, HOUR)
+    seconds = np.bincount(hour_of_week_slots(base, len(per_hour)), weights=per_hour, minlength=168)
+
+    first_hour = period_start // HOUR
+    occurrences = np.bincount(hour_of_week_slots(first_hour, -(-period_end // HOUR) - first_hour), minlength=168)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        coverage = np.where(occurrences > 0, seconds / (occurrences * HOUR), 0.0)
+    return coverage.reshape(7, 24)
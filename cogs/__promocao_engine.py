@@ -0,0 +1,240 @@
+# cogs/__promocao_engine.py
+# Arquivo de suporte (ignorado pelo carregador de cogs por começar com "__").
+# Regras de promoção como funções puras: recebem um retrato do membro e devolvem as ações, sem tocar
+# no Discord nem no banco. O PromocaoCog aplica as ações; a simulação e o benchmark só as leem.
+import json
+import logging
+from bisect import bisect_right
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+
+CLASS_ORDER = ["Terceira", "Segunda", "Primeira", "Especial"]
+MAX_PADRAO = 6
+
+# Tipos de ação
+NOVO = "novo"                     # Membro com carreira descoberto; registro criado a partir dos cargos atuais.
+SINCRONIZAR = "sincronizar"       # Cargos de padrão/classe divergentes do registro.
+PROMOVER = "promover"             # Subida de padrão por tempo de serviço.
+PROMOVER_CLASSE = "promover_classe"  # Padrão 6 fora da classe máxima: próxima classe e volta ao Padrão 1.
+MAXIMO = "maximo"                 # Chegou ao Padrão 6 na classe máxima da carreira.
+
+@dataclass
+class PromotionRules:
+    """Regras do config_promocao_cog.json, validadas e compiladas uma única vez.
+
+    Na criação são montadas, por carreira, as listas ordenadas de segundos exigidos (já com o
+    multiplicador) para busca com bisect, e um índice reverso de cargo -> carreira/padrão/classe.
+    Configurações inconsistentes levantam ValueError com todos os problemas encontrados; carreiras
+    que compartilham o cargo geram um aviso no log.
+    """
+    carreiras: dict[str, dict]
+    padrao_roles: dict[int, int]
+    classe_roles: dict[str, int]
+    time_requirements_seconds: dict[int, int]
+
+    def __post_init__(self):
+        self.validate()
+        ranks = sorted(self.time_requirements_seconds)
+        self.thresholds = {
+            name: [self.time_requirements_seconds[rank] * data.get('multiplier', 1.0) for rank in ranks]
+            for name, data in self.carreiras.items()
+        }
+        self.threshold_ranks = ranks
+        self.padrao_ranks_desc = sorted(self.padrao_roles.items(), reverse=True)
+        self.padrao_role_ids = frozenset(self.padrao_roles.values())
+        self.classe_role_ids = frozenset(self.classe_roles.values())
+        # Cargo -> (tipo, chave). Se duas carreiras usam o mesmo cargo, vale a última do config (como antes).
+        self.role_index: dict[int, tuple[str, object]] = {}
+        for role_id, key in [(role_id, ('classe', name)) for name, role_id in self.classe_roles.items()] + \
+                            [(role_id, ('padrao', rank)) for rank, role_id in self.padrao_roles.items()] + \
+                            [(data['role_id'], ('carreira', name)) for name, data in self.carreiras.items()]:
+            self.role_index[role_id] = key
+        # Cargo de carreira -> (posição, carreira), com a mesma precedência do antigo {role_id: nome}:
+        # a posição é a da primeira aparição do cargo no config e o nome é o da última.
+        names = {data['role_id']: name for name, data in self.carreiras.items()}
+        self.carreira_by_role = {role_id: (position, name) for position, (role_id, name) in enumerate(names.items())}
+        self.carreira_role_ids = frozenset(self.carreira_by_role)
+        self.tracked_role_ids = frozenset(self.role_index)
+
+    def validate(self):
+        problems = []
+        missing_padrao = [rank for rank in range(1, MAX_PADRAO + 1) if rank not in self.padrao_roles]
+        if missing_padrao:
+            problems.append(f"PADRAO_ROLES sem os padrões {missing_padrao}")
+        missing_ranks = [rank for rank in range(2, MAX_PADRAO + 1) if rank not in self.time_requirements_seconds]
+        if missing_ranks:
+            problems.append(f"TIME_REQUIREMENTS_HOURS sem os padrões {missing_ranks}")
+        unknown_ranks = [rank for rank in self.time_requirements_seconds if not 2 <= rank <= MAX_PADRAO]
+        if unknown_ranks:
+            problems.append(f"TIME_REQUIREMENTS_HOURS com padrões inválidos {unknown_ranks}")
+        hours = [self.time_requirements_seconds[rank] for rank in sorted(self.time_requirements_seconds)]
+        if any(later <= earlier for earlier, later in zip(hours, hours[1:])):
+            problems.append("TIME_REQUIREMENTS_HOURS precisa crescer a cada padrão")
+        missing_classes = [name for name in CLASS_ORDER if name not in self.classe_roles]
+        if missing_classes:
+            problems.append(f"CLASSE_ROLES sem as classes {missing_classes}")
+        unknown_classes = [name for name in self.classe_roles if name not in CLASS_ORDER]
+        if unknown_classes:
+            problems.append(f"CLASSE_ROLES com classes desconhecidas {unknown_classes}")
+        for name, data in self.carreiras.items():
+            if 'role_id' not in data:
+                problems.append(f"carreira '{name}' sem role_id")
+            if data.get('multiplier', 1.0) <= 0:
+                problems.append(f"carreira '{name}' com multiplier não positivo")
+            if data.get('max_classe') and data['max_classe'] not in CLASS_ORDER:
+                problems.append(f"carreira '{name}' com max_classe desconhecida '{data['max_classe']}'")
+        if problems:
+            raise ValueError("Configuração de promoção inválida: " + "; ".join(problems))
+
+        # Cargo de carreira compartilhado não impede o carregamento (o config distribuído tem um), mas
+        # quem o tem é tratado como a última carreira que o usa, e o tempo das demais nunca é contado.
+        sharing = {}
+        for name, data in self.carreiras.items():
+            sharing.setdefault(data['role_id'], []).append(name)
+        for role_id, names in sharing.items():
+            if len(names) > 1:
+                logging.getLogger('discord_bot').warning(
+                    f"CARREIRA_ROLES: as carreiras {names} usam o mesmo cargo {role_id}; membros com ele serão tratados como '{names[-1]}'."
+                )
+
+    @classmethod
+    def from_config(cls, config: dict) -> "PromotionRules":
+        return cls(
+            carreiras=config.get('CARREIRA_ROLES', {}),
+            padrao_roles={int(k): v for k, v in config.get('PADRAO_ROLES', {}).items()},
+            classe_roles=config.get('CLASSE_ROLES', {}),
+            time_requirements_seconds={int(k): v * 3600 for k, v in config.get('TIME_REQUIREMENTS_HOURS', {}).items()},
+        )
+
+    def carreira_of(self, role_ids) -> str | None:
+        return min((self.carreira_by_role[role_id] for role_id in self.carreira_role_ids.intersection(role_ids)), default=(None, None))[1]
+
+    def required_seconds(self, carreira: str, rank: int) -> int:
+        """Segundos exigidos para chegar ao padrão 'rank' na carreira (0 para o Padrão 1)."""
+        thresholds = self.thresholds.get(carreira)
+        if thresholds is None:
+            return self.time_requirements_seconds.get(rank, 0)
+        index = rank - self.threshold_ranks[0]
+        return int(thresholds[index]) if 0 <= index < len(thresholds) else 0
+
+    def rank_by_time(self, carreira: str, seconds: int) -> int:
+        reached = bisect_right(self.thresholds[carreira], seconds)
+        return min(self.threshold_ranks[reached - 1], MAX_PADRAO) if reached else 1
+
+@dataclass
+class Action:
+    kind: str
+    from_rank: str | None = None
+    to_rank: str | None = None
+    add_role_ids: list[int] = field(default_factory=list)
+    remove_role_ids: list[int] = field(default_factory=list)
+    padrao: int | None = None   # Padrão resultante (promoções).
+    classe: str | None = None   # Classe resultante (promoção de classe).
+
+@dataclass
+class MemberDecision:
+    member_id: int
+    carreira: str
+    record: dict
+    seconds: int
+    store_seconds: bool = False  # Grava o tempo de carreira atual (não acontece quando há sincronização).
+    actions: list[Action] = field(default_factory=list)
+
+def new_record(rules: PromotionRules, role_ids, carreira: str) -> dict:
+    """Registro inicial deduzido dos cargos que o membro já tem."""
+    padrao = next((rank for rank, role_id in rules.padrao_ranks_desc if role_id in role_ids), 1)
+    classe = next((name for name, role_id in rules.classe_roles.items() if role_id in role_ids), "Terceira")
+    return {'current_padrao_rank': padrao, 'current_classe_rank': classe, 'current_carreira_rank': carreira, 'last_class_promotion_date': None}
+
+def decide(rules: PromotionRules, member_id: int, role_ids: set[int], record: dict | None, seconds: int, check_roles: bool = True) -> MemberDecision | None:
+    """Decide o que fazer com um membro. Retorna None se ele não tem cargo de carreira."""
+    carreira = rules.carreira_of(role_ids)
+    if not carreira:
+        return None
+    decision = MemberDecision(member_id, carreira, record, seconds)
+    if record is None:
+        decision.record = record = new_record(rules, role_ids, carreira)
+        decision.actions.append(Action(NOVO, to_rank=f"Padrão {record['current_padrao_rank']} - {record['current_classe_rank']} Classe"))
+        check_roles = True
+
+    padrao, classe = record['current_padrao_rank'], record['current_classe_rank']
+    if check_roles:
+        padrao_role_id, classe_role_id = rules.padrao_roles.get(padrao), rules.classe_roles.get(classe)
+        member_padrao = rules.padrao_role_ids.intersection(role_ids)
+        member_classe = rules.classe_role_ids.intersection(role_ids)
+        if ((padrao_role_id and padrao_role_id not in member_padrao) or len(member_padrao) > 1 or
+                (classe_role_id and classe_role_id not in member_classe) or len(member_classe) > 1):
+            add = [role_id for role_id in {padrao_role_id, classe_role_id} if role_id]
+            decision.actions.append(Action(
+                SINCRONIZAR, to_rank=f"Padrão {padrao} - {classe} Classe",
+                add_role_ids=add, remove_role_ids=[role_id for role_id in member_padrao | member_classe if role_id not in add]
+            ))
+            return decision
+
+    decision.store_seconds = True
+    max_classe = rules.carreiras.get(carreira, {}).get('max_classe')
+    if padrao < MAX_PADRAO:
+        new_rank = rules.rank_by_time(carreira, seconds)
+        if new_rank <= padrao:
+            return decision
+        decision.actions.append(Action(
+            PROMOVER, f"Padrão {padrao}", f"Padrão {new_rank}",
+            add_role_ids=[role_id for role_id in [rules.padrao_roles.get(new_rank)] if role_id],
+            remove_role_ids=[role_id for role_id in [rules.padrao_roles.get(padrao)] if role_id], padrao=new_rank
+        ))
+        if new_rank < MAX_PADRAO:
+            return decision
+        if classe == max_classe:
+            decision.actions.append(Action(MAXIMO, to_rank=f"Padrão {MAX_PADRAO} - {classe} Classe"))
+            return decision
+    elif padrao > MAX_PADRAO or not max_classe or classe == max_classe:
+        return decision
+
+    if classe in CLASS_ORDER and CLASS_ORDER.index(classe) + 1 < len(CLASS_ORDER):
+        next_class = CLASS_ORDER[CLASS_ORDER.index(classe) + 1]
+        decision.actions.append(Action(
+            PROMOVER_CLASSE, f"{classe} Classe", f"{next_class} Classe",
+            add_role_ids=[role_id for role_id in [rules.classe_roles.get(next_class), rules.padrao_roles.get(1)] if role_id],
+            remove_role_ids=[role_id for role_id in [rules.classe_roles.get(classe), rules.padrao_roles.get(MAX_PADRAO)] if role_id],
+            padrao=1, classe=next_class
+        ))
+    return decision
+
+# --- Benchmark sem Discord ---
+def synthetic_members(rules: PromotionRules, count: int, seed: int = 0) -> list[tuple[int, set[int], dict | None, int]]:
+    """Gera (id, cargos, registro, segundos) variados: novos, com cargos divergentes, prontos para promoção etc."""
+    rng = random.Random(seed)
+    carreiras = list(rules.carreiras)
+    max_seconds = int(max(rules.time_requirements_seconds.values(), default=3600) * 1.5)
+    members = []
+    for member_id in range(1, count + 1):
+        carreira = rng.choice(carreiras)
+        padrao, classe = rng.randint(1, MAX_PADRAO), rng.choice(CLASS_ORDER)
+        role_ids = {rules.carreiras[carreira]['role_id'], rules.padrao_roles.get(padrao), rules.classe_roles.get(classe)}
+        if rng.random() < 0.05:
+            role_ids.add(rules.padrao_roles.get(rng.randint(1, MAX_PADRAO)))
+        record = None if rng.random() < 0.1 else {
+            'current_padrao_rank': padrao, 'current_classe_rank': classe, 'current_carreira_rank': carreira, 'last_class_promotion_date': None
+        }
+        members.append((member_id, role_ids - {None}, record, rng.randint(0, max_seconds)))
+    return members
+
+def benchmark(rules: PromotionRules, count: int) -> dict:
+    members = synthetic_members(rules, count)
+    started = time.perf_counter()
+    decisions = [decide(rules, member_id, role_ids, record, seconds) for member_id, role_ids, record, seconds in members]
+    elapsed = time.perf_counter() - started
+    kinds = {}
+    for decision in filter(None, decisions):
+        for action in decision.actions:
+            kinds[action.kind] = kinds.get(action.kind, 0) + 1
+    return {'membros': count, 'segundos': elapsed, 'acoes': kinds}
+
+if __name__ == "__main__":
+    # Uso: python -m cogs.__promocao_engine [quantidade de membros], a partir da raiz do bot.
+    with open('config_promocao_cog.json', 'r', encoding='utf-8') as f:
+        rules = PromotionRules.from_config(json.load(f))
+    result = benchmark(rules, int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
+    print(f"{result['membros']} membros decididos em {result['segundos'] * 1000:.1f} ms: {result['acoes']}")
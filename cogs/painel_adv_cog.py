@@ -6,6 +6,7 @@ import json
 import logging
 import aiosqlite
 from datetime import datetime, timedelta
+from cogs.__db_writer import get_writer
 
 # --- Carregar Configurações ---
 try:
@@ -143,10 +144,8 @@ class AdvCog(commands.Cog):
         now = datetime.utcnow()
         ipf_id = None
         
-        async with aiosqlite.connect(DB_FILE) as db:
-            cursor = await db.execute("INSERT INTO warnings (user_id, admin_id, adv_type, reason, timestamp) VALUES (?, ?, ?, ?, ?)", (usuario.id, interaction.user.id, tipo_adv_value, motivo, now.isoformat()))
-            await db.commit()
-            ipf_id = cursor.lastrowid
+        cursor = await get_writer(DB_FILE).execute("INSERT INTO warnings (user_id, admin_id, adv_type, reason, timestamp) VALUES (?, ?, ?, ?, ?)", (usuario.id, interaction.user.id, tipo_adv_value, motivo, now.isoformat()))
+        ipf_id = cursor.lastrowid
 
         role_id = adv_settings.get('role_id')
         duration_days = adv_settings.get('duration_days')
@@ -157,9 +156,7 @@ class AdvCog(commands.Cog):
                 try:
                     await usuario.add_roles(role_to_add, reason=f"Advertência {adv_settings.get('name')} (IPF: {ipf_id})")
                     remove_at = now + timedelta(days=duration_days)
-                    async with aiosqlite.connect(DB_FILE) as db:
-                        await db.execute("INSERT INTO timed_roles (user_id, guild_id, role_id, remove_at) VALUES (?, ?, ?, ?)", (usuario.id, interaction.guild.id, role_id, remove_at.isoformat()))
-                        await db.commit()
+                    await get_writer(DB_FILE).execute("INSERT INTO timed_roles (user_id, guild_id, role_id, remove_at) VALUES (?, ?, ?, ?)", (usuario.id, interaction.guild.id, role_id, remove_at.isoformat()))
                     self.logger.info(f"Cargo {role_to_add.name} adicionado a {usuario.display_name} por {duration_days} dias.")
                 except discord.Forbidden:
                     error_msg = "❌ Erro: Não tenho permissão para adicionar este cargo ao usuário."
@@ -234,29 +231,37 @@ class AdvCog(commands.Cog):
                 await interaction.followup.send(f"ℹ️ Esta advertência já foi revogada por **{revoked_by_user}**.", ephemeral=True)
                 return
 
-            now_iso = datetime.utcnow().isoformat()
-            await db.execute(
-                "UPDATE warnings SET revoked_by_id = ?, revoked_at = ?, revocation_reason = ? WHERE ipf_id = ?",
+        now_iso = datetime.utcnow().isoformat()
+        adv_type = warning_record['adv_type']
+        adv_settings = WARNING_SETTINGS.get(adv_type, {})
+        role_id_to_remove = adv_settings.get('role_id')
+
+        async def revoke(db: aiosqlite.Connection) -> bool:
+            """Marca a revogação e apaga o cargo temporário. Retorna False se outra revogação chegou antes."""
+            cursor = await db.execute(
+                "UPDATE warnings SET revoked_by_id = ?, revoked_at = ?, revocation_reason = ? WHERE ipf_id = ? AND revoked_by_id IS NULL",
                 (interaction.user.id, now_iso, motivo, ipf)
             )
-            
-            adv_type = warning_record['adv_type']
-            adv_settings = WARNING_SETTINGS.get(adv_type, {})
-            role_id_to_remove = adv_settings.get('role_id')
-
+            if not cursor.rowcount:
+                return False
             if role_id_to_remove:
                 await db.execute("DELETE FROM timed_roles WHERE user_id = ? AND role_id = ?", (warning_record['user_id'], role_id_to_remove))
-                
-                member = interaction.guild.get_member(warning_record['user_id'])
-                role = interaction.guild.get_role(role_id_to_remove)
-                if member and role and role in member.roles:
-                    try:
-                        await member.remove_roles(role, reason=f"Advertência {ipf} revogada.")
-                        self.logger.info(f"Cargo '{role.name}' removido de {member.display_name} devido à revogação da ADV {ipf}.")
-                    except discord.Forbidden:
-                        self.logger.error(f"Não foi possível remover o cargo de {member.display_name} na revogação (sem permissão).")
+            return True
 
-            await db.commit()
+        # A gravação vai para o escritor único do banco; o cargo só é removido no Discord depois do commit.
+        if not await get_writer(DB_FILE).run(revoke):
+            await interaction.followup.send("ℹ️ Esta advertência já foi revogada.", ephemeral=True)
+            return
+
+        if role_id_to_remove:
+            member = interaction.guild.get_member(warning_record['user_id'])
+            role = interaction.guild.get_role(role_id_to_remove)
+            if member and role and role in member.roles:
+                try:
+                    await member.remove_roles(role, reason=f"Advertência {ipf} revogada.")
+                    self.logger.info(f"Cargo '{role.name}' removido de {member.display_name} devido à revogação da ADV {ipf}.")
+                except discord.Forbidden:
+                    self.logger.error(f"Não foi possível remover o cargo de {member.display_name} na revogação (sem permissão).")
 
         log_channel = self.bot.get_channel(LOG_CHANNEL_ID)
         if log_channel:
@@ -302,6 +307,7 @@ class AdvCog(commands.Cog):
                 return
 
             self.logger.info(f"Encontrados {len(expired_roles)} cargos temporários para remover.")
+            processed_ids = []
             
             for record in expired_roles:
                 guild = self.bot.get_guild(record['guild_id'])
@@ -326,9 +332,10 @@ class AdvCog(commands.Cog):
                     except discord.HTTPException as e:
                          self.logger.error(f"Erro de HTTP ao remover cargo: {e}")
                 
-                await db.execute("DELETE FROM timed_roles WHERE record_id = ?", (record['record_id'],))
-            
-            await db.commit()
+                processed_ids.append((record['record_id'],))
+
+        # Uma única escrita em lote pelo escritor do banco, depois de todas as chamadas ao Discord.
+        await get_writer(DB_FILE).executemany("DELETE FROM timed_roles WHERE record_id = ?", processed_ids)
 
     @check_timed_roles.before_loop
     async def before_check_timed_roles(self):
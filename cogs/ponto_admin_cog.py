@@ -0,0 +1,654 @@
+# cogs/ponto_admin_cog.py
+import discord
+from discord.ext import commands, tasks
+from discord import app_commands, ui, ButtonStyle
+import json
+import logging
+import csv
+import gzip
+import io
+import math
+import asyncio
+import aiosqlite
+from datetime import datetime, timedelta
+from cogs.__db_writer import get_writer
+from cogs.__ponto_db import DB_FILE, archive_sessions, connect_sessions, adjust_daily_rollup, get_display_names
+
+logger = logging.getLogger('discord_bot')
+
+# --- Carregar Configurações ---
+try:
+    with open('config_ponto_admin_cog.json', 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    GUILD_ID = config.get('GUILD_ID')
+    ADMIN_ROLE_ID = config.get('ADMIN_ROLE_ID')
+    EXPORT_CHUNK_SIZE = config.get('EXPORT_CHUNK_SIZE', 5000)
+    ARCHIVE_AFTER_DAYS = config.get('ARCHIVE_AFTER_DAYS', 0)
+    MAX_SESSION_HOURS = config.get('MAX_SESSION_HOURS', 24)
+    ANOMALIES_PER_PAGE = config.get('ANOMALIES_PER_PAGE', 15)
+    IMPORT_BATCH_SIZE = config.get('IMPORT_BATCH_SIZE', 10000)
+except (FileNotFoundError, json.JSONDecodeError):
+    logger.critical("ERRO CRÍTICO: 'config_ponto_admin_cog.json' não encontrado ou mal formatado.")
+    GUILD_ID, ADMIN_ROLE_ID, EXPORT_CHUNK_SIZE, ARCHIVE_AFTER_DAYS, MAX_SESSION_HOURS, ANOMALIES_PER_PAGE, IMPORT_BATCH_SIZE = None, None, 5000, 0, 24, 15, 10000
+
+EXPORT_COLUMNS = ["session_id", "staff_id", "staff_name", "clock_in_time", "clock_out_time", "duration_seconds"]
+
+def parse_date_range(inicio: str | None, fim: str | None) -> tuple[str | None, str | None]:
+    """Converte datas DD/MM/AAAA em limites ISO [início, fim + 1 dia). Levanta ValueError se inválidas."""
+    since = datetime.strptime(inicio, "%d/%m/%Y").isoformat() if inicio else None
+    until = (datetime.strptime(fim, "%d/%m/%Y") + timedelta(days=1)).isoformat() if fim else None
+    return since, until
+
+# --- Importação de Sessões ---
+IMPORT_DATE_FORMATS = ("%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M")
+
+def parse_import_datetime(value: str) -> tuple[datetime, str]:
+    """Aceita ISO 8601 (como no /ponto exportar) ou DD/MM/AAAA HH:MM[:SS]. Horários com fuso viram horário local.
+
+    Retorna o datetime e a forma ISO usada no banco; valores que já estão nessa forma são reaproveitados.
+    """
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        for date_format in IMPORT_DATE_FORMATS:
+            try:
+                parsed = datetime.strptime(value, date_format)
+                return parsed, parsed.isoformat()
+            except ValueError:
+                continue
+        raise ValueError(f"data inválida '{value}'")
+    if parsed.tzinfo:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    elif len(value) in (19, 26) and value[10] == 'T':
+        return parsed, value
+    return parsed, parsed.isoformat()
+
+def _jsonl_fields(record) -> tuple:
+    if not isinstance(record, dict):
+        raise ValueError("a linha não é um objeto JSON")
+    return record.get('staff_id'), record.get('staff_name'), record.get('clock_in_time'), record.get('clock_out_time')
+
+def parse_import_file(data: bytes, filename: str) -> tuple[list[tuple[int, str, str, str]], list[str], int, int]:
+    """Lê e valida um arquivo CSV/JSONL (opcionalmente .gz) de sessões encerradas.
+
+    Cada registro precisa de staff_id, clock_in_time e clock_out_time; staff_name é opcional e as
+    demais colunas (como session_id e duration_seconds do /ponto exportar) são ignoradas.
+    Registros repetidos dentro do arquivo (mesmo membro e entrada) entram uma única vez, e sessões
+    que se sobrepõem dentro do próprio arquivo são descartadas. As linhas saem ordenadas por
+    (membro, entrada), a ordem do índice de sessões. Retorna (linhas válidas, erros, duplicadas,
+    sobrepostas). Roda fora do loop de eventos.
+    """
+    if filename.endswith(".gz"):
+        data = gzip.decompress(data)
+        filename = filename[:-3]
+    text = io.StringIO(data.decode('utf-8-sig'), newline='')
+    if filename.endswith(".csv"):
+        # csv.reader com índices de coluna é bem mais rápido que DictReader em arquivos grandes.
+        reader = csv.reader(text)
+        header = next(reader, [])
+        columns = {name: header.index(name) for name in ("staff_id", "staff_name", "clock_in_time", "clock_out_time") if name in header}
+        if not {"staff_id", "clock_in_time", "clock_out_time"} <= columns.keys():
+            raise csv.Error("o cabeçalho precisa ter as colunas staff_id, clock_in_time e clock_out_time")
+        records = reader
+
+        def fields(line: list[str]) -> tuple:
+            return line[columns["staff_id"]], line[columns["staff_name"]] if "staff_name" in columns else None, line[columns["clock_in_time"]], line[columns["clock_out_time"]]
+        first_line = 2
+    else:
+        records = (json.loads(line) for line in text if line.strip())
+        fields = _jsonl_fields
+        first_line = 1
+
+    rows, errors, seen, duplicates = [], [], set(), 0
+    max_seconds = MAX_SESSION_HOURS * 3600
+    for line_number, record in enumerate(records, first_line):
+        try:
+            staff_id, staff_name, clock_in_value, clock_out_value = fields(record)
+            if not clock_in_value or not clock_out_value:
+                raise ValueError("entrada e saída são obrigatórias")
+            staff_id = int(staff_id)
+            clock_in, clock_in_iso = parse_import_datetime(str(clock_in_value))
+            clock_out, clock_out_iso = parse_import_datetime(str(clock_out_value))
+            duration = (clock_out - clock_in).total_seconds()
+            if duration <= 0:
+                raise ValueError("saída não é posterior à entrada")
+            if duration > max_seconds:
+                raise ValueError(f"duração acima de {MAX_SESSION_HOURS}h")
+        except (IndexError, TypeError, ValueError) as e:
+            errors.append(f"Linha {line_number}: {e}")
+            continue
+        key = (staff_id, clock_in_iso)
+        if key in seen:
+            duplicates += 1
+            continue
+        seen.add(key)
+        rows.append((staff_id, staff_name or None, clock_in_iso, clock_out_iso))
+
+    rows.sort(key=lambda row: (row[0], row[2]))
+    overlapping = set()
+    current_staff, max_out, max_out_index = None, None, None
+    for index, (staff_id, _, clock_in_iso, clock_out_iso) in enumerate(rows):
+        if staff_id != current_staff:
+            current_staff, max_out, max_out_index = staff_id, None, None
+        if max_out and max_out > clock_in_iso:
+            overlapping.update((index, max_out_index))
+        if not max_out or clock_out_iso > max_out:
+            max_out, max_out_index = clock_out_iso, index
+    if overlapping:
+        rows = [row for index, row in enumerate(rows) if index not in overlapping]
+    return rows, errors, duplicates, len(overlapping)
+
+async def _load_import_rows(db: aiosqlite.Connection, rows: list[tuple[int, str, str, str]]) -> tuple[int, int]:
+    """Carrega as linhas na tabela temporária 'import_sessions', tira as duplicadas e marca as sobrepostas.
+
+    A comparação é com o que 'sessions' for nesta conexão: o banco principal ou, dentro de
+    connect_sessions, a view que inclui os arquivos anuais. As linhas entram em lotes de
+    IMPORT_BATCH_SIZE via executemany e as duplicadas (mesmo membro e entrada) saem pelo índice
+    (staff_id, clock_in_time). Uma linha se sobrepõe a uma sessão existente quando
+    s.clock_in_time < saída AND COALESCE(s.clock_out_time, '9999') > entrada (sessões abertas contam
+    até agora); como as duplicadas já saíram, isso é o mesmo que o MAX acumulado das saídas anteriores
+    passar da entrada ou a próxima entrada vir antes da saída, calculados em uma única passada com
+    funções de janela, como em scan_session_anomalies. Retorna (duplicadas, sobrepostas); quem
+    chama remove a tabela temporária.
+    """
+    await db.execute("CREATE TEMP TABLE IF NOT EXISTS import_sessions (staff_id INTEGER, staff_name TEXT, clock_in_time TEXT, clock_out_time TEXT, overlaps INTEGER NOT NULL DEFAULT 0)")
+    await db.execute("DELETE FROM temp.import_sessions")
+    for start in range(0, len(rows), IMPORT_BATCH_SIZE):
+        await db.executemany(
+            "INSERT INTO temp.import_sessions (staff_id, staff_name, clock_in_time, clock_out_time) VALUES (?, ?, ?, ?)",
+            rows[start:start + IMPORT_BATCH_SIZE]
+        )
+    cursor = await db.execute("""
+        DELETE FROM temp.import_sessions WHERE EXISTS (
+            SELECT 1 FROM sessions s WHERE s.staff_id = import_sessions.staff_id AND s.clock_in_time = import_sessions.clock_in_time
+        )
+    """)
+    duplicates = cursor.rowcount
+    cursor = await db.execute("""
+        UPDATE temp.import_sessions SET overlaps = 1 WHERE rowid IN (
+            SELECT import_rowid FROM (
+                SELECT import_rowid, clock_in_time, clock_out_time,
+                       MAX(existing_out) OVER (w ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING) AS prev_max_out,
+                       MIN(existing_in) OVER (w ROWS BETWEEN 1 FOLLOWING AND UNBOUNDED FOLLOWING) AS next_in
+                FROM (
+                    SELECT rowid AS import_rowid, staff_id, clock_in_time, clock_out_time, NULL AS existing_in, NULL AS existing_out
+                    FROM temp.import_sessions
+                    UNION ALL
+                    SELECT NULL, staff_id, clock_in_time, NULL, clock_in_time, COALESCE(clock_out_time, '9999')
+                    FROM sessions WHERE staff_id IN (SELECT staff_id FROM temp.import_sessions)
+                )
+                WINDOW w AS (PARTITION BY staff_id ORDER BY clock_in_time)
+            )
+            WHERE import_rowid IS NOT NULL AND (prev_max_out > clock_in_time OR next_in < clock_out_time)
+        )
+    """)
+    return duplicates, cursor.rowcount
+
+async def check_import_rows(db: aiosqlite.Connection, rows: list[tuple[int, str, str, str]]) -> tuple[list[tuple[int, str, str, str]], int, int]:
+    """Confere as linhas contra as sessões visíveis na conexão sem gravar nada.
+
+    Retorna (linhas que não duplicam nem sobrepõem, duplicadas, sobrepostas), na ordem (membro, entrada).
+    """
+    try:
+        duplicates, overlaps = await _load_import_rows(db, rows)
+        cursor = await db.execute("SELECT staff_id, staff_name, clock_in_time, clock_out_time FROM temp.import_sessions WHERE overlaps = 0 ORDER BY staff_id, clock_in_time")
+        return [tuple(row) for row in await cursor.fetchall()], duplicates, overlaps
+    finally:
+        await db.execute("DROP TABLE IF EXISTS temp.import_sessions")
+
+async def import_sessions(db: aiosqlite.Connection, rows: list[tuple[int, str, str, str]]) -> dict[str, int]:
+    """Insere as linhas que não duplicam nem sobrepõem sessões do banco principal.
+
+    Tudo acontece na transação de quem chama (o escritor único). As sessões arquivadas são conferidas
+    antes, com check_import_rows dentro de connect_sessions, já que o escritor não enxerga os arquivos;
+    aqui a conferência é repetida só contra o banco principal, que pode ter mudado nesse meio tempo.
+    As sessões inseridas são somadas à consolidação diária só nos dias que elas tocam, e os nomes do
+    arquivo entram no diretório de membros só para quem ainda não está nele.
+    """
+    try:
+        duplicates, overlaps = await _load_import_rows(db, rows)
+        cursor = await db.execute("""
+            INSERT INTO main.sessions (staff_id, clock_in_time, clock_out_time)
+            SELECT staff_id, clock_in_time, clock_out_time FROM temp.import_sessions
+            WHERE overlaps = 0
+        """)
+        imported = cursor.rowcount
+        await db.execute("""
+            INSERT OR IGNORE INTO main.members (user_id, display_name, updated_at)
+            SELECT staff_id, staff_name, MAX(clock_in_time) FROM temp.import_sessions
+            WHERE overlaps = 0 AND staff_name IS NOT NULL GROUP BY staff_id
+        """)
+        await adjust_daily_rollup(db, "SELECT staff_id, clock_in_time, clock_out_time FROM temp.import_sessions WHERE overlaps = 0")
+    finally:
+        await db.execute("DROP TABLE IF EXISTS temp.import_sessions")
+    return {'duplicadas': duplicates, 'sobrepostas': overlaps, 'importadas': imported}
+
+# --- Verificação de Integridade das Sessões ---
+ANOMALY_LABELS = {"invertida": "Saída antes da entrada", "longa": "Duração excessiva", "sobreposta": "Sobreposta a outra sessão"}
+
+async def scan_session_anomalies(db: aiosqlite.Connection) -> list[dict]:
+    """Encontra, em uma única passada, sessões invertidas, longas demais ou sobrepostas.
+
+    As funções de janela percorrem as sessões de cada membro na ordem do índice
+    (staff_id, clock_in_time, session_id): LAG traz a sessão anterior e o MAX acumulado da saída
+    detecta também sobreposições com sessões anteriores que "englobam" as seguintes.
+    """
+    query = """
+        SELECT session_id, staff_id, clock_in_time, clock_out_time, prev_session_id, prev_max_out,
+               (julianday(clock_out_time) - julianday(clock_in_time)) * 24 AS hours
+        FROM (
+            SELECT session_id, staff_id, clock_in_time, clock_out_time,
+                   LAG(session_id) OVER w AS prev_session_id,
+                   MAX(clock_out_time) OVER (w ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING) AS prev_max_out
+            FROM main.sessions
+            WINDOW w AS (PARTITION BY staff_id ORDER BY clock_in_time, session_id)
+        )
+        WHERE clock_out_time < clock_in_time
+           OR (julianday(clock_out_time) - julianday(clock_in_time)) * 24 > ?
+           OR prev_max_out > clock_in_time
+    """
+    anomalies = []
+    db.row_factory = aiosqlite.Row
+    async with db.execute(query, (MAX_SESSION_HOURS,)) as cursor:
+        async for row in cursor:
+            if row['clock_out_time'] and row['clock_out_time'] < row['clock_in_time']:
+                kind = "invertida"
+            elif row['hours'] is not None and row['hours'] > MAX_SESSION_HOURS:
+                kind = "longa"
+            else:
+                kind = "sobreposta"
+            anomalies.append({**dict(row), 'kind': kind})
+    return anomalies
+
+async def fix_clamp(db: aiosqlite.Connection, anomalies: list[dict]) -> int:
+    """Sessões invertidas passam a ter duração zero; sessões longas são limitadas a MAX_SESSION_HOURS."""
+    updates = []
+    for anomaly in anomalies:
+        clock_in = datetime.fromisoformat(anomaly['clock_in_time'])
+        if anomaly['kind'] == "invertida":
+            updates.append((anomaly['clock_in_time'], anomaly['session_id']))
+        elif anomaly['kind'] == "longa":
+            updates.append(((clock_in + timedelta(hours=MAX_SESSION_HOURS)).isoformat(), anomaly['session_id']))
+    await db.executemany("UPDATE sessions SET clock_out_time = ? WHERE session_id = ?", updates)
+    return len(updates)
+
+async def _closed_sessions_by_staff(db: aiosqlite.Connection, staff_ids: set[int]):
+    async with db.execute(
+        "SELECT session_id, staff_id, clock_in_time, clock_out_time FROM sessions WHERE clock_out_time IS NOT NULL AND staff_id IN (SELECT value FROM json_each(?)) ORDER BY staff_id, clock_in_time, session_id",
+        (json.dumps(sorted(staff_ids)),)
+    ) as cursor:
+        async for row in cursor:
+            yield row
+
+async def fix_merge(db: aiosqlite.Connection, anomalies: list[dict]) -> int:
+    """Une cada grupo de sessões sobrepostas de um membro em uma só sessão, do menor início à maior saída."""
+    staff_ids = {a['staff_id'] for a in anomalies if a['kind'] == "sobreposta"}
+    updates, deletes = [], []
+    head = None  # [session_id, staff_id, maior saída do grupo, saída original]
+    async for session_id, staff_id, clock_in, clock_out in _closed_sessions_by_staff(db, staff_ids):
+        if head and head[1] == staff_id and clock_in < head[2]:
+            head[2] = max(head[2], clock_out)
+            deletes.append((session_id,))
+            continue
+        if head and head[2] != head[3]:
+            updates.append((head[2], head[0]))
+        head = [session_id, staff_id, clock_out, clock_out]
+    if head and head[2] != head[3]:
+        updates.append((head[2], head[0]))
+    await db.executemany("UPDATE sessions SET clock_out_time = ? WHERE session_id = ?", updates)
+    await db.executemany("DELETE FROM sessions WHERE session_id = ?", deletes)
+    return len(deletes)
+
+async def fix_split(db: aiosqlite.Connection, anomalies: list[dict]) -> int:
+    """Recorta as sobreposições: cada sessão passa a começar quando as anteriores terminaram (ou é removida se ficar vazia)."""
+    staff_ids = {a['staff_id'] for a in anomalies if a['kind'] == "sobreposta"}
+    updates, deletes = [], []
+    current_staff, max_out = None, None
+    async for session_id, staff_id, clock_in, clock_out in _closed_sessions_by_staff(db, staff_ids):
+        if staff_id != current_staff:
+            current_staff, max_out = staff_id, None
+        if max_out and clock_in < max_out:
+            if clock_out <= max_out:
+                deletes.append((session_id,))
+                continue
+            updates.append((max_out, session_id))
+        max_out = max(max_out, clock_out) if max_out else clock_out
+    await db.executemany("UPDATE sessions SET clock_in_time = ? WHERE session_id = ?", updates)
+    await db.executemany("DELETE FROM sessions WHERE session_id = ?", deletes)
+    return len(updates) + len(deletes)
+
+async def apply_session_fix(db: aiosqlite.Connection, fix, anomalies: list[dict], staff_ids: list[int]) -> int:
+    """Aplica uma correção e ajusta a consolidação diária só pelas sessões que ela mudou.
+
+    As sessões dos membros afetados são copiadas para uma tabela temporária antes da correção; depois,
+    as versões antigas das sessões alteradas ou removidas são subtraídas e as novas são somadas. Assim
+    só os dias tocados mudam e as linhas de sessões já arquivadas ficam intactas. Não faz commit.
+    """
+    params = (json.dumps(staff_ids),)
+    await db.execute("CREATE TEMP TABLE IF NOT EXISTS fix_sessions_before (session_id INTEGER PRIMARY KEY, staff_id INTEGER, clock_in_time TEXT, clock_out_time TEXT)")
+    await db.execute("DELETE FROM temp.fix_sessions_before")
+    try:
+        await db.execute(
+            "INSERT INTO temp.fix_sessions_before SELECT session_id, staff_id, clock_in_time, clock_out_time FROM main.sessions WHERE staff_id IN (SELECT value FROM json_each(?))",
+            params
+        )
+        changed = await fix(db, anomalies)
+        unchanged = "s.clock_in_time = b.clock_in_time AND s.clock_out_time IS b.clock_out_time"
+        await adjust_daily_rollup(db, f"""
+            SELECT b.staff_id, b.clock_in_time, b.clock_out_time FROM temp.fix_sessions_before b
+            WHERE NOT EXISTS (SELECT 1 FROM main.sessions s WHERE s.session_id = b.session_id AND {unchanged})
+        """, sign=-1)
+        await adjust_daily_rollup(db, f"""
+            SELECT s.staff_id, s.clock_in_time, s.clock_out_time FROM main.sessions s
+            WHERE s.staff_id IN (SELECT value FROM json_each(?))
+              AND NOT EXISTS (SELECT 1 FROM temp.fix_sessions_before b WHERE b.session_id = s.session_id AND {unchanged})
+        """, params)
+    finally:
+        await db.execute("DROP TABLE IF EXISTS temp.fix_sessions_before")
+    return changed
+
+# --- View do Relatório de Integridade ---
+class IntegrityReportView(ui.View):
+    def __init__(self, cog: "PontoAdminCog", interaction: discord.Interaction, anomalies: list[dict], names: dict[int, str]):
+        super().__init__(timeout=300)
+        self.cog = cog
+        self.interaction = interaction
+        self.anomalies = anomalies
+        self.names = names
+        self.current_page = 0
+        self.total_pages = max(1, math.ceil(len(anomalies) / ANOMALIES_PER_PAGE))
+
+    def create_embed(self) -> discord.Embed:
+        counts = {kind: sum(1 for a in self.anomalies if a['kind'] == kind) for kind in ANOMALY_LABELS}
+        embed = discord.Embed(
+            title="🩺 Integridade das Sessões de Ponto",
+            color=discord.Color.orange() if self.anomalies else discord.Color.green(),
+            description=" | ".join(f"**{ANOMALY_LABELS[kind]}:** {count}" for kind, count in counts.items())
+        )
+        start = self.current_page * ANOMALIES_PER_PAGE
+        lines = []
+        for anomaly in self.anomalies[start:start + ANOMALIES_PER_PAGE]:
+            member_name = self.names.get(anomaly['staff_id'], f"ID: {anomaly['staff_id']}")
+            clock_in = datetime.fromisoformat(anomaly['clock_in_time']).strftime('%d/%m/%Y %H:%M')
+            clock_out = datetime.fromisoformat(anomaly['clock_out_time']).strftime('%d/%m/%Y %H:%M') if anomaly['clock_out_time'] else "em aberto"
+            detail = f" (após #{anomaly['prev_session_id']})" if anomaly['kind'] == "sobreposta" else ""
+            lines.append(f"`#{anomaly['session_id']}` **{member_name}** — {clock_in} → {clock_out} — {ANOMALY_LABELS[anomaly['kind']]}{detail}")
+        embed.description += "\n\n" + ("\n".join(lines) or "✅ Nenhuma anomalia encontrada.")
+        embed.set_footer(text=f"Página {self.current_page + 1} de {self.total_pages}")
+        self._update_buttons()
+        return embed
+
+    def _update_buttons(self):
+        kinds = {a['kind'] for a in self.anomalies}
+        self.children[0].disabled = self.current_page == 0
+        self.children[1].disabled = self.current_page >= self.total_pages - 1
+        self.children[2].disabled = not kinds & {"invertida", "longa"}
+        self.children[3].disabled = "sobreposta" not in kinds
+        self.children[4].disabled = "sobreposta" not in kinds
+
+    @ui.button(label="◀️ Anterior", style=ButtonStyle.primary)
+    async def go_to_previous_page(self, interaction: discord.Interaction, button: ui.Button):
+        self.current_page -= 1
+        await interaction.response.edit_message(embed=self.create_embed(), view=self)
+
+    @ui.button(label="Próxima ▶️", style=ButtonStyle.primary)
+    async def go_to_next_page(self, interaction: discord.Interaction, button: ui.Button):
+        self.current_page += 1
+        await interaction.response.edit_message(embed=self.create_embed(), view=self)
+
+    @ui.button(label="Limitar (invertidas/longas)", style=ButtonStyle.danger, row=1)
+    async def clamp_button(self, interaction: discord.Interaction, button: ui.Button):
+        await self.apply_fix(interaction, fix_clamp, "limitadas")
+
+    @ui.button(label="Mesclar sobrepostas", style=ButtonStyle.danger, row=1)
+    async def merge_button(self, interaction: discord.Interaction, button: ui.Button):
+        await self.apply_fix(interaction, fix_merge, "mescladas")
+
+    @ui.button(label="Recortar sobrepostas", style=ButtonStyle.danger, row=1)
+    async def split_button(self, interaction: discord.Interaction, button: ui.Button):
+        await self.apply_fix(interaction, fix_split, "recortadas")
+
+    async def apply_fix(self, interaction: discord.Interaction, fix, action_name: str):
+        await interaction.response.defer()
+        staff_ids = sorted({a['staff_id'] for a in self.anomalies})
+
+        changed = await get_writer(DB_FILE).run(lambda db: apply_session_fix(db, fix, self.anomalies, staff_ids))
+        logger.info(f"Correção de integridade ({action_name}) aplicada por {interaction.user.display_name}: {changed} sessões.")
+        self.cog.bot.dispatch('ponto_sessions_changed', staff_ids)
+
+        async with aiosqlite.connect(DB_FILE) as db:
+            self.anomalies = await scan_session_anomalies(db)
+        self.current_page = 0
+        self.total_pages = max(1, math.ceil(len(self.anomalies) / ANOMALIES_PER_PAGE))
+        await interaction.edit_original_response(embed=self.create_embed(), view=self)
+        await interaction.followup.send(f"✅ **{changed}** sessões {action_name}. A consolidação diária dos dias afetados foi ajustada.", ephemeral=True)
+
+    async def on_timeout(self):
+        try:
+            message = await self.interaction.original_response()
+            await message.edit(view=None)
+        except discord.NotFound:
+            pass
+
+# --- Classe do Cog de Administração do Ponto ---
+class PontoAdminCog(commands.Cog, name="PontoAdminCog"):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        if ARCHIVE_AFTER_DAYS:
+            self.archive_task.start()
+        logger.info("Cog 'PontoAdminCog' carregado.")
+
+    def cog_unload(self):
+        self.archive_task.cancel()
+
+    ponto_group = app_commands.Group(name="ponto", description="Ferramentas administrativas do sistema de ponto.")
+
+    async def write_export(self, buffer: io.BytesIO, formato: str, since: str | None, until: str | None, staff_ids: list[int] | None) -> int:
+        """Escreve as sessões filtradas no buffer comprimido, em blocos, sem materializar o resultado inteiro.
+
+        A duração já vem calculada pelo SQLite. As sessões saem por membro e em ordem de entrada, a ordem
+        do índice (staff_id, clock_in_time, session_id), então nem a união com os arquivos anuais precisa
+        de ordenação temporária. A formatação e a compressão de cada bloco rodam em uma thread, fora do
+        loop de eventos. Retorna o número de linhas exportadas.
+        """
+        query = """
+            SELECT session_id, staff_id, m.display_name, clock_in_time, clock_out_time,
+                   CAST(ROUND((julianday(clock_out_time) - julianday(clock_in_time)) * 86400) AS INTEGER) AS duration_seconds
+            FROM sessions LEFT JOIN members m ON m.user_id = sessions.staff_id WHERE 1 = 1
+        """
+        params = []
+        if since:
+            query += " AND clock_in_time >= ?"
+            params.append(since)
+        if until:
+            query += " AND clock_in_time < ?"
+            params.append(until)
+        if staff_ids is not None:
+            query += " AND staff_id IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps(staff_ids))
+        query += " ORDER BY staff_id, clock_in_time, session_id"
+
+        exported = 0
+        # O GzipFile não fecha o BytesIO recebido, então fechar o wrapper só finaliza o gzip.
+        text = io.TextIOWrapper(gzip.GzipFile(fileobj=buffer, mode='wb'), encoding='utf-8', newline='')
+        writer = csv.writer(text) if formato == "csv" else None
+
+        def write_rows(rows: list):
+            if writer:
+                writer.writerows(rows)
+            else:
+                text.writelines(json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + "\n" for row in rows)
+
+        try:
+            if writer:
+                writer.writerow(EXPORT_COLUMNS)
+            async with connect_sessions(since, until) as db:
+                async with db.execute(query, params) as cursor:
+                    while rows := await cursor.fetchmany(EXPORT_CHUNK_SIZE):
+                        await asyncio.to_thread(write_rows, rows)
+                        exported += len(rows)
+        finally:
+            await asyncio.to_thread(text.close)
+        return exported
+
+    @ponto_group.command(name="exportar", description="Exporta as sessões de ponto em CSV ou JSONL comprimido.")
+    @app_commands.checks.has_role(ADMIN_ROLE_ID)
+    @app_commands.describe(
+        formato="Formato do arquivo exportado.",
+        inicio="Data inicial (DD/MM/AAAA).",
+        fim="Data final, inclusiva (DD/MM/AAAA).",
+        membro="Exporta apenas as sessões deste membro.",
+        cargo="Exporta apenas as sessões dos membros com este cargo."
+    )
+    @app_commands.choices(formato=[
+        app_commands.Choice(name="CSV", value="csv"),
+        app_commands.Choice(name="JSONL", value="jsonl"),
+    ])
+    async def exportar(self, interaction: discord.Interaction, formato: str, inicio: str = None, fim: str = None, membro: discord.Member = None, cargo: discord.Role = None):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            since, until = parse_date_range(inicio, fim)
+        except ValueError:
+            await interaction.followup.send("❌ Formato de data inválido. Use `DD/MM/AAAA`.", ephemeral=True)
+            return
+
+        staff_ids = None
+        if membro or cargo:
+            staff_ids = {m.id for m in cargo.members} if cargo else set()
+            if membro:
+                staff_ids.add(membro.id)
+            staff_ids = sorted(staff_ids)
+
+        buffer = io.BytesIO()
+        try:
+            exported = await self.write_export(buffer, formato, since, until, staff_ids)
+        except Exception as e:
+            logger.error(f"Erro ao exportar sessões de ponto: {e}", exc_info=True)
+            await interaction.followup.send("❌ Ocorreu um erro ao exportar as sessões.", ephemeral=True)
+            return
+
+        if exported == 0:
+            await interaction.followup.send("ℹ️ Nenhuma sessão encontrada com os filtros informados.", ephemeral=True)
+            return
+        if buffer.getbuffer().nbytes > interaction.guild.filesize_limit:
+            await interaction.followup.send("❌ O arquivo exportado excede o limite de upload do servidor. Reduza o período ou o conjunto de membros.", ephemeral=True)
+            return
+
+        buffer.seek(0)
+        filename = f"sessoes_ponto_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{formato}.gz"
+        logger.info(f"{exported} sessões de ponto exportadas por {interaction.user.display_name}.")
+        await interaction.followup.send(f"✅ **{exported}** sessões exportadas.", file=discord.File(buffer, filename=filename), ephemeral=True)
+
+    @ponto_group.command(name="arquivar", description="Move sessões encerradas antigas para os arquivos anuais (clock_AAAA.sqlite).")
+    @app_commands.checks.has_role(ADMIN_ROLE_ID)
+    @app_commands.describe(antes_de="Arquiva as sessões encerradas antes desta data (DD/MM/AAAA).")
+    async def arquivar(self, interaction: discord.Interaction, antes_de: str):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            cutoff = datetime.strptime(antes_de, "%d/%m/%Y")
+        except ValueError:
+            await interaction.followup.send("❌ Formato de data inválido. Use `DD/MM/AAAA`.", ephemeral=True)
+            return
+
+        moved = await archive_sessions(cutoff)
+        if not moved:
+            await interaction.followup.send("ℹ️ Nenhuma sessão encerrada antes dessa data para arquivar.", ephemeral=True)
+            return
+        logger.info(f"Arquivamento manual por {interaction.user.display_name}: {moved}")
+        summary = "\n".join(f"- `clock_{year}.sqlite`: **{count}** sessões" for year, count in moved.items())
+        await interaction.followup.send(f"✅ Sessões arquivadas com sucesso:\n{summary}", ephemeral=True)
+
+    @ponto_group.command(name="importar", description="Importa sessões encerradas de um arquivo CSV ou JSONL (aceita .gz).")
+    @app_commands.checks.has_role(ADMIN_ROLE_ID)
+    @app_commands.describe(
+        arquivo="Arquivo .csv/.jsonl (ou .gz) com staff_id, clock_in_time, clock_out_time e, opcionalmente, staff_name.",
+        simular="Apenas valida e mostra o que seria importado, sem gravar nada."
+    )
+    async def importar(self, interaction: discord.Interaction, arquivo: discord.Attachment, simular: bool = False):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        filename = arquivo.filename.lower()
+        if not filename.removesuffix(".gz").endswith((".csv", ".jsonl")):
+            await interaction.followup.send("❌ Envie um arquivo `.csv` ou `.jsonl` (opcionalmente comprimido em `.gz`).", ephemeral=True)
+            return
+
+        try:
+            rows, errors, file_duplicates, file_overlaps = await asyncio.to_thread(parse_import_file, await arquivo.read(), filename)
+        except (UnicodeDecodeError, json.JSONDecodeError, gzip.BadGzipFile, csv.Error) as e:
+            await interaction.followup.send(f"❌ Não foi possível ler o arquivo: {e}", ephemeral=True)
+            return
+
+        valid_rows = len(rows)
+        result = {'duplicadas': 0, 'sobrepostas': 0, 'importadas': 0}
+        if rows:
+            # Confere também as sessões arquivadas que o período do arquivo alcança (inclusive sessões
+            # iniciadas até MAX_SESSION_HOURS antes, que podem ter sido arquivadas no ano anterior).
+            since = (datetime.fromisoformat(min(row[2] for row in rows)) - timedelta(hours=MAX_SESSION_HOURS)).isoformat()
+            async with connect_sessions(since, max(row[3] for row in rows)) as db:
+                rows, result['duplicadas'], result['sobrepostas'] = await check_import_rows(db, rows)
+            if simular:
+                result['importadas'] = len(rows)
+            elif rows:
+                written = await get_writer(DB_FILE).run(lambda db: import_sessions(db, rows))
+                result = {key: result[key] + written[key] for key in result}
+                if result['importadas']:
+                    self.bot.dispatch('ponto_sessions_changed', sorted({row[0] for row in rows}))
+            if not simular:
+                logger.info(f"Importação de sessões por {interaction.user.display_name} ({arquivo.filename}): {result}")
+
+        embed = discord.Embed(
+            title="🧪 Simulação de Importação" if simular else "📥 Importação de Sessões",
+            color=discord.Color.blue() if simular else discord.Color.green()
+        )
+        embed.add_field(name="Válidas no arquivo", value=str(valid_rows), inline=True)
+        embed.add_field(name="Inválidas", value=str(len(errors)), inline=True)
+        embed.add_field(name="Duplicadas", value=str(file_duplicates + result['duplicadas']), inline=True)
+        embed.add_field(name="Sobrepostas (ignoradas)", value=str(file_overlaps + result['sobrepostas']), inline=True)
+        embed.add_field(name="A importar" if simular else "Importadas", value=f"**{result['importadas']}**", inline=True)
+        if errors:
+            shown = "\n".join(errors[:10]) + (f"\n... e mais {len(errors) - 10}." if len(errors) > 10 else "")
+            embed.add_field(name="Erros de validação", value=shown[:1024], inline=False)
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+    @ponto_group.command(name="integridade", description="Procura sessões invertidas, longas demais ou sobrepostas e oferece correções.")
+    @app_commands.checks.has_role(ADMIN_ROLE_ID)
+    async def integridade(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        async with aiosqlite.connect(DB_FILE) as db:
+            anomalies = await scan_session_anomalies(db)
+        names = await get_display_names(sorted({a['staff_id'] for a in anomalies}))
+        view = IntegrityReportView(self, interaction, anomalies, names)
+        await interaction.followup.send(embed=view.create_embed(), view=view, ephemeral=True)
+
+    @tasks.loop(hours=24.0)
+    async def archive_task(self):
+        cutoff = datetime.combine(datetime.now().date() - timedelta(days=ARCHIVE_AFTER_DAYS), datetime.min.time())
+        try:
+            moved = await archive_sessions(cutoff)
+            if moved:
+                logger.info(f"Arquivamento automático de sessões anteriores a {cutoff.date()}: {moved}")
+        except Exception as e:
+            logger.error(f"Erro no arquivamento automático de sessões: {e}", exc_info=True)
+
+    @archive_task.before_loop
+    async def before_archive_task(self):
+        await self.bot.wait_until_ready()
+
+    async def cog_app_command_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        if isinstance(error, app_commands.MissingRole):
+            msg = "❌ Você não tem permissão para usar este comando."
+        else:
+            logger.error(f"Erro inesperado nos comandos de /ponto: {error}", exc_info=True)
+            msg = "Ocorreu um erro inesperado."
+        if interaction.response.is_done():
+            await interaction.followup.send(msg, ephemeral=True)
+        else:
+            await interaction.response.send_message(msg, ephemeral=True)
+
+async def setup(bot: commands.Bot):
+    if not all([GUILD_ID, ADMIN_ROLE_ID]):
+        logger.error("Não foi possível carregar 'PontoAdminCog' devido a configs ausentes em 'config_ponto_admin_cog.json'.")
+        return
+    cog = PontoAdminCog(bot)
+    bot.tree.add_command(cog.ponto_group, guild=discord.Object(id=GUILD_ID))
+    await bot.add_cog(cog)
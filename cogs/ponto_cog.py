@@ -5,8 +5,14 @@ from discord.ui import Button, View
 from discord import app_commands, ButtonStyle
 import datetime
 import aiosqlite
+import asyncio
 import json
 import logging
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from cogs.__db_writer import get_writer, log_write_failure
+from cogs.__ponto_db import setup_daily_rollup, add_to_daily_rollup, rebuild_daily_rollup, setup_archive_state, connect_sessions, setup_members, get_display_names, UPSERT_MEMBER_SQL
 
 # --- 1. Carregar Configurações ---
 try:
@@ -22,8 +28,35 @@ PONTO_ROLE_ID = config.get('PONTO_ROLE_ID')
 CLOCK_IN_CHANNEL_ID = config.get('CLOCK_IN_CHANNEL_ID')
 PONTO_STATUS_CHANNEL_ID = config.get('PONTO_STATUS_CHANNEL_ID')
 PONTO_VOICE_CHANNEL_IDS = config.get('PONTO_VOICE_CHANNEL_IDS', [])
+STATUS_BOARD_MODE = config.get('STATUS_BOARD_MODE', False)
+STATUS_BOARD_STORAGE_FILE = config.get('STATUS_BOARD_STORAGE_FILE', 'ponto_board.json')
+STATUS_BOARD_REFRESH_SECONDS = config.get('STATUS_BOARD_REFRESH_SECONDS', 15)
+STATUS_BOARD_MEMBERS_PER_MESSAGE = config.get('STATUS_BOARD_MEMBERS_PER_MESSAGE', 40)
+RANKING_SIZE = config.get('RANKING_SIZE', 20)
+VOICE_TRACKING_ENABLED = config.get('VOICE_TRACKING_ENABLED', True)
+VOICE_EXCLUDE_SELF_DEAF = config.get('VOICE_EXCLUDE_SELF_DEAF', False)
+VOICE_FLUSH_SECONDS = config.get('VOICE_FLUSH_SECONDS', 60)
 MESSAGES = config.get('MESSAGES', {})
 
+# Um lock por membro serializa cliques repetidos de entrada/saída do mesmo usuário neste processo.
+# Cada lock só existe enquanto alguém o segura ou espera por ele (contado em CLOCK_LOCK_USERS).
+CLOCK_LOCKS: dict[int, asyncio.Lock] = {}
+CLOCK_LOCK_USERS: Counter = Counter()
+
+@asynccontextmanager
+async def clock_lock(member_id: int):
+    """Segura o lock de entrada/saída do membro e o descarta quando ninguém mais o usa."""
+    lock = CLOCK_LOCKS.setdefault(member_id, asyncio.Lock())
+    CLOCK_LOCK_USERS[member_id] += 1
+    try:
+        async with lock:
+            yield
+    finally:
+        CLOCK_LOCK_USERS[member_id] -= 1
+        if not CLOCK_LOCK_USERS[member_id]:
+            del CLOCK_LOCK_USERS[member_id]
+            del CLOCK_LOCKS[member_id]
+
 # --- 2. Funções do Banco de Dados e Helpers ---
 async def setup_database():
     """Cria e atualiza a tabela 'sessions' se necessário."""
@@ -32,7 +65,6 @@ async def setup_database():
             CREATE TABLE IF NOT EXISTS sessions (
                 session_id INTEGER PRIMARY KEY AUTOINCREMENT,
                 staff_id INTEGER NOT NULL,
-                staff_name TEXT NOT NULL,
                 clock_in_time TEXT NOT NULL,
                 clock_out_time TEXT,
                 status_message_id INTEGER 
@@ -43,6 +75,36 @@ async def setup_database():
             if 'status_message_id' not in columns:
                 await db.execute('ALTER TABLE sessions ADD COLUMN status_message_id INTEGER')
                 logging.info("Coluna 'status_message_id' adicionada ao banco de dados.")
+            if 'voice_seconds' not in columns:
+                await db.execute('ALTER TABLE sessions ADD COLUMN voice_seconds INTEGER')
+                logging.info("Coluna 'voice_seconds' adicionada ao banco de dados.")
+        # Intervalos de presença nos canais de ponto, em segundos Unix para ocupar pouco espaço.
+        await db.execute('''
+            CREATE TABLE IF NOT EXISTS voice_intervals (
+                staff_id INTEGER NOT NULL,
+                channel_id INTEGER NOT NULL,
+                started_at INTEGER NOT NULL,
+                ended_at INTEGER NOT NULL
+            )
+        ''')
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_voice_intervals_staff_start ON voice_intervals (staff_id, started_at)")
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_sessions_staff_clock_in ON sessions (staff_id, clock_in_time, session_id)")
+        # Antes de criar o índice único de sessão aberta, encerra com duração zero as sessões abertas
+        # duplicadas que possam existir, mantendo apenas a mais recente de cada membro.
+        cursor = await db.execute('''
+            UPDATE sessions SET clock_out_time = clock_in_time
+            WHERE clock_out_time IS NULL AND session_id NOT IN (
+                SELECT MAX(session_id) FROM sessions WHERE clock_out_time IS NULL GROUP BY staff_id
+            )
+        ''')
+        if cursor.rowcount:
+            logging.warning(f"{cursor.rowcount} sessões abertas duplicadas foram encerradas com duração zero.")
+        await db.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_sessions_one_open ON sessions (staff_id) WHERE clock_out_time IS NULL")
+        await setup_archive_state(db)
+        await setup_members(db)
+        if await setup_daily_rollup(db):
+            rows = await rebuild_daily_rollup(db)
+            logging.info(f"Tabela 'daily_rollup' criada e preenchida com {rows} registros a partir das sessões existentes.")
         await db.commit()
 
 async def get_open_session(user_id):
@@ -54,24 +116,38 @@ async def get_open_session(user_id):
 
 async def execute_clock_out(bot: commands.Bot, member: discord.Member) -> tuple[bool, str]:
     """Executa a lógica de clock-out e atualiza a mensagem de status."""
+    async with clock_lock(member.id):
+        return await _execute_clock_out_locked(bot, member)
+
+async def _execute_clock_out_locked(bot: commands.Bot, member: discord.Member) -> tuple[bool, str]:
     open_session = await get_open_session(member.id)
     if not open_session:
         return (False, MESSAGES.get('ERROR_NOT_CLOCKED_IN', "Você não está em serviço."))
 
     now = datetime.datetime.now()
     now_iso = now.isoformat()
+    clock_in_time = datetime.datetime.fromisoformat(open_session['clock_in_time'])
+    ponto_cog = bot.get_cog('PontoCog')
+    voice_tracker = ponto_cog.voice_tracker if ponto_cog else None
     
-    async with aiosqlite.connect('clock.sqlite') as db:
+    async def close_session(db: aiosqlite.Connection):
         await db.execute("UPDATE sessions SET clock_out_time = ? WHERE session_id = ?", (now_iso, open_session['session_id']))
-        await db.commit()
+        await add_to_daily_rollup(db, member.id, clock_in_time, now)
+        if voice_tracker:
+            voice_seconds = await voice_tracker.session_voice_seconds(db, member.id, clock_in_time, now)
+            await db.execute("UPDATE sessions SET voice_seconds = ? WHERE session_id = ?", (voice_seconds, open_session['session_id']))
+    await get_writer('clock.sqlite').run(close_session)
+    # Avisa os demais cogs (caches de ranking, relatórios, promoções) que as horas do membro mudaram.
+    bot.dispatch('ponto_clock_out', member, open_session['session_id'])
 
-    clock_in_time = datetime.datetime.fromisoformat(open_session['clock_in_time'])
     duration = now - clock_in_time
     h, rem = divmod(int(duration.total_seconds()), 3600)
     m, s = divmod(rem, 60)
     duration_str = f"{h}h, {m}m e {s}s"
 
-    if PONTO_STATUS_CHANNEL_ID and open_session['status_message_id']:
+    if ponto_cog and ponto_cog.board:
+        ponto_cog.board.remove(member.id)
+    elif PONTO_STATUS_CHANNEL_ID and open_session['status_message_id']:
         status_channel = bot.get_channel(PONTO_STATUS_CHANNEL_ID)
         if status_channel:
             try:
@@ -95,6 +171,233 @@ async def execute_clock_out(bot: commands.Bot, member: discord.Member) -> tuple[
 
     return (True, duration_str)
 
+class OnDutyBoard:
+    """Quadro único com todos os membros em serviço, usado no lugar de uma mensagem por sessão.
+
+    O estado fica em memória e as mudanças apenas marcam o quadro como "sujo"; uma tarefa
+    redesenha as mensagens no máximo uma vez a cada STATUS_BOARD_REFRESH_SECONDS, juntando
+    rajadas de entradas/saídas em uma única edição. A duração em andamento usa timestamps
+    relativos do Discord, que o cliente atualiza sozinho sem novas chamadas à API.
+    """
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.logger = logging.getLogger('discord_bot')
+        self.on_duty: dict[int, dict] = {}
+        self._dirty = asyncio.Event()
+        self._last_rendered: list[dict] = []
+        self._task: asyncio.Task | None = None
+
+    async def load(self):
+        """Reconstrói o estado em memória a partir das sessões abertas no banco."""
+        async with aiosqlite.connect('clock.sqlite') as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute('''
+                SELECT s.staff_id, COALESCE(m.display_name, s.staff_id) AS display_name, s.clock_in_time
+                FROM sessions s LEFT JOIN members m ON m.user_id = s.staff_id
+                WHERE s.clock_out_time IS NULL
+            ''') as cursor:
+                for row in await cursor.fetchall():
+                    self.on_duty[row['staff_id']] = {
+                        'name': row['display_name'],
+                        'clock_in': datetime.datetime.fromisoformat(row['clock_in_time'])
+                    }
+        self._dirty.set()
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    def add(self, member: discord.Member, clock_in: datetime.datetime):
+        self.on_duty[member.id] = {'name': member.display_name, 'clock_in': clock_in}
+        self._dirty.set()
+
+    def remove(self, member_id: int):
+        if self.on_duty.pop(member_id, None) is not None:
+            self._dirty.set()
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        while True:
+            await self._dirty.wait()
+            self._dirty.clear()
+            try:
+                await self._render()
+            except Exception as e:
+                self.logger.error(f"Erro ao atualizar o quadro de serviço: {e}", exc_info=True)
+            await asyncio.sleep(STATUS_BOARD_REFRESH_SECONDS)
+
+    def _build_embeds(self) -> list[discord.Embed]:
+        entries = sorted(self.on_duty.items(), key=lambda item: item[1]['clock_in'])
+        per_message = max(1, STATUS_BOARD_MEMBERS_PER_MESSAGE)
+        pages = [entries[i:i + per_message] for i in range(0, len(entries), per_message)] or [[]]
+        line_template = MESSAGES.get('BOARD_LINE', "**{member_name}** — desde <t:{timestamp}:t> (<t:{timestamp}:R>)")
+
+        embeds = []
+        for index, page in enumerate(pages, 1):
+            embed = discord.Embed(title=MESSAGES.get('BOARD_TITLE', "🟢 Em Serviço Agora"), color=discord.Color.green())
+            if page:
+                embed.description = "\n".join(
+                    line_template.format(member_name=data['name'], timestamp=int(data['clock_in'].timestamp()))
+                    for _, data in page
+                )
+            else:
+                embed.description = MESSAGES.get('BOARD_EMPTY', "Ninguém em serviço no momento.")
+            embed.set_footer(text=f"{len(entries)} em serviço | Página {index} de {len(pages)}")
+            embeds.append(embed)
+        return embeds
+
+    def _load_message_ids(self) -> list[int]:
+        try:
+            with open(STATUS_BOARD_STORAGE_FILE, 'r') as f:
+                return json.load(f).get('message_ids', [])
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+
+    def _save_message_ids(self, message_ids: list[int]):
+        with open(STATUS_BOARD_STORAGE_FILE, 'w') as f:
+            json.dump({'message_ids': message_ids}, f)
+
+    async def _render(self):
+        channel = self.bot.get_channel(PONTO_STATUS_CHANNEL_ID)
+        if not channel:
+            self.logger.error(f"Canal de status do ponto com ID {PONTO_STATUS_CHANNEL_ID} não encontrado.")
+            return
+
+        embeds = self._build_embeds()
+        rendered = [embed.to_dict() for embed in embeds]
+        message_ids = self._load_message_ids()
+        new_message_ids = []
+
+        for index, embed in enumerate(embeds):
+            unchanged = index < len(self._last_rendered) and self._last_rendered[index] == rendered[index]
+            if index < len(message_ids):
+                message = channel.get_partial_message(message_ids[index])
+                if unchanged:
+                    new_message_ids.append(message.id)
+                    continue
+                try:
+                    await message.edit(embed=embed)
+                    new_message_ids.append(message.id)
+                    continue
+                except discord.NotFound:
+                    self.logger.warning(f"Mensagem do quadro de serviço (ID: {message_ids[index]}) não encontrada. Enviando uma nova.")
+            message = await channel.send(embed=embed)
+            new_message_ids.append(message.id)
+
+        for surplus_id in message_ids[len(embeds):]:
+            try:
+                await channel.get_partial_message(surplus_id).delete()
+            except discord.NotFound:
+                pass
+
+        self._last_rendered = rendered
+        if new_message_ids != message_ids:
+            self._save_message_ids(new_message_ids)
+
+class VoicePresenceTracker:
+    """Registra quando cada membro esteve de fato em um canal de ponto (entrada, saída, troca de canal).
+
+    Os intervalos abertos ficam em memória; os encerrados vão para um buffer que é gravado em lote
+    na tabela 'voice_intervals' a cada VOICE_FLUSH_SECONDS pelo escritor compartilhado. Com
+    VOICE_EXCLUDE_SELF_DEAF, o tempo com o áudio desligado pelo próprio membro não conta.
+    No clock-out, o tempo em voz dentro da sessão é somado e guardado em 'sessions.voice_seconds'.
+    """
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.logger = logging.getLogger('discord_bot')
+        self.open_intervals: dict[int, tuple[int, int]] = {}
+        self.pending: list[tuple[int, int, int, int]] = []
+        self._task: asyncio.Task | None = None
+
+    @staticmethod
+    def _counted_channel(state: discord.VoiceState | None) -> int | None:
+        if not state or not state.channel or state.channel.id not in PONTO_VOICE_CHANNEL_IDS:
+            return None
+        if VOICE_EXCLUDE_SELF_DEAF and state.self_deaf:
+            return None
+        return state.channel.id
+
+    def update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+        channel_before, channel_after = self._counted_channel(before), self._counted_channel(after)
+        if channel_before == channel_after and (channel_after is None or member.id in self.open_intervals):
+            return
+        now = int(time.time())
+        self._close(member.id, now)
+        if channel_after is not None:
+            self.open_intervals[member.id] = (channel_after, now)
+
+    def _close(self, member_id: int, now: int):
+        if (interval := self.open_intervals.pop(member_id, None)) is None:
+            return
+        channel_id, started_at = interval
+        if now > started_at:
+            self.pending.append((member_id, channel_id, started_at, now))
+
+    async def session_voice_seconds(self, db: aiosqlite.Connection, member_id: int, start: datetime.datetime, end: datetime.datetime) -> int:
+        """Soma o tempo em voz do membro dentro da sessão. Roda na transação do clock-out.
+
+        Os intervalos pendentes do membro são gravados na mesma transação, e o intervalo ainda aberto
+        (se o membro continua no canal) é contado até o fim da sessão.
+        """
+        start_ts, end_ts = int(start.timestamp()), int(end.timestamp())
+        own = [interval for interval in self.pending if interval[0] == member_id]
+        if own:
+            self.pending = [interval for interval in self.pending if interval[0] != member_id]
+            try:
+                await db.executemany("INSERT INTO voice_intervals (staff_id, channel_id, started_at, ended_at) VALUES (?, ?, ?, ?)", own)
+            except Exception:
+                self.pending.extend(own)
+                raise
+        cursor = await db.execute(
+            """SELECT COALESCE(SUM(MIN(ended_at, ?) - MAX(started_at, ?)), 0) FROM voice_intervals
+               WHERE staff_id = ? AND started_at < ? AND ended_at > ?""",
+            (end_ts, start_ts, member_id, end_ts, start_ts)
+        )
+        total = (await cursor.fetchone())[0]
+        if (interval := self.open_intervals.get(member_id)) and interval[1] < end_ts:
+            total += end_ts - max(interval[1], start_ts)
+        return total
+
+    def seed(self):
+        """Abre intervalos para quem já está nos canais de ponto quando o bot inicia."""
+        now = int(time.time())
+        for channel_id in PONTO_VOICE_CHANNEL_IDS:
+            channel = self.bot.get_channel(channel_id)
+            for member in getattr(channel, 'members', []):
+                if not member.bot and self._counted_channel(member.voice) is not None:
+                    self.open_intervals.setdefault(member.id, (channel_id, now))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+        now = int(time.time())
+        for member_id in list(self.open_intervals):
+            self._close(member_id, now)
+        await self.flush()
+
+    async def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        try:
+            await get_writer('clock.sqlite').executemany("INSERT INTO voice_intervals (staff_id, channel_id, started_at, ended_at) VALUES (?, ?, ?, ?)", batch)
+        except Exception as e:
+            self.pending = batch + self.pending
+            self.logger.error(f"Erro ao gravar {len(batch)} intervalos de presença em voz: {e}", exc_info=True)
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        self.seed()
+        while True:
+            await asyncio.sleep(VOICE_FLUSH_SECONDS)
+            await self.flush()
+
 def create_panel_embed_from_json() -> discord.Embed | None:
     """Cria um embed completo a partir do arquivo 'panel_embed.json'."""
     logger = logging.getLogger('discord_bot')
@@ -187,35 +490,59 @@ class ClockView(View):
             await interaction.followup.send(MESSAGES.get('ERROR_NOT_IN_VOICE_CHANNEL').format(channel_names=", ".join(allowed_channels) or "N/A"), ephemeral=True)
             return
 
-        if await get_open_session(interaction.user.id):
+        async with clock_lock(interaction.user.id):
+            now = await self._clock_in(interaction.user)
+        if not now:
             await interaction.followup.send(MESSAGES.get('ERROR_ALREADY_CLOCKED_IN'), ephemeral=True)
             return
 
+        await interaction.followup.send(MESSAGES.get('SUCCESS_CLOCK_IN').format(time=now.strftime('%H:%M:%S')), ephemeral=True)
+
+    async def _clock_in(self, member: discord.Member) -> datetime.datetime | None:
+        """Abre a sessão e atualiza o diretório de membros em uma única unidade do escritor. Retorna o
+        horário de entrada, ou None se já havia sessão aberta.
+
+        O índice único parcial em sessões abertas garante que dois cliques simultâneos não criem duas
+        sessões. No modo de mensagem por sessão, o ID da mensagem de status é gravado depois do envio;
+        se essa gravação falhar, a mensagem é apagada, já que a saída não conseguiria encontrá-la.
+        """
         now = datetime.datetime.now()
-        session_id = None
-        async with aiosqlite.connect('clock.sqlite') as db:
-            cursor = await db.execute("INSERT INTO sessions (staff_id, staff_name, clock_in_time) VALUES (?, ?, ?)",
-                             (interaction.user.id, interaction.user.display_name, now.isoformat()))
-            await db.commit()
-            session_id = cursor.lastrowid
-        
-        if PONTO_STATUS_CHANNEL_ID:
-            status_channel = self.bot.get_channel(PONTO_STATUS_CHANNEL_ID)
-            if status_channel:
-                embed_service = discord.Embed(
-                    title="🟢 Em Serviço",
-                    description=f"**{interaction.user.display_name}** iniciou o serviço.",
-                    color=discord.Color.green()
-                )
-                embed_service.add_field(name="Horário de Entrada", value=f"<t:{int(now.timestamp())}:t>", inline=False)
-                embed_service.set_thumbnail(url=interaction.user.display_avatar.url)
-                
-                status_message = await status_channel.send(embed=embed_service)
-                async with aiosqlite.connect('clock.sqlite') as db:
-                    await db.execute("UPDATE sessions SET status_message_id = ? WHERE session_id = ?", (status_message.id, session_id))
-                    await db.commit()
+        writer = get_writer('clock.sqlite')
 
-        await interaction.followup.send(MESSAGES.get('SUCCESS_CLOCK_IN').format(time=now.strftime('%H:%M:%S')), ephemeral=True)
+        async def open_session(db: aiosqlite.Connection) -> int:
+            cursor = await db.execute("INSERT INTO sessions (staff_id, clock_in_time) VALUES (?, ?)", (member.id, now.isoformat()))
+            await db.execute(UPSERT_MEMBER_SQL, (member.id, member.display_name, now.isoformat()))
+            return cursor.lastrowid
+        try:
+            session_id = await writer.run(open_session)
+        except aiosqlite.IntegrityError:
+            return None
+
+        ponto_cog = self.bot.get_cog('PontoCog')
+        if ponto_cog and ponto_cog.board:
+            ponto_cog.board.add(member, now)
+        elif PONTO_STATUS_CHANNEL_ID and (status_channel := self.bot.get_channel(PONTO_STATUS_CHANNEL_ID)):
+            embed_service = discord.Embed(
+                title="🟢 Em Serviço",
+                description=f"**{member.display_name}** iniciou o serviço.",
+                color=discord.Color.green()
+            )
+            embed_service.add_field(name="Horário de Entrada", value=f"<t:{int(now.timestamp())}:t>", inline=False)
+            embed_service.set_thumbnail(url=member.display_avatar.url)
+            try:
+                status_message = await status_channel.send(embed=embed_service)
+            except discord.HTTPException as e:
+                logging.error(f"Erro ao enviar a mensagem de status do ponto: {e}", exc_info=True)
+                return now
+            try:
+                await writer.execute("UPDATE sessions SET status_message_id = ? WHERE session_id = ?", (status_message.id, session_id))
+            except Exception as e:
+                logging.error(f"Erro ao gravar a mensagem de status da sessão {session_id}; a mensagem será apagada: {e}", exc_info=True)
+                try:
+                    await status_message.delete()
+                except discord.HTTPException:
+                    pass
+        return now
 
     async def clock_out_callback(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
@@ -226,21 +553,130 @@ class ClockView(View):
         message = message_template.format(duration=duration_str) if success else duration_str
         await interaction.followup.send(message, ephemeral=True)
 
+# --- 3.1 View de Histórico Paginado ---
+class HistoricoView(View):
+    """Histórico paginado por chave (clock_in_time, session_id).
+
+    Cada clique busca apenas a página pedida no índice (staff_id, clock_in_time, session_id),
+    guardando somente a chave da última sessão de cada página já visitada para permitir voltar.
+    """
+    def __init__(self, interaction: discord.Interaction, member: discord.Member, page_size: int, since: str | None, until: str | None):
+        super().__init__(timeout=180)
+        self.interaction = interaction
+        self.member = member
+        self.page_size = page_size
+        self.since = since
+        self.until = until
+        self.page_keys: list[tuple[str, int] | None] = [None]
+        self.has_next = False
+        self.sessions = []
+
+    async def fetch_page(self):
+        query = "SELECT session_id, clock_in_time, clock_out_time, voice_seconds FROM sessions WHERE staff_id = ?"
+        params = [self.member.id]
+        if self.since:
+            query += " AND clock_in_time >= ?"
+            params.append(self.since)
+        if self.until:
+            query += " AND clock_in_time < ?"
+            params.append(self.until)
+        if after_key := self.page_keys[-1]:
+            query += " AND (clock_in_time, session_id) < (?, ?)"
+            params.extend(after_key)
+        query += " ORDER BY clock_in_time DESC, session_id DESC LIMIT ?"
+        params.append(self.page_size + 1)
+
+        async with connect_sessions(self.since, self.until) as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute(query, params) as cursor:
+                rows = await cursor.fetchall()
+        self.has_next = len(rows) > self.page_size
+        self.sessions = rows[:self.page_size]
+
+    def create_embed(self) -> discord.Embed:
+        embed = discord.Embed(title=MESSAGES.get('HISTORY_EMBED_TITLE').format(member_name=self.member.display_name), color=discord.Color.green())
+        for session in self.sessions:
+            start_time = datetime.datetime.fromisoformat(session['clock_in_time'])
+            if session['clock_out_time']:
+                end_time = datetime.datetime.fromisoformat(session['clock_out_time'])
+                h, rem = divmod(int((end_time - start_time).total_seconds()), 3600); m, s = divmod(rem, 60)
+                dur_str = f"{h}h, {m}m e {s}s"
+                val = MESSAGES.get('HISTORY_SESSION_OUTPUT').format(end_time=end_time.strftime('%d/%m/%Y %H:%M:%S'), duration=dur_str)
+                if session['voice_seconds'] is not None:
+                    vh, vrem = divmod(session['voice_seconds'], 3600); vm, _ = divmod(vrem, 60)
+                    val += MESSAGES.get('HISTORY_SESSION_VOICE', "\n**Em canal de voz:** {duration}").format(duration=f"{vh}h e {vm}m")
+            else:
+                val = MESSAGES.get('HISTORY_SESSION_ON_DUTY')
+            embed.add_field(name=MESSAGES.get('HISTORY_SESSION_INPUT_TITLE').format(start_time=start_time.strftime('%d/%m/%Y %H:%M:%S')), value=val, inline=False)
+        embed.set_footer(text=f"Página {len(self.page_keys)}")
+        self._update_buttons()
+        return embed
+
+    def _update_buttons(self):
+        self.children[0].disabled = len(self.page_keys) == 1
+        self.children[1].disabled = len(self.page_keys) == 1
+        self.children[2].disabled = not self.has_next
+
+    async def update_message(self, interaction: discord.Interaction):
+        await self.fetch_page()
+        await interaction.response.edit_message(embed=self.create_embed(), view=self)
+
+    @discord.ui.button(label="⏪ Início", style=ButtonStyle.secondary)
+    async def go_to_first_page(self, interaction: discord.Interaction, button: Button):
+        self.page_keys = [None]
+        await self.update_message(interaction)
+
+    @discord.ui.button(label="◀️ Anterior", style=ButtonStyle.primary)
+    async def go_to_previous_page(self, interaction: discord.Interaction, button: Button):
+        if len(self.page_keys) > 1:
+            self.page_keys.pop()
+        await self.update_message(interaction)
+
+    @discord.ui.button(label="Próxima ▶️", style=ButtonStyle.primary)
+    async def go_to_next_page(self, interaction: discord.Interaction, button: Button):
+        last = self.sessions[-1]
+        self.page_keys.append((last['clock_in_time'], last['session_id']))
+        await self.update_message(interaction)
+
+    async def on_timeout(self):
+        try:
+            message = await self.interaction.original_response()
+            await message.edit(view=None)
+        except discord.NotFound:
+            pass
+
 # --- 4. Classe do Cog ---
 class PontoCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.logger = logging.getLogger('discord_bot')
+        self.board = OnDutyBoard(bot) if STATUS_BOARD_MODE and PONTO_STATUS_CHANNEL_ID else None
+        self.ranking_cache: dict[tuple[str, str | None], list[tuple[int, int]]] = {}
+        self.voice_tracker = VoicePresenceTracker(bot) if VOICE_TRACKING_ENABLED else None
         self.bot.add_view(ClockView(self.bot))
         self.logger.info("View 'ClockView' persistente registrada.")
 
     async def cog_load(self):
         await setup_database()
         self.logger.info("Banco de dados do Ponto verificado/configurado.")
+        if self.board:
+            await self.board.load()
+            self.board.start()
+            self.logger.info(f"Quadro de serviço consolidado ativo com {len(self.board.on_duty)} membros em serviço.")
+        if self.voice_tracker:
+            self.voice_tracker.start()
+
+    async def cog_unload(self):
+        if self.board:
+            self.board.stop()
+        if self.voice_tracker:
+            await self.voice_tracker.stop()
 
     @commands.Cog.listener()
     async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
         if member.bot: return
+        if self.voice_tracker:
+            self.voice_tracker.update(member, before, after)
         was_in_ponto = before.channel and before.channel.id in PONTO_VOICE_CHANNEL_IDS
         is_no_longer_in_ponto = not after.channel or after.channel.id not in PONTO_VOICE_CHANNEL_IDS
         if was_in_ponto and is_no_longer_in_ponto:
@@ -255,6 +691,69 @@ class PontoCog(commands.Cog):
                 except Exception as e:
                     self.logger.error(f"Erro ao processar clock-out automático para {member.name}: {e}", exc_info=True)
 
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if before.display_name != after.display_name:
+            self.update_member_name(after)
+
+    @commands.Cog.listener()
+    async def on_user_update(self, before: discord.User, after: discord.User):
+        if before.display_name != after.display_name and (guild := self.bot.get_guild(GUILD_ID)) and (member := guild.get_member(after.id)):
+            self.update_member_name(member)
+
+    def update_member_name(self, member: discord.Member):
+        """Atualiza o nome no diretório, apenas para quem já está nele (membros que já bateram ponto)."""
+        if self.board and member.id in self.board.on_duty:
+            self.board.on_duty[member.id]['name'] = member.display_name
+            self.board._dirty.set()
+        get_writer('clock.sqlite').submit(
+            "UPDATE members SET display_name = ?, updated_at = ? WHERE user_id = ? AND display_name != ?",
+            (member.display_name, datetime.datetime.now().isoformat(), member.id, member.display_name)
+        ).add_done_callback(log_write_failure)
+
+    @commands.Cog.listener()
+    async def on_ponto_clock_out(self, member: discord.Member, session_id: int):
+        self.ranking_cache.clear()
+
+    @commands.Cog.listener()
+    async def on_ponto_sessions_changed(self, staff_ids: list[int]):
+        self.ranking_cache.clear()
+
+    def _ranking_period_start(self, periodo: str) -> str | None:
+        today = datetime.date.today()
+        if periodo == "hoje":
+            return today.isoformat()
+        if periodo == "semana":
+            return (today - datetime.timedelta(days=today.weekday())).isoformat()
+        if periodo == "mes":
+            return today.replace(day=1).isoformat()
+        return None
+
+    async def get_ranking(self, periodo: str) -> list[tuple[int, int]]:
+        """Retorna (staff_id, segundos) ordenado por horas no período, usando a consolidação diária.
+
+        O resultado fica em cache por período (e dia de início, para virar sozinho à meia-noite)
+        até o próximo clock-out, então consultas repetidas não tocam o banco.
+        """
+        since = self._ranking_period_start(periodo)
+        cache_key = (periodo, since)
+        if cache_key in self.ranking_cache:
+            return self.ranking_cache[cache_key]
+
+        query = "SELECT staff_id, SUM(seconds) AS total FROM daily_rollup"
+        params = ()
+        if since:
+            query += " WHERE day >= ?"
+            params = (since,)
+        query += " GROUP BY staff_id ORDER BY total DESC"
+        async with aiosqlite.connect('clock.sqlite') as db:
+            async with db.execute(query, params) as cursor:
+                ranking = [(row[0], row[1]) for row in await cursor.fetchall()]
+
+        self.ranking_cache = {key: value for key, value in self.ranking_cache.items() if key[0] != periodo}
+        self.ranking_cache[cache_key] = ranking
+        return ranking
+
     async def check_staff_permission(self, interaction: discord.Interaction) -> bool:
         staff_role = interaction.guild.get_role(STAFF_ROLE_ID)
         if not staff_role or staff_role not in interaction.user.roles:
@@ -280,22 +779,20 @@ class PontoCog(commands.Cog):
     async def staffcheck(self, interaction: discord.Interaction, member: discord.Member):
         if not await self.check_staff_permission(interaction): return
 
+        # O total vem da consolidação diária, que continua completa mesmo após o arquivamento de sessões antigas.
         async with aiosqlite.connect('clock.sqlite') as db:
             db.row_factory = aiosqlite.Row
-            async with db.execute("SELECT clock_in_time, clock_out_time FROM sessions WHERE staff_id = ?", (member.id,)) as cursor:
-                all_sessions = await cursor.fetchall()
-        
-        if not all_sessions:
+            async with db.execute("SELECT SUM(seconds) AS total, SUM(sessions) AS count FROM daily_rollup WHERE staff_id = ?", (member.id,)) as cursor:
+                totals = await cursor.fetchone()
+            async with db.execute("SELECT clock_in_time FROM sessions WHERE staff_id = ? AND clock_out_time IS NULL", (member.id,)) as cursor:
+                open_session = await cursor.fetchone()
+
+        if not totals['count'] and not open_session:
             await interaction.response.send_message(MESSAGES.get('INFO_NO_SESSIONS_FOUND', "Nenhuma sessão encontrada.").format(member_mention=member.mention), ephemeral=True)
             return
 
-        total_secs = 0
-        current_session_start = None
-        for s in all_sessions:
-            if s['clock_out_time']:
-                total_secs += (datetime.datetime.fromisoformat(s['clock_out_time']) - datetime.datetime.fromisoformat(s['clock_in_time'])).total_seconds()
-            else:
-                current_session_start = datetime.datetime.fromisoformat(s['clock_in_time'])
+        total_secs = totals['total'] or 0
+        current_session_start = datetime.datetime.fromisoformat(open_session['clock_in_time']) if open_session else None
 
         h, rem = divmod(int(total_secs), 3600); m, s = divmod(rem, 60)
         dur_str = f"{h}h, {m}m e {s}s"
@@ -310,32 +807,64 @@ class PontoCog(commands.Cog):
         
         await interaction.response.send_message(resp_txt, ephemeral=True)
 
-    @app_commands.command(name="historico", description="Mostra as últimas sessões de trabalho de um membro.")
+    @app_commands.command(name="historico", description="Mostra as sessões de trabalho de um membro, com paginação.")
     @app_commands.guilds(discord.Object(id=GUILD_ID))
-    async def historico(self, interaction: discord.Interaction, member: discord.Member):
+    @app_commands.describe(
+        member="O membro a ser consultado.",
+        inicio="Data inicial (DD/MM/AAAA).",
+        fim="Data final, inclusiva (DD/MM/AAAA).",
+        por_pagina="Sessões por página (máximo 25)."
+    )
+    async def historico(self, interaction: discord.Interaction, member: discord.Member, inicio: str = None, fim: str = None, por_pagina: app_commands.Range[int, 1, 25] = 10):
         if not await self.check_staff_permission(interaction): return
 
-        async with aiosqlite.connect('clock.sqlite') as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute("SELECT * FROM sessions WHERE staff_id = ? ORDER BY clock_in_time DESC LIMIT 10", (member.id,)) as cursor:
-                sessions = await cursor.fetchall()
+        try:
+            since = datetime.datetime.strptime(inicio, "%d/%m/%Y").isoformat() if inicio else None
+            until = (datetime.datetime.strptime(fim, "%d/%m/%Y") + datetime.timedelta(days=1)).isoformat() if fim else None
+        except ValueError:
+            await interaction.response.send_message("❌ Formato de data inválido. Use `DD/MM/AAAA`.", ephemeral=True)
+            return
 
-        if not sessions:
+        view = HistoricoView(interaction, member, por_pagina, since, until)
+        await view.fetch_page()
+        if not view.sessions:
             await interaction.response.send_message(MESSAGES.get('INFO_NO_SESSIONS_FOUND').format(member_mention=member.mention), ephemeral=True)
             return
-            
-        embed = discord.Embed(title=MESSAGES.get('HISTORY_EMBED_TITLE').format(member_name=member.display_name), color=discord.Color.green())
-        for session in sessions:
-            start_time = datetime.datetime.fromisoformat(session['clock_in_time'])
-            if session['clock_out_time']:
-                end_time = datetime.datetime.fromisoformat(session['clock_out_time'])
-                h, rem = divmod(int((end_time - start_time).total_seconds()), 3600); m, s = divmod(rem, 60)
-                dur_str = f"{h}h, {m}m e {s}s"
-                val = MESSAGES.get('HISTORY_SESSION_OUTPUT').format(end_time=end_time.strftime('%d/%m/%Y %H:%M:%S'), duration=dur_str)
-            else:
-                val = MESSAGES.get('HISTORY_SESSION_ON_DUTY')
-            embed.add_field(name=MESSAGES.get('HISTORY_SESSION_INPUT_TITLE').format(start_time=start_time.strftime('%d/%m/%Y %H:%M:%S')), value=val, inline=False)
-            
+
+        await interaction.response.send_message(embed=view.create_embed(), view=view, ephemeral=True)
+
+    @app_commands.command(name="ranking_horas", description="Mostra o ranking de horas de serviço por período.")
+    @app_commands.guilds(discord.Object(id=GUILD_ID))
+    @app_commands.describe(periodo="O período do ranking.", cargo="Filtra apenas membros com este cargo (ex: uma carreira).")
+    @app_commands.choices(periodo=[
+        app_commands.Choice(name="Hoje", value="hoje"),
+        app_commands.Choice(name="Esta semana", value="semana"),
+        app_commands.Choice(name="Este mês", value="mes"),
+        app_commands.Choice(name="Todo o histórico", value="total"),
+    ])
+    async def ranking_horas(self, interaction: discord.Interaction, periodo: str, cargo: discord.Role = None):
+        if not await self.check_staff_permission(interaction): return
+
+        ranking = await self.get_ranking(periodo)
+        if cargo:
+            role_member_ids = {m.id for m in cargo.members}
+            ranking = [entry for entry in ranking if entry[0] in role_member_ids]
+
+        period_names = {"hoje": "Hoje", "semana": "Esta semana", "mes": "Este mês", "total": "Todo o histórico"}
+        embed = discord.Embed(title=f"🏆 Ranking de Horas - {period_names.get(periodo, periodo)}", color=discord.Color.gold())
+        if cargo:
+            embed.description = f"Filtrado pelo cargo {cargo.mention}.\n\n"
+        else:
+            embed.description = ""
+
+        lines = []
+        names = await get_display_names([staff_id for staff_id, _ in ranking[:RANKING_SIZE]])
+        for position, (staff_id, total_seconds) in enumerate(ranking[:RANKING_SIZE], 1):
+            member_name = names.get(staff_id, f"ID: {staff_id}")
+            h, rem = divmod(int(total_seconds), 3600); m, _ = divmod(rem, 60)
+            lines.append(f"**{position}º** {member_name} — `{h}h {m:02d}m`")
+        embed.description += "\n".join(lines) or "Nenhuma sessão encerrada no período."
+        embed.set_footer(text=f"{len(ranking)} membros com horas registradas | Considera apenas sessões encerradas")
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
 # --- 5. Função Setup ---
@@ -5,7 +5,15 @@ from discord import app_commands, ui, ButtonStyle
 import json
 import logging
 import aiosqlite
+import asyncio
+import csv
+import io
+from collections import Counter, defaultdict, deque
+from itertools import groupby
 from datetime import datetime, timedelta
+from cogs.__db_writer import get_writer, log_write_failure
+from cogs.__ponto_db import connect_sessions
+from cogs.__promocao_engine import MAXIMO, NOVO, PROMOVER, PROMOVER_CLASSE, SINCRONIZAR, MemberDecision, PromotionRules, decide
 
 logger = logging.getLogger('discord_bot')
 
@@ -19,15 +27,79 @@ try:
     CARREIRA_ROLES = config.get('CARREIRA_ROLES', {})
     PADRAO_ROLES = {int(k): v for k, v in config.get('PADRAO_ROLES', {}).items()}
     CLASSE_ROLES = config.get('CLASSE_ROLES', {})
-    TIME_REQUIREMENTS_SECONDS = {int(k): v * 3600 for k, v in config.get('TIME_REQUIREMENTS_HOURS', {}).items()}
     TIME_REQUIREMENTS_HOURS = config.get('TIME_REQUIREMENTS_HOURS', {})
+    FULL_SWEEP_MINUTES = config.get('FULL_SWEEP_MINUTES', 360)
+    ROLE_AUDIT_HOURS = config.get('ROLE_AUDIT_HOURS', 24)
+    ANNOUNCEMENT_DIGEST_THRESHOLD = config.get('ANNOUNCEMENT_DIGEST_THRESHOLD', 5)
+    ANNOUNCEMENT_MAX_MESSAGES = config.get('ANNOUNCEMENT_MAX_MESSAGES', 5)
+    ANNOUNCE_PROMOTIONS_INDIVIDUALLY = config.get('ANNOUNCE_PROMOTIONS_INDIVIDUALLY', False)
+    ANNOUNCEMENT_MAX_INDIVIDUAL = config.get('ANNOUNCEMENT_MAX_INDIVIDUAL', 10)
+    # Limiares por carreira e índice de cargos compilados (e validados) uma vez; config inválido impede o carregamento.
+    RULES = PromotionRules.from_config(config)
     logger.info("Configurações do 'PromocaoCog' carregadas.")
 except Exception as e:
     logger.critical(f"ERRO CRÍTICO ao carregar 'config_promocao_cog.json': {e}")
-    GUILD_ID, LOG_CHANNEL_ID, ADMIN_ROLE_ID, SUPER_ADMIN_ID, CARREIRA_ROLES, PADRAO_ROLES, CLASSE_ROLES, TIME_REQUIREMENTS_SECONDS, TIME_REQUIREMENTS_HOURS = [None]*9
+    GUILD_ID, LOG_CHANNEL_ID, ADMIN_ROLE_ID, SUPER_ADMIN_ID, CARREIRA_ROLES, PADRAO_ROLES, CLASSE_ROLES, TIME_REQUIREMENTS_HOURS, RULES = [None]*9
+    FULL_SWEEP_MINUTES, ROLE_AUDIT_HOURS = 360, 24
+    ANNOUNCEMENT_DIGEST_THRESHOLD, ANNOUNCEMENT_MAX_MESSAGES, ANNOUNCE_PROMOTIONS_INDIVIDUALLY, ANNOUNCEMENT_MAX_INDIVIDUAL = 5, 5, False, 10
 
 DB_PROMOTION = "promotions.sqlite"
 DB_PONTO = "clock.sqlite"
+# Cargos cuja alteração pode mudar a avaliação de um membro (carreira, padrão e classe).
+TRACKED_ROLE_IDS = RULES.tracked_role_ids if RULES else frozenset()
+
+INSERT_HISTORY_SQL = "INSERT INTO promotion_history (user_id, kind, from_rank, to_rank, created_at) VALUES (?, ?, ?, ?, ?)"
+# Ordem de aplicação das escritas de uma verificação: o registro novo antes das atualizações dele e o
+# tempo de carreira antes da promoção de classe (que o zera).
+WRITE_INSERT, WRITE_TIME, WRITE_RANK, WRITE_CLASSE, WRITE_HISTORY = range(5)
+
+async def apply_promotion_writes(db: aiosqlite.Connection, writes: list[tuple[int, str, tuple]]):
+    """Aplica as escritas acumuladas na ordem das fases, agrupando instruções iguais em executemany."""
+    for (_, sql), group in groupby(sorted(writes, key=lambda write: write[:2]), key=lambda write: write[:2]):
+        await db.executemany(sql, [params for _, _, params in group])
+
+# Anúncios agrupados por tipo, na ordem em que aparecem no resumo.
+ANNOUNCEMENT_TITLES = {
+    PROMOVER: ("📈 Promoções Automáticas", discord.Color.green()),
+    PROMOVER_CLASSE: ("⬆️ Promoções de Classe", discord.Color.gold()),
+    MAXIMO: ("🏆 Padrão 6 na Classe Máxima", discord.Color.purple()),
+    SINCRONIZAR: ("🔄 Sincronizações de Cargos", discord.Color.blue()),
+}
+EMBED_DESCRIPTION_LIMIT = 2000
+MESSAGE_EMBED_CHARS_LIMIT = 5500  # O Discord aceita até 6000 caracteres somando os embeds de uma mensagem.
+
+def build_announcement_pages(announcements: dict[str, list[tuple[str, str]]]) -> list[list[discord.Embed]]:
+    """Quebra as linhas de resumo de cada tipo em embeds e agrupa os embeds em mensagens (até 10 e 5500 caracteres cada)."""
+    embeds = []
+    for kind, (title, color) in ANNOUNCEMENT_TITLES.items():
+        lines = [line for _, line in announcements.get(kind, [])]
+        chunks, current = [], ""
+        for line in lines:
+            if current and len(current) + len(line) + 1 > EMBED_DESCRIPTION_LIMIT:
+                chunks.append(current)
+                current = ""
+            current += line + "\n"
+        if current:
+            chunks.append(current)
+        for index, chunk in enumerate(chunks, start=1):
+            page = f" ({index}/{len(chunks)})" if len(chunks) > 1 else ""
+            embeds.append(discord.Embed(title=f"{title} - {len(lines)}{page}", description=chunk, color=color, timestamp=datetime.now()))
+
+    pages, current, size = [], [], 0
+    for embed in embeds:
+        embed_size = len(embed.title) + len(embed.description)
+        if current and (len(current) == 10 or size + embed_size > MESSAGE_EMBED_CHARS_LIMIT):
+            pages.append(current)
+            current, size = [], 0
+        current.append(embed)
+        size += embed_size
+    if current:
+        pages.append(current)
+    return pages
+
+def record_promotion(user_id: int, kind: str, from_rank: str, to_rank: str):
+    """Registra no histórico uma promoção ('padrao', 'classe' ou 'manual'), sem esperar a gravação."""
+    get_writer(DB_PROMOTION).submit(INSERT_HISTORY_SQL, (user_id, kind, from_rank, to_rank, datetime.now().isoformat())).add_done_callback(log_write_failure)
 
 def is_super_admin():
     async def predicate(interaction: discord.Interaction) -> bool:
@@ -40,7 +112,21 @@ def is_super_admin():
 class PromocaoCog(commands.Cog, name="PromocaoCog"):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        # Fila de avaliação incremental: alimentada por saídas de ponto, mudanças de cargo e ajustes manuais.
+        self.evaluation_queue: asyncio.Queue[int] = asyncio.Queue()
+        self.queued_members: set[int] = set()
+        self.evaluation_lock = asyncio.Lock()
+        self.evaluated_count = 0
+        self.evaluation_worker: asyncio.Task | None = None
+        # Membros cujos cargos mudaram por fora do bot e precisam de sincronização; os demais só são
+        # conferidos na auditoria completa (ROLE_AUDIT_HOURS).
+        self.dirty_members: set[int] = set()
+        # Estados de cargos que o próprio bot acabou de aplicar, para o on_member_update ignorar o eco.
+        self.own_role_states: defaultdict[int, deque] = defaultdict(lambda: deque(maxlen=4))
+        self.promotion_check_task.change_interval(minutes=FULL_SWEEP_MINUTES)
         self.promotion_check_task.start()
+        self.role_audit_task.change_interval(hours=ROLE_AUDIT_HOURS)
+        self.role_audit_task.start()
         logger.info("Cog 'PromocaoCog' carregado e tarefa de verificação iniciada.")
 
     async def cog_load(self):
@@ -68,11 +154,49 @@ class PromocaoCog(commands.Cog, name="PromocaoCog"):
                 col_name = f"ponto_seconds_{carreira_name.lower().replace('ã', 'a')}"
                 if col_name not in columns:
                     await db.execute(f'ALTER TABLE user_promotions ADD COLUMN {col_name} INTEGER DEFAULT 0')
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS promotion_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    kind TEXT NOT NULL,
+                    from_rank TEXT,
+                    to_rank TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+            ''')
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_promotion_history_created_at ON promotion_history (created_at)")
             await db.commit()
             logger.info("Banco de dados de promoções verificado/criado.")
+        self.evaluation_worker = asyncio.create_task(self.run_evaluation_worker())
 
     def cog_unload(self):
         self.promotion_check_task.cancel()
+        self.role_audit_task.cancel()
+        if self.evaluation_worker:
+            self.evaluation_worker.cancel()
+
+    async def edit_member_roles(self, member: discord.Member, roles_to_remove: list, roles_to_add: list, reason: str):
+        """Remove e adiciona cargos registrando cada estado esperado, para que o eco no on_member_update não marque o membro como alterado."""
+        roles_to_remove, roles_to_add = [r for r in roles_to_remove if r], [r for r in roles_to_add if r]
+        state = {r.id for r in member.roles if r.id in TRACKED_ROLE_IDS}
+        if roles_to_remove:
+            state -= {r.id for r in roles_to_remove}
+            await self.edit_roles_expecting(member.remove_roles, member.id, roles_to_remove, frozenset(state), reason)
+        if roles_to_add:
+            state |= {r.id for r in roles_to_add if r.id in TRACKED_ROLE_IDS}
+            await self.edit_roles_expecting(member.add_roles, member.id, roles_to_add, frozenset(state), reason)
+
+    async def edit_roles_expecting(self, edit, member_id: int, roles: list, expected: frozenset, reason: str):
+        """Registra o estado esperado e faz a chamada; se ela falhar não haverá eco, então o registro é desfeito
+        para não engolir uma mudança externa que leve ao mesmo estado."""
+        own_states = self.own_role_states[member_id]
+        own_states.append(expected)
+        try:
+            await edit(*roles, reason=reason)
+        except BaseException:
+            if expected in own_states:
+                own_states.remove(expected)
+            raise
 
     def format_seconds(self, seconds: int) -> str:
         h, rem = divmod(int(seconds), 3600)
@@ -82,7 +206,7 @@ class PromocaoCog(commands.Cog, name="PromocaoCog"):
     async def get_total_ponto_seconds(self, user_id: int, since_datetime: datetime = None) -> int:
         total_seconds = 0
         try:
-            async with aiosqlite.connect(DB_PONTO) as db:
+            async with connect_sessions(since_datetime.isoformat() if since_datetime else None) as db:
                 db.row_factory = aiosqlite.Row
                 
                 base_query_closed = "SELECT clock_in_time, clock_out_time FROM sessions WHERE staff_id = ? AND clock_out_time IS NOT NULL"
@@ -112,153 +236,299 @@ class PromocaoCog(commands.Cog, name="PromocaoCog"):
             logger.error(f"Erro ao calcular tempo de ponto para {user_id}: {e}")
         return int(total_seconds)
 
-    async def _handle_class_promotion(self, member: discord.Member, promo_record: aiosqlite.Row):
+    async def load_promotion_records(self, member_ids: list[int]) -> dict[int, dict]:
+        """Registros de user_promotions dos membros indicados, em uma única consulta."""
+        async with aiosqlite.connect(DB_PROMOTION) as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute("SELECT * FROM user_promotions WHERE user_id IN (SELECT value FROM json_each(?))", (json.dumps(member_ids),)) as cursor:
+                return {row['user_id']: dict(row) for row in await cursor.fetchall()}
+
+    async def fetch_carreira_seconds(self, anchors: dict[int, str | None]) -> dict[int, int]:
+        """Segundos de ponto de cada membro desde o seu marco (última promoção de classe), em uma única consulta.
+
+        Os marcos vão como JSON e viram uma tabela no próprio SQLite. Os dias inteiros depois do dia do
+        marco vêm da consolidação diária; o dia do marco é calculado das sessões, recortadas no marco e
+        na meia-noite seguinte, e as sessões abertas contam do marco (ou do início) até agora. Assim só
+        os arquivos anuais em torno dos marcos são anexados, e membros sem marco não anexam nenhum.
+        """
+        if not anchors:
+            return {}
+        now_iso = datetime.now().isoformat()
+        anchored = [since for since in anchors.values() if since]
+        if anchored:
+            # Um dia antes do marco mais antigo, para as sessões que o atravessam (como no relatório).
+            since = (datetime.fromisoformat(min(anchored)) - timedelta(days=1)).date().isoformat()
+            until = (datetime.fromisoformat(max(anchored)) + timedelta(days=1)).date().isoformat()
+        else:
+            since = until = now_iso  # Nenhum arquivo: só a consolidação e as sessões abertas do banco principal.
+        query = """
+            WITH anchors AS (
+                SELECT json_extract(value, '$[0]') AS staff_id, json_extract(value, '$[1]') AS since FROM json_each(?)
+            ), bounds AS (
+                SELECT staff_id, since, substr(since, 1, 10) AS day,
+                       date(substr(since, 1, 10), '-1 day') AS lookback, date(substr(since, 1, 10), '+1 day') || 'T00:00:00' AS next_midnight
+                FROM anchors
+            )
+            SELECT b.staff_id,
+                (SELECT COALESCE(SUM(r.seconds), 0) FROM daily_rollup r WHERE r.staff_id = b.staff_id AND r.day > COALESCE(b.day, ''))
+              + (SELECT COALESCE(SUM((julianday(MIN(s.clock_out_time, b.next_midnight)) - julianday(MAX(s.clock_in_time, b.since))) * 86400), 0)
+                 FROM sessions s
+                 WHERE b.since IS NOT NULL AND s.staff_id = b.staff_id AND s.clock_in_time >= b.lookback AND s.clock_in_time < b.next_midnight
+                   AND s.clock_out_time > b.since AND s.clock_out_time > s.clock_in_time)
+              + (SELECT COALESCE(SUM((julianday(?) - julianday(MAX(s.clock_in_time, COALESCE(b.since, '')))) * 86400), 0)
+                 FROM main.sessions s
+                 WHERE s.staff_id = b.staff_id AND s.clock_out_time IS NULL AND ? > COALESCE(b.since, ''))
+            FROM bounds b
+        """
+        try:
+            async with connect_sessions(since, until) as db:
+                async with db.execute(query, (json.dumps(list(anchors.items())), now_iso, now_iso)) as cursor:
+                    return {staff_id: int(seconds) for staff_id, seconds in await cursor.fetchall()}
+        except Exception as e:
+            logger.error(f"Erro ao calcular o tempo de ponto de {len(anchors)} membros: {e}", exc_info=True)
+            return {}
+
+    async def apply_decision(self, member: discord.Member, decision: MemberDecision, announcements: defaultdict, stats: Counter, writes: list) -> asyncio.Future | None:
+        """Executa no Discord as ações decididas pelo motor, acumulando os anúncios em 'announcements'.
+
+        Se algum cargo foi alterado, as escritas do membro vão para o escritor logo em seguida (e entram
+        no próximo commit em grupo), para que um reinício no meio de uma varredura longa (edições de
+        cargo sofrem rate limit) não deixe cargos trocados sem o registro e o histórico correspondentes;
+        o future dessa gravação é retornado. As demais escritas, como o tempo de carreira, vão para
+        'writes' e são gravadas juntas ao final.
+        """
         guild = member.guild
-        log_channel = self.bot.get_channel(LOG_CHANNEL_ID)
-        current_class = promo_record['current_classe_rank']
-        current_carreira = promo_record['current_carreira_rank']
-        class_order = ["Terceira", "Segunda", "Primeira", "Especial"]
-        
+        time_col_name = f"ponto_seconds_{decision.carreira.lower().replace('ã', 'a')}"
+        member_writes = []
+        roles_edited = False
+        if decision.store_seconds:
+            member_writes.append((WRITE_TIME, f"UPDATE user_promotions SET {time_col_name} = ? WHERE user_id = ?", (decision.seconds, member.id)))
+
+        for action in decision.actions:
+            roles_to_add = [role for role_id in action.add_role_ids if (role := guild.get_role(role_id))]
+            roles_to_remove = [role for role_id in action.remove_role_ids if (role := guild.get_role(role_id))]
+            try:
+                if action.kind == NOVO:
+                    record = decision.record
+                    member_writes.append((WRITE_INSERT, "INSERT INTO user_promotions (user_id, current_padrao_rank, current_classe_rank, current_carreira_rank) VALUES (?, ?, ?, ?)", (member.id, record['current_padrao_rank'], record['current_classe_rank'], decision.carreira)))
+                    logger.info(f"Membro {member.display_name} descoberto com carreira '{decision.carreira}' e adicionado ao sistema.")
+                    stats['sincronizados'] += 1
+                elif action.kind == SINCRONIZAR:
+                    logger.warning(f"Detectada inconsistência de cargos para {member.display_name}. Sincronizando...")
+                    roles_edited = True
+                    await self.edit_member_roles(member, roles_to_remove, roles_to_add, "Sincronização de cargos")
+                    announcements[SINCRONIZAR].append((f"🔄 **SINCRONIZAÇÃO DE CARGOS:** Os cargos de {member.mention} foram corrigidos para **{action.to_rank}**.", f"{member.mention} → {action.to_rank}"))
+                    stats['corrigidos'] += 1
+                elif action.kind == PROMOVER:
+                    logger.info(f"Promovendo {member.display_name} de {action.from_rank} para {action.to_rank}")
+                    roles_edited = True
+                    await self.edit_member_roles(member, roles_to_remove, roles_to_add, f"Promoção Automática para {action.to_rank}")
+                    member_writes.append((WRITE_RANK, "UPDATE user_promotions SET current_padrao_rank = ? WHERE user_id = ?", (action.padrao, member.id)))
+                    member_writes.append((WRITE_HISTORY, INSERT_HISTORY_SQL, (member.id, 'padrao', action.from_rank, action.to_rank, datetime.now().isoformat())))
+                    stats['promovidos'] += 1
+                    announcements[PROMOVER].append((f"📈 **PROMOÇÃO AUTOMÁTICA:** {member.mention} foi promovido para **{action.to_rank}** por tempo de serviço na carreira.", f"{member.mention}: {action.from_rank} → **{action.to_rank}**"))
+                elif action.kind == PROMOVER_CLASSE:
+                    logger.info(f"Membro {member.display_name} apto para promoção de classe. Iniciando processo.")
+                    roles_edited = True
+                    await self.edit_member_roles(member, roles_to_remove, roles_to_add, "Promoção de Classe Automática")
+                    now_iso = datetime.now().isoformat()
+                    member_writes.append((WRITE_CLASSE, f"UPDATE user_promotions SET current_padrao_rank = ?, current_classe_rank = ?, {time_col_name} = 0, last_class_promotion_date = ? WHERE user_id = ?", (action.padrao, action.classe, now_iso, member.id)))
+                    member_writes.append((WRITE_HISTORY, INSERT_HISTORY_SQL, (member.id, 'classe', action.from_rank, action.to_rank, now_iso)))
+                    announcements[PROMOVER_CLASSE].append((f"⬆️ **PROMOÇÃO DE CLASSE AUTOMÁTICA:** {member.mention} foi promovido para **{action.to_rank}**! Seu ciclo de progressão e contagem de horas foram reiniciados.", f"{member.mention}: {action.from_rank} → **{action.to_rank}**"))
+                elif action.kind == MAXIMO:
+                    announcements[MAXIMO].append((f"🏆 {member.mention} atingiu o posto **Padrão 6** na classe máxima de sua carreira!", f"{member.mention} ({decision.carreira})"))
+            except Exception as e:
+                logger.error(f"Falha ao aplicar '{action.kind}' para {member.display_name}: {e}")
+                break  # As ações seguintes dependem desta; o que já foi aplicado ainda é gravado abaixo.
+
+        if not roles_edited:
+            writes.extend(member_writes)
+            return None
+        if member_writes:
+            return get_writer(DB_PROMOTION).submit_op(lambda db: apply_promotion_writes(db, member_writes))
+        return None
+
+    async def collect_decisions(self, members: list[discord.Member], audit: bool = False, dirty: set[int] | None = None) -> list[tuple[discord.Member, MemberDecision]]:
+        """Tira um retrato (registros, segundos de carreira e cargos em cache) e passa cada membro pelo motor. Só lê.
+
+        Os registros vêm em uma consulta e os segundos de todos em outra. A consistência de cargos só
+        é conferida para membros marcados como alterados ('dirty', por padrão os marcados agora), novos
+        no sistema ou, com audit=True, para todos.
+        """
+        dirty = set(self.dirty_members) if dirty is None else dirty
+        candidates = [(member, {r.id for r in member.roles}) for member in members if not member.bot]
+        candidates = [(member, role_ids) for member, role_ids in candidates if RULES.carreira_of(role_ids)]
+        records = await self.load_promotion_records([member.id for member, _ in candidates])
+        seconds = await self.fetch_carreira_seconds({
+            member.id: records[member.id]['last_class_promotion_date'] if member.id in records else None for member, _ in candidates
+        })
+        decisions = []
+        for member, role_ids in candidates:
+            check_roles = audit or member.id in dirty
+            decision = decide(RULES, member.id, role_ids, records.get(member.id), seconds.get(member.id, 0), check_roles)
+            if decision:
+                decisions.append((member, decision))
+        return decisions
+
+    async def evaluate_members(self, members: list[discord.Member], audit: bool = False) -> Counter:
+        """Pipeline em lote usado pela varredura e pela fila incremental: decide com o motor e aplica no
+        Discord. Quem teve cargos alterados é gravado na hora; o restante vai ao final em uma única
+        transação do escritor."""
+        stats = Counter()
+        writes = []
+        announcements = defaultdict(list)
+        # Só as marcas lidas agora são consumidas: quem for marcado durante a avaliação continua marcado
+        # e é reavaliado com conferência de cargos pela fila.
+        dirty = self.dirty_members.intersection(member.id for member in members)
+        self.dirty_members.difference_update(dirty)
         try:
-            current_index = class_order.index(current_class)
-            if current_index + 1 >= len(class_order): return
-            next_class = class_order[current_index + 1]
-        except ValueError: return
+            decisions = await self.collect_decisions(members, audit, dirty)
+        except BaseException:
+            self.dirty_members.update(dirty)
+            raise
+        pending = []
+        for member, decision in decisions:
+            member_announcements = defaultdict(list)
+            future = await self.apply_decision(member, decision, member_announcements, stats, writes)
+            pending.append((member, future, member_announcements))
 
+        if writes:
+            try:
+                await get_writer(DB_PROMOTION).run(lambda db: apply_promotion_writes(db, writes))
+            except Exception as e:
+                logger.error(f"Falha ao gravar {len(writes)} alterações da verificação de promoções: {e}", exc_info=True)
+        # Promoções só são anunciadas depois de gravadas; as que falharam viram um aviso no canal.
+        unsaved = []
+        for member, future, member_announcements in pending:
+            if future:
+                try:
+                    await future
+                except Exception as e:
+                    logger.error(f"Falha ao gravar as alterações de promoção de {member.display_name} após editar os cargos: {e}", exc_info=True)
+                    unsaved.append(member)
+                    member_announcements.pop(PROMOVER, None)
+                    member_announcements.pop(PROMOVER_CLASSE, None)
+            for kind, items in member_announcements.items():
+                announcements[kind].extend(items)
         try:
-            role_to_remove_class = guild.get_role(CLASSE_ROLES.get(current_class))
-            role_to_add_class = guild.get_role(CLASSE_ROLES.get(next_class))
-            role_to_remove_padrao = guild.get_role(PADRAO_ROLES.get(6))
-            role_to_add_padrao = guild.get_role(PADRAO_ROLES.get(1))
-            roles_to_remove = [r for r in [role_to_remove_class, role_to_remove_padrao] if r]
-            roles_to_add = [r for r in [role_to_add_class, role_to_add_padrao] if r]
-            
-            await member.remove_roles(*roles_to_remove, reason="Promoção de Classe Automática")
-            await member.add_roles(*roles_to_add, reason="Promoção de Classe Automática")
-            
-            async with aiosqlite.connect(DB_PROMOTION) as db:
-                time_col_name = f"ponto_seconds_{current_carreira.lower().replace('ã', 'a')}"
-                now_iso = datetime.now().isoformat()
-                await db.execute(
-                    f"UPDATE user_promotions SET current_padrao_rank = 1, current_classe_rank = ?, {time_col_name} = 0, last_class_promotion_date = ? WHERE user_id = ?",
-                    (next_class, now_iso, member.id)
-                )
-                await db.commit()
-            
-            if log_channel:
-                await log_channel.send(f"⬆️ **PROMOÇÃO DE CLASSE AUTOMÁTICA:** {member.mention} foi promovido para **{next_class} Classe**! Seu ciclo de progressão e contagem de horas foram reiniciados.")
-        except Exception as e:
-            logger.error(f"Erro ao promover classe de {member.display_name}: {e}")
+            await self.send_announcements(announcements)
+            log_channel = self.bot.get_channel(LOG_CHANNEL_ID)
+            if unsaved and log_channel:
+                mentions = ", ".join(member.mention for member in unsaved[:ANNOUNCEMENT_MAX_INDIVIDUAL])
+                extra = f" e mais {len(unsaved) - ANNOUNCEMENT_MAX_INDIVIDUAL}" if len(unsaved) > ANNOUNCEMENT_MAX_INDIVIDUAL else ""
+                await log_channel.send(f"⚠️ **FALHA AO GRAVAR PROMOÇÕES:** os cargos de {mentions}{extra} foram alterados, mas o registro no banco falhou. Verifique o log do bot antes da próxima verificação.")
+        except discord.HTTPException as e:
+            logger.error(f"Falha ao publicar os anúncios de promoção: {e}")
+        return stats
 
-    async def run_promotion_check(self, interaction: discord.Interaction = None):
+    async def send_announcements(self, announcements: dict[str, list[tuple[str, str]]]):
+        """Publica os anúncios de uma verificação com um número limitado de mensagens.
+
+        Poucos anúncios saem como mensagens individuais, como antes. Acima de
+        ANNOUNCEMENT_DIGEST_THRESHOLD eles viram embeds de resumo agrupados por tipo e paginados,
+        no máximo ANNOUNCEMENT_MAX_MESSAGES mensagens; com ANNOUNCE_PROMOTIONS_INDIVIDUALLY, até
+        ANNOUNCEMENT_MAX_INDIVIDUAL promoções ainda recebem a sua menção individual.
+        """
+        log_channel = self.bot.get_channel(LOG_CHANNEL_ID)
+        total = sum(len(items) for items in announcements.values())
+        if not log_channel or not total:
+            return
+        if total <= ANNOUNCEMENT_DIGEST_THRESHOLD:
+            for kind in ANNOUNCEMENT_TITLES:
+                for message, _ in announcements.get(kind, []):
+                    await log_channel.send(message)
+            return
+
+        if ANNOUNCE_PROMOTIONS_INDIVIDUALLY:
+            promotions = [message for kind in (PROMOVER, PROMOVER_CLASSE) for message, _ in announcements.get(kind, [])]
+            for message in promotions[:ANNOUNCEMENT_MAX_INDIVIDUAL]:
+                await log_channel.send(message)
+
+        pages = build_announcement_pages(announcements)
+        omitted = sum(len(embed.description.splitlines()) for page in pages[ANNOUNCEMENT_MAX_MESSAGES:] for embed in page)
+        pages = pages[:ANNOUNCEMENT_MAX_MESSAGES]
+        if omitted:
+            pages[-1][-1].set_footer(text=f"+{omitted} anúncios não exibidos; todos constam no log do bot.")
+        for page in pages:
+            await log_channel.send(embeds=page)
+
+    async def run_promotion_check(self, interaction: discord.Interaction = None, audit: bool = False):
+        """Varredura completa de todos os membros: rede de segurança para o que a fila de eventos não cobriu.
+
+        Com audit=True também confere os cargos de todos, e não só dos membros marcados como alterados.
+        """
         guild = self.bot.get_guild(GUILD_ID)
         if not guild:
             if interaction: await interaction.followup.send("❌ Erro: Guilda não encontrada.", ephemeral=True)
             return
-            
-        log_channel = self.bot.get_channel(LOG_CHANNEL_ID)
-        carreira_role_ids = {v['role_id']: k for k, v in CARREIRA_ROLES.items()}
-        all_padrao_role_ids = set(PADRAO_ROLES.values())
-        all_classe_role_ids = set(CLASSE_ROLES.values())
-        
-        newly_synced_count, corrected_count, promoted_count = 0, 0, 0
 
-        async with aiosqlite.connect(DB_PROMOTION) as db:
-            db.row_factory = aiosqlite.Row
-            for member in guild.members:
-                if member.bot: continue
-                member_role_ids = {r.id for r in member.roles}
-                current_carreira = next((name for role_id, name in carreira_role_ids.items() if role_id in member_role_ids), None)
-                if not current_carreira: continue
-                
-                promo_record = await (await db.execute("SELECT * FROM user_promotions WHERE user_id = ?", (member.id,))).fetchone()
-
-                if not promo_record:
-                    current_padrao, current_classe = 1, "Terceira"
-                    for rank, role_id in sorted(PADRAO_ROLES.items(), reverse=True):
-                        if role_id in member_role_ids: current_padrao = rank; break
-                    for classe_name, role_id in CLASSE_ROLES.items():
-                        if role_id in member_role_ids: current_classe = classe_name; break
-                    await db.execute("INSERT INTO user_promotions (user_id, current_padrao_rank, current_classe_rank, current_carreira_rank) VALUES (?, ?, ?, ?)", (member.id, current_padrao, current_classe, current_carreira))
-                    await db.commit()
-                    logger.info(f"Membro {member.display_name} descoberto com carreira '{current_carreira}' e adicionado ao sistema.")
-                    newly_synced_count += 1
-                    promo_record = await (await db.execute("SELECT * FROM user_promotions WHERE user_id = ?", (member.id,))).fetchone()
-
-                correct_padrao_rank, correct_classe_rank = promo_record['current_padrao_rank'], promo_record['current_classe_rank']
-                correct_padrao_role_id, correct_classe_role_id = PADRAO_ROLES.get(correct_padrao_rank), CLASSE_ROLES.get(correct_classe_rank)
-                member_padrao_roles, member_classe_roles = {r.id for r in member.roles if r.id in all_padrao_role_ids}, {r.id for r in member.roles if r.id in all_classe_role_ids}
-                needs_correction = (
-                    (correct_padrao_role_id not in member_padrao_roles if correct_padrao_role_id else False) or len(member_padrao_roles) > 1 or
-                    (correct_classe_role_id not in member_classe_roles if correct_classe_role_id else False) or len(member_classe_roles) > 1
-                )
-                if needs_correction:
-                    logger.warning(f"Detectada inconsistência de cargos para {member.display_name}. Sincronizando...")
-                    roles_to_add = [r for r_id in {correct_padrao_role_id, correct_classe_role_id} if (r := guild.get_role(r_id))]
-                    roles_to_remove = [guild.get_role(rid) for rid in (member_padrao_roles | member_classe_roles)]
-                    roles_to_remove_filtered = [r for r in roles_to_remove if r and r not in roles_to_add]
-                    try:
-                        if roles_to_remove_filtered: await member.remove_roles(*roles_to_remove_filtered, reason="Sincronização de cargos")
-                        if roles_to_add: await member.add_roles(*roles_to_add, reason="Sincronização de cargos")
-                        if log_channel: await log_channel.send(f"🔄 **SINCRONIZAÇÃO DE CARGOS:** Os cargos de {member.mention} foram corrigidos para **Padrão {correct_padrao_rank}** e **{correct_classe_rank} Classe**.")
-                        corrected_count += 1
-                    except Exception as e: logger.error(f"Falha ao sincronizar cargos de {member.display_name}: {e}")
-                    continue
-                
-                since_date_str = promo_record['last_class_promotion_date']
-                since_date = datetime.fromisoformat(since_date_str) if since_date_str else None
-                total_seconds_in_carreira = await self.get_total_ponto_seconds(member.id, since_date)
-                
-                time_col_name = f"ponto_seconds_{current_carreira.lower().replace('ã', 'a')}"
-                await db.execute(f"UPDATE user_promotions SET {time_col_name} = ? WHERE user_id = ?", (total_seconds_in_carreira, member.id))
-                await db.commit()
-                
-                promo_record = await (await db.execute("SELECT * FROM user_promotions WHERE user_id = ?", (member.id,))).fetchone()
-                actual_rank = promo_record['current_padrao_rank']
-                
-                if actual_rank == 6:
-                    max_classe_for_carreira = CARREIRA_ROLES.get(current_carreira, {}).get('max_classe')
-                    if max_classe_for_carreira and promo_record['current_classe_rank'] != max_classe_for_carreira:
-                        logger.info(f"Membro {member.display_name} (Padrão 6) apto para promoção de classe. Iniciando processo.")
-                        await self._handle_class_promotion(member, promo_record)
-                    continue
-
-                if actual_rank >= 6: continue
-                
-                multiplier = CARREIRA_ROLES.get(current_carreira, {}).get('multiplier', 1.0)
-                
-                correct_rank_by_time = 1
-                for rank, base_seconds in sorted(TIME_REQUIREMENTS_SECONDS.items()):
-                    if total_seconds_in_carreira >= (base_seconds * multiplier): correct_rank_by_time = rank
-                    else: break
-                if correct_rank_by_time > 6: correct_rank_by_time = 6
-                
-                if correct_rank_by_time > actual_rank:
-                    new_rank = correct_rank_by_time
-                    logger.info(f"Promovendo {member.display_name} de Padrão {actual_rank} para Padrão {new_rank}")
-                    try:
-                        role_to_remove = guild.get_role(PADRAO_ROLES.get(actual_rank))
-                        role_to_add = guild.get_role(PADRAO_ROLES.get(new_rank))
-                        if role_to_remove: await member.remove_roles(role_to_remove, reason="Promoção Automática")
-                        if role_to_add: await member.add_roles(role_to_add, reason=f"Promoção Automática para Padrão {new_rank}")
-                        await db.execute("UPDATE user_promotions SET current_padrao_rank = ? WHERE user_id = ?", (new_rank, member.id))
-                        await db.commit()
-                        promoted_count += 1
-                        if log_channel: await log_channel.send(f"📈 **PROMOÇÃO AUTOMÁTICA:** {member.mention} foi promovido para **Padrão {new_rank}** por tempo de serviço na carreira.")
-                        
-                        if new_rank == 6:
-                            max_classe_for_carreira = CARREIRA_ROLES.get(current_carreira, {}).get('max_classe')
-                            promo_record_updated = await (await db.execute("SELECT * FROM user_promotions WHERE user_id = ?", (member.id,))).fetchone()
-                            if promo_record_updated['current_classe_rank'] != max_classe_for_carreira:
-                                logger.info(f"Membro {member.display_name} apto para promoção de classe. Iniciando processo.")
-                                await self._handle_class_promotion(member, promo_record_updated)
-                            else:
-                                if log_channel: await log_channel.send(f"🏆 {member.mention} atingiu o posto **Padrão 6** na classe máxima de sua carreira!")
-                    except Exception as e:
-                        logger.error(f"Falha ao promover {member.display_name} automaticamente: {e}")
-        
+        async with self.evaluation_lock:
+            stats = await self.evaluate_members(guild.members, audit)
+
         if interaction:
-            await interaction.followup.send(f"✅ Verificação forçada concluída!\n- **{newly_synced_count}** membros sincronizados.\n- **{corrected_count}** cargos corrigidos.\n- **{promoted_count}** membros promovidos.", ephemeral=True)
+            await interaction.followup.send(f"✅ Verificação forçada concluída!\n- **{stats['sincronizados']}** membros sincronizados.\n- **{stats['corrigidos']}** cargos corrigidos.\n- **{stats['promovidos']}** membros promovidos.", ephemeral=True)
+
+    # --- Avaliação incremental ---
+    def enqueue_evaluation(self, member_id: int):
+        """Agenda a avaliação de um membro; pedidos repetidos enquanto ele está na fila são ignorados."""
+        if member_id not in self.queued_members:
+            self.queued_members.add(member_id)
+            self.evaluation_queue.put_nowait(member_id)
+
+    async def run_evaluation_worker(self):
+        await self.bot.wait_until_ready()
+        while True:
+            member_ids = [await self.evaluation_queue.get()]
+            # Pega de uma vez tudo o que já está na fila, para avaliar o lote com o mesmo pipeline da varredura.
+            while not self.evaluation_queue.empty():
+                member_ids.append(self.evaluation_queue.get_nowait())
+            self.queued_members.difference_update(member_ids)
+            guild = self.bot.get_guild(GUILD_ID)
+            members = [member for member_id in member_ids if guild and (member := guild.get_member(member_id))]
+            if not members:
+                continue
+            try:
+                async with self.evaluation_lock:
+                    await self.evaluate_members(members)
+                self.evaluated_count += len(members)
+            except Exception as e:
+                logger.error(f"Erro na avaliação incremental de promoção de {len(members)} membros: {e}", exc_info=True)
+
+    @commands.Cog.listener()
+    async def on_ponto_clock_out(self, member: discord.Member, session_id: int):
+        self.enqueue_evaluation(member.id)
+
+    @commands.Cog.listener()
+    async def on_ponto_sessions_changed(self, staff_ids: list[int]):
+        for staff_id in staff_ids:
+            self.enqueue_evaluation(staff_id)
+
+    def mark_dirty(self, member_id: int):
+        self.dirty_members.add(member_id)
+        self.enqueue_evaluation(member_id)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if before.guild.id != GUILD_ID:
+            return
+        after_state = frozenset(r.id for r in after.roles if r.id in TRACKED_ROLE_IDS)
+        if after_state == frozenset(r.id for r in before.roles if r.id in TRACKED_ROLE_IDS):
+            return
+        own_states = self.own_role_states.get(after.id)
+        if own_states and after_state in own_states:
+            own_states.remove(after_state)  # Eco de uma escrita do próprio bot.
+            return
+        self.mark_dirty(after.id)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        if member.guild.id == GUILD_ID and not member.bot:
+            self.mark_dirty(member.id)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        self.dirty_members.discard(member.id)
+        self.own_role_states.pop(member.id, None)
 
     promocao_group = app_commands.Group(name="promocao", description="Gerencia o sistema de promoção.")
 
@@ -267,7 +537,37 @@ class PromocaoCog(commands.Cog, name="PromocaoCog"):
     async def force_check(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True, thinking=True)
         logger.info(f"Verificação de promoção forçada por {interaction.user.display_name}.")
-        await self.run_promotion_check(interaction)
+        await self.run_promotion_check(interaction, audit=True)
+
+    @promocao_group.command(name="simular", description="Mostra o que a verificação de promoções faria, sem alterar cargos nem o banco.")
+    @app_commands.checks.has_role(ADMIN_ROLE_ID)
+    async def simulate_check(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        guild = self.bot.get_guild(GUILD_ID)
+        if not guild:
+            await interaction.followup.send("❌ Erro: Guilda não encontrada.", ephemeral=True)
+            return
+        started = datetime.now()
+        decisions = [(member, decision) for member, decision in await self.collect_decisions(guild.members, audit=True) if decision.actions]
+
+        report = io.StringIO()
+        writer = csv.writer(report)
+        writer.writerow(["user_id", "nome", "carreira", "acao", "de", "para", "horas_na_classe"])
+        kinds = Counter()
+        for member, decision in decisions:
+            for action in decision.actions:
+                kinds[action.kind] += 1
+                writer.writerow([member.id, member.display_name, decision.carreira, action.kind, action.from_rank or "", action.to_rank or "", f"{decision.seconds / 3600:.2f}"])
+
+        elapsed = (datetime.now() - started).total_seconds()
+        summary = (
+            f"🧪 **Simulação de promoções** ({elapsed:.1f}s, nada foi alterado)\n"
+            f"- **{kinds[NOVO]}** membros seriam adicionados ao sistema.\n"
+            f"- **{kinds[SINCRONIZAR]}** cargos seriam corrigidos.\n"
+            f"- **{kinds[PROMOVER]}** promoções de padrão e **{kinds[PROMOVER_CLASSE]}** de classe."
+        )
+        filename = f"simulacao_promocoes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        await interaction.followup.send(summary, file=discord.File(io.BytesIO(report.getvalue().encode('utf-8-sig')), filename=filename), ephemeral=True)
 
     @promocao_group.command(name="remover", description="Remove um membro do sistema de promoção.")
     @app_commands.checks.has_role(ADMIN_ROLE_ID)
@@ -277,9 +577,8 @@ class PromocaoCog(commands.Cog, name="PromocaoCog"):
             if not await (await db.execute("SELECT 1 FROM user_promotions WHERE user_id = ?", (membro.id,))).fetchone():
                 await interaction.followup.send(f"ℹ️ O membro {membro.mention} não está no sistema de promoção.", ephemeral=True)
                 return
-            await db.execute("DELETE FROM user_promotions WHERE user_id = ?", (membro.id,))
-            await db.commit()
-        roles_to_remove_ids = set(PADRAO_ROLES.values()) | set(CLASSE_ROLES.values())
+        await get_writer(DB_PROMOTION).execute("DELETE FROM user_promotions WHERE user_id = ?", (membro.id,))
+        roles_to_remove_ids = RULES.padrao_role_ids | RULES.classe_role_ids
         roles_to_remove = [r for r in membro.roles if r in roles_to_remove_ids]
         try:
             if roles_to_remove: await membro.remove_roles(*roles_to_remove, reason="Removido do sistema de promoção")
@@ -314,8 +613,7 @@ class PromocaoCog(commands.Cog, name="PromocaoCog"):
         
         next_rank = current_rank + 1
         multiplier = CARREIRA_ROLES.get(current_carreira, {}).get('multiplier', 1.0)
-        base_required_seconds = TIME_REQUIREMENTS_SECONDS.get(next_rank, 0)
-        required_seconds = int(base_required_seconds * multiplier)
+        required_seconds = RULES.required_seconds(current_carreira, next_rank)
         embed = discord.Embed(title=f"📊 Status de Promoção - {membro.display_name}", color=discord.Color.blue())
         embed.set_thumbnail(url=membro.display_avatar.url)
         embed.add_field(name="Carreira", value=current_carreira, inline=False)
@@ -334,27 +632,24 @@ class PromocaoCog(commands.Cog, name="PromocaoCog"):
     @app_commands.choices(novo_padrao=[app_commands.Choice(name=f"Padrão {i}", value=i) for i in range(1, 7)], nova_classe=[app_commands.Choice(name=name, value=name) for name in CLASSE_ROLES.keys()])
     async def manual_promotion(self, interaction: discord.Interaction, membro: discord.Member, novo_padrao: int, nova_classe: str):
         await interaction.response.defer(ephemeral=True)
-        carreira_role_ids = {v['role_id']: k for k, v in CARREIRA_ROLES.items()}
-        member_role_ids = {r.id for r in membro.roles}
-        current_carreira = next((name for role_id, name in carreira_role_ids.items() if role_id in member_role_ids), None)
+        current_carreira = RULES.carreira_of({r.id for r in membro.roles})
         if not current_carreira:
             await interaction.followup.send("❌ O membro precisa ter um cargo de Carreira para ser ajustado no sistema.", ephemeral=True)
             return
-        async with aiosqlite.connect(DB_PROMOTION) as db:
-            now_iso = datetime.now().isoformat()
-            await db.execute("INSERT INTO user_promotions (user_id, current_padrao_rank, current_classe_rank, current_carreira_rank, last_class_promotion_date) VALUES (?, ?, ?, ?, ?) ON CONFLICT(user_id) DO UPDATE SET current_padrao_rank = excluded.current_padrao_rank, current_classe_rank = excluded.current_classe_rank, current_carreira_rank = excluded.current_carreira_rank, last_class_promotion_date = excluded.last_class_promotion_date", (membro.id, novo_padrao, nova_classe, current_carreira, now_iso))
-            await db.commit()
+        now_iso = datetime.now().isoformat()
+        await get_writer(DB_PROMOTION).execute("INSERT INTO user_promotions (user_id, current_padrao_rank, current_classe_rank, current_carreira_rank, last_class_promotion_date) VALUES (?, ?, ?, ?, ?) ON CONFLICT(user_id) DO UPDATE SET current_padrao_rank = excluded.current_padrao_rank, current_classe_rank = excluded.current_classe_rank, current_carreira_rank = excluded.current_carreira_rank, last_class_promotion_date = excluded.last_class_promotion_date", (membro.id, novo_padrao, nova_classe, current_carreira, now_iso))
         roles_to_add_ids = {PADRAO_ROLES.get(novo_padrao), CLASSE_ROLES.get(nova_classe)}
-        roles_to_remove_ids = set(PADRAO_ROLES.values()) | set(CLASSE_ROLES.values())
+        roles_to_remove_ids = RULES.padrao_role_ids | RULES.classe_role_ids
         roles_to_add = [interaction.guild.get_role(rid) for rid in roles_to_add_ids if rid]
         roles_to_remove = [r for r in membro.roles if r.id in roles_to_remove_ids]
         try:
-            if roles_to_remove: await membro.remove_roles(*roles_to_remove, reason=f"Ajuste manual por {interaction.user.name}")
-            if roles_to_add: await membro.add_roles(*roles_to_add, reason=f"Ajuste manual por {interaction.user.name}")
+            await self.edit_member_roles(membro, roles_to_remove, roles_to_add, f"Ajuste manual por {interaction.user.name}")
         except Exception as e:
             logger.error(f"Erro ao ajustar cargos manualmente para {membro.display_name}: {e}")
             await interaction.followup.send("❌ Ocorreu um erro ao tentar alterar os cargos do membro.", ephemeral=True)
             return
+        record_promotion(membro.id, 'manual', None, f"Padrão {novo_padrao} - {nova_classe} Classe")
+        self.enqueue_evaluation(membro.id)
         log_channel = self.bot.get_channel(LOG_CHANNEL_ID)
         if log_channel:
             await log_channel.send(f"🛠️ **AJUSTE MANUAL:** {interaction.user.mention} ajustou o cargo de {membro.mention} para **Padrão {novo_padrao}** e **{nova_classe} Classe**. A contagem de horas foi reiniciada.")
@@ -376,12 +671,12 @@ class PromocaoCog(commands.Cog, name="PromocaoCog"):
 
             # Atualiza a data da última promoção para "agora", resetando a contagem
             now_iso = datetime.now().isoformat()
-            await db.execute(
+            await get_writer(DB_PROMOTION).execute(
                 "UPDATE user_promotions SET last_class_promotion_date = ? WHERE user_id = ?",
                 (now_iso, membro.id)
             )
-            await db.commit()
             logger.info(f"Horas de {membro.display_name} resetadas manualmente por {interaction.user.display_name}.")
+        self.enqueue_evaluation(membro.id)
 
         # Envia um log da ação administrativa
         log_channel = self.bot.get_channel(LOG_CHANNEL_ID)
@@ -392,12 +687,21 @@ class PromocaoCog(commands.Cog, name="PromocaoCog"):
         await interaction.followup.send(f"✅ A contagem de horas de {membro.mention} foi resetada com sucesso. A nova contagem começará a partir de agora.", ephemeral=True)
     # <--- FIM DO NOVO COMANDO
 
-    @tasks.loop(minutes=10.0)
+    @tasks.loop(minutes=10.0)  # Intervalo real definido por FULL_SWEEP_MINUTES no __init__.
     async def promotion_check_task(self):
         await self.bot.wait_until_ready()
-        logger.info("Executando tarefa de verificação de promoções...")
+        if self.promotion_check_task.current_loop == 0:
+            return  # Na inicialização a auditoria de cargos já faz a varredura completa.
+        logger.info("Executando varredura completa de promoções...")
         await self.run_promotion_check()
-        logger.info("Tarefa de verificação de promoções concluída.")
+        logger.info("Varredura completa de promoções concluída.")
+
+    @tasks.loop(hours=24.0)  # Intervalo real definido por ROLE_AUDIT_HOURS no __init__.
+    async def role_audit_task(self):
+        await self.bot.wait_until_ready()
+        logger.info("Executando auditoria completa de cargos de promoção...")
+        await self.run_promotion_check(audit=True)
+        logger.info("Auditoria completa de cargos de promoção concluída.")
 
 async def setup(bot: commands.Bot):
     if not all([GUILD_ID, ADMIN_ROLE_ID, SUPER_ADMIN_ID, LOG_CHANNEL_ID]):
@@ -1,16 +1,24 @@
 # cogs/relatorio_ponto_cog.py
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 import json
 import logging
 import aiosqlite
 from datetime import datetime, timedelta
-import os
-
-# Importações para a nova funcionalidade de gráfico
-import pandas as pd
-import matplotlib.pyplot as plt
+import asyncio
+import csv
+import gzip
+import io
+import time
+import zipfile
+from collections import OrderedDict
+from itertools import chain
+import numpy as np
+from cogs.__db_writer import get_writer
+from cogs.__ponto_db import connect_sessions, get_display_names, split_by_day
+from cogs.__ponto_charts import ChartRenderer, render_activity_chart, render_coverage_heatmap
+from cogs.__ponto_intervals import WEEKDAY_LABELS, hour_of_week_coverage
 
 logger = logging.getLogger('discord_bot')
 
@@ -20,139 +28,603 @@ try:
         config = json.load(f)
     GUILD_ID = config.get('GUILD_ID')
     ADMIN_ROLE_ID = config.get('ADMIN_ROLE_ID')
+    CHART_WORKERS = config.get('CHART_WORKERS', 2)
+    CHART_TIMEOUT_SECONDS = config.get('CHART_TIMEOUT_SECONDS', 30)
+    REPORT_GZIP_MIN_BYTES = config.get('REPORT_GZIP_MIN_BYTES', 1_000_000)
+    REPORT_CACHE_SIZE = config.get('REPORT_CACHE_SIZE', 32)
+    BATCH_REPORT_CONCURRENCY = config.get('BATCH_REPORT_CONCURRENCY', 4)
+    BATCH_PROGRESS_INTERVAL_SECONDS = config.get('BATCH_PROGRESS_INTERVAL_SECONDS', 2)
+    COVERAGE_THIN_SLOTS = config.get('COVERAGE_THIN_SLOTS', 5)
+    DIGEST_CHANNEL_ID = config.get('DIGEST_CHANNEL_ID')
+    DIGEST_ROLE_ID = config.get('DIGEST_ROLE_ID')
+    DIGEST_MIN_HOURS = config.get('DIGEST_MIN_HOURS', 10)
+    DIGEST_HOUR = config.get('DIGEST_HOUR', 9)
+    DIGEST_TOP_SIZE = config.get('DIGEST_TOP_SIZE', 10)
+    DIGEST_CHART = config.get('DIGEST_CHART', True)
 except (FileNotFoundError, json.JSONDecodeError):
     logger.critical("ERRO CRÍTICO: 'config_relatorio_ponto.json' não encontrado ou mal formatado.")
-    GUILD_ID, ADMIN_ROLE_ID = None, None
+    GUILD_ID, ADMIN_ROLE_ID, CHART_WORKERS, CHART_TIMEOUT_SECONDS, REPORT_GZIP_MIN_BYTES, REPORT_CACHE_SIZE = None, None, 2, 30, 1_000_000, 32
+    BATCH_REPORT_CONCURRENCY, BATCH_PROGRESS_INTERVAL_SECONDS, COVERAGE_THIN_SLOTS = 4, 2, 5
+    DIGEST_CHANNEL_ID, DIGEST_ROLE_ID, DIGEST_MIN_HOURS, DIGEST_HOUR, DIGEST_TOP_SIZE, DIGEST_CHART = None, None, 10, 9, 10, True
 
 DB_FILE = "clock.sqlite" # O mesmo banco de dados do ponto_cog
+DB_PROMOTION = "promotions.sqlite" # Histórico de promoções do promocao_cog
+
+# Agrupamento da consolidação diária (daily_rollup) por período: expressão SQL, rótulo do eixo e formato da data.
+GRANULARITIES = {
+    "dia": ("day", "Dia", "%d/%m/%y"),
+    "semana": ("date(day, 'weekday 0', '-6 days')", "Semana (início)", "%d/%m/%y"),
+    "mes": ("substr(day, 1, 7) || '-01'", "Mês", "%m/%Y"),
+}
+
+def parse_report_period(inicio: str | None, fim: str | None) -> tuple[str | None, str | None]:
+    """Converte DD/MM/AAAA em limites ISO [início, fim + 1 dia). Levanta ValueError se inválidas."""
+    since = datetime.strptime(inicio, "%d/%m/%Y").isoformat() if inicio else None
+    until = (datetime.strptime(fim, "%d/%m/%Y") + timedelta(days=1)).isoformat() if fim else None
+    return since, until
+
+def build_report_bundle(reports: list[tuple[discord.Member, tuple[bytes, str, bytes | None]]], summary: dict[int, tuple[int, int]]) -> bytes:
+    """Empacota os relatórios de cada membro e um resumo.csv em um único zip. Roda fora do loop de eventos."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as bundle:
+        summary_text = io.StringIO()
+        writer = csv.writer(summary_text)
+        writer.writerow(["user_id", "nome", "sessoes", "horas"])
+        for member, (report_bytes, report_filename, chart_png) in reports:
+            sessions, seconds = summary.get(member.id, (0, 0))
+            writer.writerow([member.id, member.display_name, sessions, f"{seconds / 3600:.2f}"])
+            bundle.writestr(f"{member.name}/{report_filename}", report_bytes)
+            if chart_png:
+                # PNG já é comprimido; guardar sem deflate poupa CPU.
+                bundle.writestr(zipfile.ZipInfo(f"{member.name}/Grafico_Atividade_{member.name}.png", time.localtime()[:6]), chart_png, compress_type=zipfile.ZIP_STORED)
+        bundle.writestr("resumo.csv", summary_text.getvalue().encode('utf-8-sig'))
+    return buffer.getvalue()
+
+def get_digest_week(now: datetime) -> tuple[datetime, datetime] | None:
+    """Semana (segunda a segunda) coberta pelo resumo que já deveria ter sido publicado, ou None antes do horário de segunda."""
+    this_monday = datetime.combine(now.date() - timedelta(days=now.weekday()), datetime.min.time())
+    if now < this_monday + timedelta(hours=DIGEST_HOUR):
+        return None
+    return this_monday - timedelta(days=7), this_monday
+
+def list_lines(lines: list[str], limit: int = 1024) -> str:
+    """Junta as linhas até o limite de um campo de embed, indicando quantas ficaram de fora."""
+    text = ""
+    for index, line in enumerate(lines):
+        suffix = f"\n... e mais {len(lines) - index}."
+        if len(text) + len(line) + 1 + len(suffix) > limit:
+            return text + suffix
+        text += line + "\n"
+    return text or "—"
+
+def describe_report_period(since: str | None, until: str | None) -> str:
+    if not since and not until:
+        return "Todo o histórico"
+    start = datetime.fromisoformat(since).strftime('%d/%m/%Y') if since else "início"
+    end = (datetime.fromisoformat(until) - timedelta(days=1)).strftime('%d/%m/%Y') if until else "hoje"
+    return f"{start} a {end}"
 
 # --- Classe do Cog de Relatórios ---
 class RelatorioPontoCog(commands.Cog, name="RelatorioPontoCog"):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.logger = logging.getLogger('discord_bot')
+        self.chart_renderer = ChartRenderer(CHART_WORKERS, CHART_TIMEOUT_SECONDS)
+        # Cache LRU dos arquivos gerados: (staff_id, última sessão encerrada, parâmetros) -> ((texto, nome do texto, gráfico), gerado em).
+        self.report_cache: OrderedDict[tuple, tuple[tuple[bytes, str, bytes], datetime]] = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
         self.logger.info("Cog 'RelatorioPontoCog' carregado.")
 
-    @app_commands.command(name="relatorio_ponto", description="Gera um relatório completo de ponto e um gráfico de atividade para um membro.")
+    async def cog_load(self):
+        await get_writer(DB_FILE).execute(
+            "CREATE TABLE IF NOT EXISTS weekly_digests (week_start TEXT PRIMARY KEY, message_id INTEGER, posted_at TEXT NOT NULL)"
+        )
+        if DIGEST_CHANNEL_ID:
+            self.weekly_digest_task.start()
+
+    def cog_unload(self):
+        self.weekly_digest_task.cancel()
+        self.chart_renderer.shutdown()
+
+    def invalidate_reports(self, staff_ids):
+        staff_ids = set(staff_ids)
+        for key in [key for key in self.report_cache if key[0] in staff_ids]:
+            del self.report_cache[key]
+
+    @commands.Cog.listener()
+    async def on_ponto_clock_out(self, member: discord.Member, session_id: int):
+        self.invalidate_reports([member.id])
+
+    @commands.Cog.listener()
+    async def on_ponto_sessions_changed(self, staff_ids: list[int]):
+        self.invalidate_reports(staff_ids)
+
+    async def get_last_closed_session_id(self, staff_id: int) -> int | None:
+        async with aiosqlite.connect(DB_FILE) as db:
+            async with db.execute("SELECT MAX(session_id) FROM sessions WHERE staff_id = ? AND clock_out_time IS NOT NULL", (staff_id,)) as cursor:
+                return (await cursor.fetchone())[0]
+
+    async def write_text_report(self, text: io.TextIOBase, member: discord.Member, since: str | None, until: str | None) -> tuple[int, int]:
+        """Escreve o relatório de texto linha a linha enquanto percorre as sessões do período.
+
+        Só uma linha fica em memória por vez, então o custo acompanha o período pedido e não o
+        tempo de casa do membro. Entram as sessões que tocam o período; as que cruzam um dos limites
+        contam só a parte de dentro, dividida por dia como na consolidação diária, para que o total
+        bata com o gráfico do mesmo relatório. Retorna (sessões, segundos totais).
+        """
+        query = "SELECT clock_in_time, clock_out_time FROM sessions WHERE staff_id = ? AND clock_out_time IS NOT NULL"
+        params = [member.id]
+        if since:
+            query += " AND clock_out_time > ?"
+            params.append(since)
+        if until:
+            query += " AND clock_in_time < ?"
+            params.append(until)
+        query += " ORDER BY clock_in_time ASC"
+        period_start = datetime.fromisoformat(since) if since else datetime.min
+        period_end = datetime.fromisoformat(until) if until else datetime.max
+
+        text.write("==================================================\n")
+        text.write(f"  RELATÓRIO DE PONTO - {member.display_name.upper()}\n")
+        text.write("==================================================\n")
+        text.write(f"Período de Análise: {describe_report_period(since, until)}\n")
+        text.write(f"ID do Usuário: {member.id}\n")
+        if since or until:
+            text.write("Sessões que cruzam os limites do período contam só a parte dentro dele (marcadas como parciais).\n")
+        text.write("-" * 50 + "\n")
+        text.write("\nSESSÕES REGISTRADAS:\n\n")
+
+        count, total_seconds = 0, 0
+        # Um dia a mais para trás alcança o arquivo do ano anterior de sessões que atravessam o 1º de janeiro.
+        lookback = (period_start - timedelta(days=1)).isoformat() if since else None
+        async with connect_sessions(lookback, until) as db:
+            async with db.execute(query, params) as cursor:
+                async for clock_in_time, clock_out_time in cursor:
+                    clock_in = datetime.fromisoformat(clock_in_time)
+                    clock_out = datetime.fromisoformat(clock_out_time)
+                    start, end = max(clock_in, period_start), min(clock_out, period_end)
+                    seconds = sum(part for _, part in split_by_day(start, end))
+                    count += 1
+                    total_seconds += seconds
+                    h, rem = divmod(seconds, 3600)
+                    m, s = divmod(rem, 60)
+                    partial = " (parcial)" if (start, end) != (clock_in, clock_out) else ""
+                    text.write(
+                        f"#{count:03d} | Início: {clock_in.strftime('%d/%m/%Y %H:%M:%S')} | Fim: {clock_out.strftime('%d/%m/%Y %H:%M:%S')} | Duração: {h:02d}h {m:02d}m {s:02d}s{partial}\n"
+                    )
+
+        total_days, day_rem = divmod(total_seconds, 86400)
+        total_hours, hour_rem = divmod(day_rem, 3600)
+        total_minutes, _ = divmod(hour_rem, 60)
+        total_duration_str = f"{total_hours}h {total_minutes}m"
+        if total_days > 0:
+            total_duration_str = f"{total_days} dias, " + total_duration_str
+
+        text.write("\n" + "-" * 50 + "\n")
+        text.write(f"Total de Sessões: {count}\n")
+        text.write(f"Tempo Total de Serviço Registrado: {total_duration_str}\n")
+        text.write("==================================================\n")
+        text.write(f"Relatório gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+        return count, total_seconds
+
+    async def fetch_chart_points(self, member_id: int, since: str | None, until: str | None, granularidade: str) -> tuple[list[str], list[float]]:
+        """Horas por dia/semana/mês somadas no SQLite sobre a consolidação diária; só os pontos do gráfico vêm para o Python.
+
+        A consolidação já divide as sessões na meia-noite e continua completa após o arquivamento.
+        """
+        bucket, _, label_format = GRANULARITIES[granularidade]
+        query = f"SELECT {bucket} AS bucket, SUM(seconds) FROM daily_rollup WHERE staff_id = ?"
+        params = [member_id]
+        if since:
+            query += " AND day >= ?"
+            params.append(since[:10])
+        if until:
+            query += " AND day < ?"
+            params.append(until[:10])
+        query += " GROUP BY bucket ORDER BY bucket"
+        async with aiosqlite.connect(DB_FILE) as db:
+            async with db.execute(query, params) as cursor:
+                rows = await cursor.fetchall()
+        labels = [datetime.strptime(row[0], "%Y-%m-%d").strftime(label_format) for row in rows]
+        return labels, [row[1] / 3600 for row in rows]
+
+    async def build_report(self, member: discord.Member, since: str | None, until: str | None, granularidade: str) -> tuple[bytes, str, bytes | None] | None:
+        """Gera o texto e o gráfico do período em memória. Retorna None se não há sessões no período."""
+        buffer = io.BytesIO()
+        text = io.TextIOWrapper(buffer, encoding='utf-8', newline='')
+        count, _ = await self.write_text_report(text, member, since, until)
+        text.detach()  # Descarrega o texto no buffer sem fechá-lo.
+        if not count:
+            return None
+
+        report_bytes = buffer.getvalue()
+        report_filename = f"Relatorio_Ponto_{member.name}.txt"
+        # Relatórios longos vão comprimidos (REPORT_GZIP_MIN_BYTES = 0 desativa).
+        if REPORT_GZIP_MIN_BYTES and len(report_bytes) >= REPORT_GZIP_MIN_BYTES:
+            report_bytes = gzip.compress(report_bytes)
+            report_filename += ".gz"
+
+        # O desenho roda no pool de processos, fora do loop de eventos.
+        chart_png = None
+        try:
+            labels, hours = await self.fetch_chart_points(member.id, since, until, granularidade)
+            _, xlabel, _ = GRANULARITIES[granularidade]
+            title = f'Atividade de Ponto - {member.display_name} ({describe_report_period(since, until)})'
+            chart_png = await self.chart_renderer.render(render_activity_chart, labels, hours, title, xlabel)
+            self.logger.info(f"Gráfico de atividade gerado para {member.display_name}.")
+        except Exception as e:
+            self.logger.error(f"Falha ao gerar o gráfico de atividade: {e}", exc_info=True)
+        return report_bytes, report_filename, chart_png
+
+    async def fetch_team_summary(self, member_ids: list[int], since: str | None, until: str | None) -> dict[int, tuple[int, int]]:
+        """Sessões e segundos no período de todos os membros, em consultas agrupadas.
+
+        Na mesma base do relatório de cada membro: contam as sessões que tocam o período, e os
+        segundos vêm da consolidação diária (só a parte dentro do período, dividida por dia).
+        """
+        count_query = "SELECT staff_id, COUNT(*) FROM sessions WHERE clock_out_time IS NOT NULL AND staff_id IN (SELECT value FROM json_each(?))"
+        seconds_query = "SELECT staff_id, SUM(seconds) FROM daily_rollup WHERE staff_id IN (SELECT value FROM json_each(?))"
+        count_params, seconds_params = [json.dumps(member_ids)], [json.dumps(member_ids)]
+        if since:
+            count_query += " AND clock_out_time > ?"
+            count_params.append(since)
+            seconds_query += " AND day >= ?"
+            seconds_params.append(since[:10])
+        if until:
+            count_query += " AND clock_in_time < ?"
+            count_params.append(until)
+            seconds_query += " AND day < ?"
+            seconds_params.append(until[:10])
+        lookback = (datetime.fromisoformat(since) - timedelta(days=1)).isoformat() if since else None
+        async with connect_sessions(lookback, until) as db:
+            async with db.execute(count_query + " GROUP BY staff_id", count_params) as cursor:
+                counts = dict(await cursor.fetchall())
+            async with db.execute(seconds_query + " GROUP BY staff_id", seconds_params) as cursor:
+                seconds = dict(await cursor.fetchall())
+        return {staff_id: (count, seconds.get(staff_id, 0)) for staff_id, count in counts.items()}
+
+    async def fetch_coverage(self, staff_ids: list[int] | None, since: str | None, until: str | None) -> np.ndarray | None:
+        """Média de pessoas em serviço por hora da semana (7x24) no período, ou None se não há sessões.
+
+        O SQLite só converte os horários para segundos; a divisão nas viradas de hora e a soma por
+        hora da semana são vetorizadas em NumPy, sem laço por sessão.
+        """
+        query = """
+            SELECT CAST(strftime('%s', clock_in_time) AS INTEGER), CAST(strftime('%s', clock_out_time) AS INTEGER)
+            FROM sessions WHERE clock_out_time IS NOT NULL
+        """
+        params = []
+        if staff_ids is not None:
+            query += " AND staff_id IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps(staff_ids))
+        if since:
+            query += " AND clock_out_time > ?"
+            params.append(since)
+        if until:
+            query += " AND clock_in_time < ?"
+            params.append(until)
+        async with connect_sessions(since, until) as db:
+            async with db.execute(query, params) as cursor:
+                rows = await cursor.fetchall()
+        if not rows:
+            return None
+
+        bounds = np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=len(rows) * 2).reshape(-1, 2)
+        epoch = datetime(1970, 1, 1)
+        period_start = int((datetime.fromisoformat(since) - epoch).total_seconds()) if since else int(bounds[:, 0].min())
+        period_end = int(((datetime.fromisoformat(until) if until else datetime.now()) - epoch).total_seconds())
+        return await asyncio.to_thread(hour_of_week_coverage, bounds[:, 0], bounds[:, 1], period_start, period_end)
+
+    async def send_report(self, interaction: discord.Interaction, membro: discord.Member, artifacts: tuple[bytes, str, bytes | None], cached_at: datetime | None = None):
+        """Envia os arquivos; com cached_at, avisa que saíram do cache e quando foram gerados."""
+        report_bytes, report_filename, chart_png = artifacts
+        files_to_send = [discord.File(io.BytesIO(report_bytes), filename=report_filename)]
+        if chart_png:
+            files_to_send.append(discord.File(io.BytesIO(chart_png), filename=f"Grafico_Atividade_{membro.name}.png"))
+        message = f"✅ Relatório de ponto e gráfico de atividade para **{membro.display_name}** gerados com sucesso!"
+        if cached_at:
+            message = (
+                f"📦 Relatório de ponto e gráfico de atividade para **{membro.display_name}** reaproveitados do cache, "
+                f"gerados em {cached_at.strftime('%d/%m/%Y %H:%M:%S')}: nenhuma sessão do membro foi encerrada desde então."
+            )
+        await interaction.followup.send(message, files=files_to_send, ephemeral=True)
+
+    async def collect_weekly_digest(self, guild: discord.Guild, week_start: datetime, week_end: datetime) -> dict:
+        """Junta em uma passada os totais da semana por membro (daily_rollup), as promoções do período e quem ficou abaixo da meta."""
+        async with aiosqlite.connect(DB_FILE) as db:
+            async with db.execute(
+                "SELECT staff_id, SUM(seconds), SUM(sessions) FROM daily_rollup WHERE day >= ? AND day < ? GROUP BY staff_id ORDER BY SUM(seconds) DESC",
+                (week_start.date().isoformat(), week_end.date().isoformat())
+            ) as cursor:
+                totals = {staff_id: (seconds, sessions) for staff_id, seconds, sessions in await cursor.fetchall()}
+
+        try:
+            async with aiosqlite.connect(DB_PROMOTION) as db:
+                async with db.execute(
+                    "SELECT user_id, kind, to_rank FROM promotion_history WHERE created_at >= ? AND created_at < ? ORDER BY created_at",
+                    (week_start.isoformat(), week_end.isoformat())
+                ) as cursor:
+                    promotions = await cursor.fetchall()
+        except aiosqlite.OperationalError:
+            promotions = []  # O PromocaoCog ainda não criou o histórico.
+
+        role = guild.get_role(DIGEST_ROLE_ID) if DIGEST_ROLE_ID else None
+        population = {member.id for member in role.members if not member.bot} if role else set(totals)
+        below = sorted(
+            (staff_id for staff_id in population if totals.get(staff_id, (0, 0))[0] < DIGEST_MIN_HOURS * 3600),
+            key=lambda staff_id: totals.get(staff_id, (0, 0))[0]
+        )
+
+        ids = set(totals) | population | {row[0] for row in promotions}
+        names = await get_display_names([staff_id for staff_id in ids if not guild.get_member(staff_id)])
+        def name_of(staff_id: int) -> str:
+            member = guild.get_member(staff_id)
+            return member.display_name if member else names.get(staff_id, f"ID {staff_id}")
+
+        return {'totals': totals, 'promotions': promotions, 'below': below, 'name_of': name_of}
+
+    def build_digest_embed(self, week_start: datetime, week_end: datetime, digest: dict) -> discord.Embed:
+        totals, name_of = digest['totals'], digest['name_of']
+        period = describe_report_period(week_start.isoformat(), week_end.isoformat())
+        total_seconds = sum(seconds for seconds, _ in totals.values())
+        embed = discord.Embed(title=f"📅 Resumo Semanal de Ponto ({period})", color=discord.Color.blue(), timestamp=datetime.now())
+        embed.add_field(name="Horas Totais", value=f"{total_seconds / 3600:.1f}h", inline=True)
+        embed.add_field(name="Membros Ativos", value=str(len(totals)), inline=True)
+        embed.add_field(name="Sessões", value=str(sum(sessions for _, sessions in totals.values())), inline=True)
+
+        top = list(totals.items())[:DIGEST_TOP_SIZE]
+        embed.add_field(
+            name=f"🏅 Top {len(top)}",
+            value=list_lines([f"**{index}.** {name_of(staff_id)}: {seconds / 3600:.1f}h" for index, (staff_id, (seconds, _)) in enumerate(top, start=1)]),
+            inline=False
+        )
+        kind_labels = {'padrao': "Padrão", 'classe': "Classe", 'manual': "Ajuste manual"}
+        embed.add_field(
+            name=f"📈 Promoções ({len(digest['promotions'])})",
+            value=list_lines([f"{name_of(user_id)}: {kind_labels.get(kind, kind)} → {to_rank}" for user_id, kind, to_rank in digest['promotions']]),
+            inline=False
+        )
+        embed.add_field(
+            name=f"⚠️ Abaixo de {DIGEST_MIN_HOURS}h ({len(digest['below'])})",
+            value=list_lines([f"{name_of(staff_id)}: {totals.get(staff_id, (0, 0))[0] / 3600:.1f}h" for staff_id in digest['below']]),
+            inline=False
+        )
+        return embed
+
+    async def post_weekly_digest(self, week_start: datetime, week_end: datetime) -> bool:
+        """Publica o resumo da semana uma única vez. Retorna False se ele já foi publicado (ou está sendo).
+
+        A semana é reservada em weekly_digests antes do envio, então um reinício não gera duplicatas;
+        se o envio falhar, a reserva é desfeita para a próxima tentativa.
+        """
+        channel = self.bot.get_channel(DIGEST_CHANNEL_ID)
+        if not channel:
+            self.logger.warning(f"Canal do resumo semanal ({DIGEST_CHANNEL_ID}) não encontrado.")
+            return False
+        writer = get_writer(DB_FILE)
+        week_key = week_start.date().isoformat()
+        cursor = await writer.execute("INSERT OR IGNORE INTO weekly_digests (week_start, posted_at) VALUES (?, ?)", (week_key, datetime.now().isoformat()))
+        if not cursor.rowcount:
+            return False
+
+        try:
+            digest = await self.collect_weekly_digest(channel.guild, week_start, week_end)
+            embed = self.build_digest_embed(week_start, week_end, digest)
+            files = []
+            if DIGEST_CHART and digest['totals']:
+                top = list(digest['totals'].items())[:DIGEST_TOP_SIZE]
+                try:
+                    chart_png = await self.chart_renderer.render(
+                        render_activity_chart, [digest['name_of'](staff_id) for staff_id, _ in top], [seconds / 3600 for _, (seconds, _) in top],
+                        f"Horas na Semana - Top {len(top)}", "Membro"
+                    )
+                    files.append(discord.File(io.BytesIO(chart_png), filename="resumo_semanal.png"))
+                    embed.set_image(url="attachment://resumo_semanal.png")
+                except Exception as e:
+                    self.logger.error(f"Falha ao renderizar o gráfico do resumo semanal: {e}", exc_info=True)
+            message = await channel.send(embed=embed, files=files)
+        except Exception:
+            await writer.execute("DELETE FROM weekly_digests WHERE week_start = ?", (week_key,))
+            raise
+        await writer.execute("UPDATE weekly_digests SET message_id = ? WHERE week_start = ?", (message.id, week_key))
+        self.logger.info(f"Resumo semanal de ponto da semana de {week_key} publicado.")
+        return True
+
+    @tasks.loop(minutes=30.0)
+    async def weekly_digest_task(self):
+        week = get_digest_week(datetime.now())
+        if not week:
+            return
+        try:
+            await self.post_weekly_digest(*week)
+        except Exception as e:
+            self.logger.error(f"Erro ao publicar o resumo semanal de ponto: {e}", exc_info=True)
+
+    @weekly_digest_task.before_loop
+    async def before_weekly_digest_task(self):
+        await self.bot.wait_until_ready()
+
+    @app_commands.command(name="relatorio_ponto", description="Gera o relatório de ponto e o gráfico de atividade de um membro, por período.")
     @app_commands.guilds(discord.Object(id=GUILD_ID)) # Adicionado para robustez
     @app_commands.checks.has_role(ADMIN_ROLE_ID)
     @app_commands.describe(
-        membro="O membro para o qual o relatório será gerado."
+        membro="O membro para o qual o relatório será gerado.",
+        inicio="Data inicial (DD/MM/AAAA). Padrão: todo o histórico.",
+        fim="Data final, inclusiva (DD/MM/AAAA).",
+        granularidade="Agrupamento das barras do gráfico."
     )
-    async def relatorio_ponto(self, interaction: discord.Interaction, membro: discord.Member):
+    @app_commands.choices(granularidade=[
+        app_commands.Choice(name="Dia", value="dia"),
+        app_commands.Choice(name="Semana", value="semana"),
+        app_commands.Choice(name="Mês", value="mes"),
+    ])
+    async def relatorio_ponto(self, interaction: discord.Interaction, membro: discord.Member, inicio: str = None, fim: str = None, granularidade: str = "dia"):
         await interaction.response.defer(ephemeral=True)
+        try:
+            since, until = parse_report_period(inicio, fim)
+        except ValueError:
+            await interaction.followup.send("❌ Formato de data inválido. Use `DD/MM/AAAA`.", ephemeral=True)
+            return
 
-        sessions = []
+        # Entre dois turnos do membro o relatório não muda: pedidos repetidos saem do cache.
+        cache_key = (membro.id, await self.get_last_closed_session_id(membro.id), membro.display_name, since, until, granularidade)
+        if cache_key in self.report_cache:
+            self.report_cache.move_to_end(cache_key)
+            self.cache_hits += 1
+            artifacts, generated_at = self.report_cache[cache_key]
+            await self.send_report(interaction, membro, artifacts, cached_at=generated_at)
+            return
+        self.cache_misses += 1
+
+        # Os arquivos são montados em memória e enviados direto, sem passar pelo disco.
         try:
-            async with aiosqlite.connect(DB_FILE) as db:
-                db.row_factory = aiosqlite.Row
-                query = "SELECT * FROM sessions WHERE staff_id = ? AND clock_out_time IS NOT NULL ORDER BY clock_in_time ASC"
-                async with db.execute(query, (membro.id,)) as cursor:
-                    sessions_raw = await cursor.fetchall()
-                    sessions = [dict(row) for row in sessions_raw]
+            artifacts = await self.build_report(membro, since, until, granularidade)
         except Exception as e:
-            self.logger.error(f"Erro ao consultar o banco de dados de ponto: {e}", exc_info=True)
-            await interaction.followup.send("❌ Ocorreu um erro ao acessar o banco de dados.", ephemeral=True)
+            self.logger.error(f"Erro ao gerar o relatório de ponto: {e}", exc_info=True)
+            await interaction.followup.send("❌ Ocorreu um erro ao gerar o arquivo de relatório.", ephemeral=True)
             return
 
-        if not sessions:
-            await interaction.followup.send(f"ℹ️ Nenhum registro de ponto encontrado para **{membro.display_name}**.", ephemeral=True)
+        if not artifacts:
+            await interaction.followup.send(f"ℹ️ Nenhum registro de ponto encontrado para **{membro.display_name}** no período.", ephemeral=True)
             return
-            
-        output_filename = f"relatorio_{membro.id}_{interaction.id}.txt"
-        graph_filename = f"grafico_{membro.id}_{interaction.id}.png"
-        
+
+        if artifacts[2] and REPORT_CACHE_SIZE:
+            self.report_cache[cache_key] = (artifacts, datetime.now())
+            while len(self.report_cache) > REPORT_CACHE_SIZE:
+                self.report_cache.popitem(last=False)
         try:
-            # --- Bloco de Geração do Relatório de Texto ---
-            report_lines = []
-            total_duration = timedelta()
-
-            report_lines.append("==================================================")
-            report_lines.append(f"  RELATÓRIO DE PONTO COMPLETO - {membro.display_name.upper()}")
-            report_lines.append("==================================================")
-            report_lines.append("Período de Análise: Todo o histórico")
-            report_lines.append(f"ID do Usuário: {membro.id}")
-            report_lines.append("-" * 50)
-            report_lines.append("\nSESSÕES REGISTRADAS:\n")
-
-            for i, session in enumerate(sessions, 1):
-                clock_in = datetime.fromisoformat(session['clock_in_time'])
-                clock_out = datetime.fromisoformat(session['clock_out_time'])
-                duration = clock_out - clock_in
-                total_duration += duration
-
-                h, rem = divmod(int(duration.total_seconds()), 3600)
-                m, s = divmod(rem, 60)
-                duration_str = f"{h:02d}h {m:02d}m {s:02d}s"
-                
-                report_lines.append(
-                    f"#{i:03d} | Início: {clock_in.strftime('%d/%m/%Y %H:%M:%S')} | Fim: {clock_out.strftime('%d/%m/%Y %H:%M:%S')} | Duração: {duration_str}"
-                )
-
-            total_seconds = int(total_duration.total_seconds())
-            total_days, day_rem = divmod(total_seconds, 86400)
-            total_hours, hour_rem = divmod(day_rem, 3600)
-            total_minutes, _ = divmod(hour_rem, 60)
-            
-            total_duration_str = f"{total_hours}h {total_minutes}m"
-            if total_days > 0:
-                total_duration_str = f"{total_days} dias, " + total_duration_str
-
-            report_lines.append("\n" + "-" * 50)
-            report_lines.append(f"Total de Sessões: {len(sessions)}")
-            report_lines.append(f"Tempo Total de Serviço Registrado: {total_duration_str}")
-            report_lines.append("==================================================")
-            report_lines.append(f"Relatório gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
-
-            report_content = "\n".join(report_lines)
-
-            with open(output_filename, 'w', encoding='utf-8') as f:
-                f.write(report_content)
-            
-            # --- Bloco de Geração do Gráfico ---
-            try:
-                df = pd.DataFrame(sessions)
-                df['clock_in_time'] = pd.to_datetime(df['clock_in_time'])
-                df['clock_out_time'] = pd.to_datetime(df['clock_out_time'])
-                df['duration_hours'] = (df['clock_out_time'] - df['clock_in_time']).dt.total_seconds() / 3600
-                
-                daily_activity = df.groupby(df['clock_in_time'].dt.date)['duration_hours'].sum()
-
-                plt.style.use('seaborn-v0_8-darkgrid')
-                fig, ax = plt.subplots(figsize=(12, 7))
-                daily_activity.plot(kind='bar', ax=ax, color='#7289DA', width=0.6)
-                ax.set_title(f'Atividade de Ponto Diária - {membro.display_name}', fontsize=16, pad=20)
-                ax.set_xlabel('Data', fontsize=12)
-                ax.set_ylabel('Total de Horas Trabalhadas', fontsize=12)
-                ax.set_xticklabels([d.strftime('%d/%m/%y') for d in daily_activity.index], rotation=45, ha='right')
-                ax.grid(axis='y', linestyle='--', alpha=0.7)
-                plt.tight_layout()
-                plt.savefig(graph_filename)
-                plt.close(fig)
-                self.logger.info(f"Gráfico de atividade gerado para {membro.display_name}.")
-            except Exception as e:
-                self.logger.error(f"Falha ao gerar o gráfico de atividade: {e}", exc_info=True)
-                graph_filename = None
-
-            # --- Envio dos Arquivos ---
-            files_to_send = []
-            files_to_send.append(discord.File(output_filename, filename=f"Relatorio_Completo_{membro.name}.txt"))
-            if graph_filename and os.path.exists(graph_filename):
-                files_to_send.append(discord.File(graph_filename, filename=f"Grafico_Atividade_{membro.name}.png"))
-
-            await interaction.followup.send(
-                f"✅ Relatório de ponto e gráfico de atividade para **{membro.display_name}** gerados com sucesso!",
-                files=files_to_send,
-                ephemeral=True
-            )
+            await self.send_report(interaction, membro, artifacts)
         except Exception as e:
-            self.logger.error(f"Erro ao criar ou enviar o arquivo de relatório: {e}", exc_info=True)
-            await interaction.followup.send("❌ Ocorreu um erro ao gerar o arquivo de relatório.", ephemeral=True)
-        finally:
-            if os.path.exists(output_filename):
-                os.remove(output_filename)
-            if os.path.exists(graph_filename):
-                os.remove(graph_filename)
+            self.logger.error(f"Erro ao enviar o arquivo de relatório: {e}", exc_info=True)
+            await interaction.followup.send("❌ Ocorreu um erro ao enviar o arquivo de relatório.", ephemeral=True)
+
+    @app_commands.command(name="relatorio_ponto_equipe", description="Gera em um único .zip os relatórios de ponto de todos os membros de um cargo.")
+    @app_commands.guilds(discord.Object(id=GUILD_ID))
+    @app_commands.checks.has_role(ADMIN_ROLE_ID)
+    @app_commands.describe(
+        cargo="Cargo (ou cargo de carreira) cujos membros entram no pacote.",
+        inicio="Data inicial (DD/MM/AAAA). Padrão: todo o histórico.",
+        fim="Data final, inclusiva (DD/MM/AAAA).",
+        granularidade="Agrupamento das barras dos gráficos."
+    )
+    @app_commands.choices(granularidade=[
+        app_commands.Choice(name="Dia", value="dia"),
+        app_commands.Choice(name="Semana", value="semana"),
+        app_commands.Choice(name="Mês", value="mes"),
+    ])
+    async def relatorio_ponto_equipe(self, interaction: discord.Interaction, cargo: discord.Role, inicio: str = None, fim: str = None, granularidade: str = "dia"):
+        await interaction.response.defer(ephemeral=True)
+        try:
+            since, until = parse_report_period(inicio, fim)
+        except ValueError:
+            await interaction.followup.send("❌ Formato de data inválido. Use `DD/MM/AAAA`.", ephemeral=True)
+            return
+
+        members = [member for member in cargo.members if not member.bot]
+        if not members:
+            await interaction.followup.send(f"ℹ️ O cargo {cargo.mention} não tem membros.", ephemeral=True)
+            return
+
+        period = describe_report_period(since, until)
+        progress = await interaction.followup.send(f"⏳ Gerando relatórios de {cargo.mention} ({period}): 0/{len(members)}...", ephemeral=True, wait=True)
+        done = 0
+        last_progress_edit = time.monotonic()
+        # O semáforo limita quantos relatórios andam ao mesmo tempo, para que os gráficos não
+        # fiquem esperando na fila do pool além do CHART_TIMEOUT_SECONDS.
+        semaphore = asyncio.Semaphore(BATCH_REPORT_CONCURRENCY)
+
+        async def generate(member: discord.Member):
+            nonlocal done, last_progress_edit
+            async with semaphore:
+                try:
+                    artifacts = await self.build_report(member, since, until, granularidade)
+                except Exception as e:
+                    self.logger.error(f"Erro ao gerar o relatório de {member.display_name} no pacote da equipe: {e}", exc_info=True)
+                    artifacts = None
+            done += 1
+            if time.monotonic() - last_progress_edit >= BATCH_PROGRESS_INTERVAL_SECONDS:
+                last_progress_edit = time.monotonic()
+                try:
+                    await progress.edit(content=f"⏳ Gerando relatórios de {cargo.mention} ({period}): {done}/{len(members)}...")
+                except discord.HTTPException:
+                    pass
+            return member, artifacts
+
+        started = time.monotonic()
+        results = await asyncio.gather(*(generate(member) for member in members))
+        reports = [(member, artifacts) for member, artifacts in results if artifacts]
+        if not reports:
+            await progress.edit(content=f"ℹ️ Nenhum membro de {cargo.mention} tem registros de ponto no período.")
+            return
+
+        summary = await self.fetch_team_summary([member.id for member in members], since, until)
+        bundle = await asyncio.to_thread(build_report_bundle, reports, summary)
+        if len(bundle) > interaction.guild.filesize_limit:
+            await progress.edit(content="❌ O pacote excede o limite de upload do servidor. Reduza o período ou use um cargo menor.")
+            return
+
+        filename = f"Relatorios_Ponto_{cargo.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+        self.logger.info(f"Pacote de relatórios de '{cargo.name}' gerado por {interaction.user.display_name}: {len(reports)} membros em {time.monotonic() - started:.1f}s.")
+        await progress.edit(
+            content=f"✅ Relatórios de **{len(reports)}** membros de {cargo.mention} ({period}). Sem registros no período: {len(members) - len(reports)}.",
+            attachments=[discord.File(io.BytesIO(bundle), filename=filename)]
+        )
+
+    @app_commands.command(name="relatorio_cobertura", description="Mapa de calor da cobertura por dia da semana e hora, de um membro, de um cargo ou da equipe toda.")
+    @app_commands.guilds(discord.Object(id=GUILD_ID))
+    @app_commands.checks.has_role(ADMIN_ROLE_ID)
+    @app_commands.describe(
+        membro="Analisa apenas este membro.",
+        cargo="Analisa os membros deste cargo. Sem membro e sem cargo, considera a equipe toda.",
+        inicio="Data inicial (DD/MM/AAAA). Padrão: todo o histórico.",
+        fim="Data final, inclusiva (DD/MM/AAAA)."
+    )
+    async def relatorio_cobertura(self, interaction: discord.Interaction, membro: discord.Member = None, cargo: discord.Role = None, inicio: str = None, fim: str = None):
+        await interaction.response.defer(ephemeral=True)
+        try:
+            since, until = parse_report_period(inicio, fim)
+        except ValueError:
+            await interaction.followup.send("❌ Formato de data inválido. Use `DD/MM/AAAA`.", ephemeral=True)
+            return
+
+        if membro:
+            staff_ids, scope = [membro.id], membro.display_name
+        elif cargo:
+            staff_ids, scope = [member.id for member in cargo.members if not member.bot], cargo.name
+        else:
+            staff_ids, scope = None, "Equipe"
+
+        coverage = await self.fetch_coverage(staff_ids, since, until)
+        if coverage is None:
+            await interaction.followup.send(f"ℹ️ Nenhuma sessão encontrada para **{scope}** no período.", ephemeral=True)
+            return
+
+        period = describe_report_period(since, until)
+        try:
+            heatmap_png = await self.chart_renderer.render(render_coverage_heatmap, coverage.tolist(), f"Cobertura por Hora da Semana - {scope} ({period})")
+        except Exception as e:
+            self.logger.error(f"Falha ao renderizar o mapa de cobertura de '{scope}': {e}", exc_info=True)
+            await interaction.followup.send("❌ Não foi possível gerar o mapa de cobertura agora. Tente novamente.", ephemeral=True)
+            return
+
+        thinnest = np.argsort(coverage, axis=None, kind='stable')[:COVERAGE_THIN_SLOTS]
+        thin_lines = "\n".join(
+            f"• {WEEKDAY_LABELS[slot // 24]} {slot % 24:02d}h: {coverage.flat[slot]:.2f} pessoa(s) em média" for slot in thinnest
+        )
+        await interaction.followup.send(
+            f"📊 Cobertura de **{scope}** ({period}).\n**Horários mais descobertos:**\n{thin_lines}",
+            file=discord.File(io.BytesIO(heatmap_png), filename=f"Cobertura_{scope}.png"),
+            ephemeral=True
+        )
+
+    @relatorio_cobertura.error
+    async def relatorio_cobertura_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        await self.relatorio_ponto_error(interaction, error)
+
+    @relatorio_ponto_equipe.error
+    async def relatorio_ponto_equipe_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        await self.relatorio_ponto_error(interaction, error)
 
     @relatorio_ponto.error
     async def relatorio_ponto_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
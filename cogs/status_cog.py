@@ -136,6 +136,18 @@ class StatusCog(commands.Cog):
             inline=True
         )
 
+        relatorio_cog = self.bot.get_cog('RelatorioPontoCog')
+        if relatorio_cog:
+            renderer = relatorio_cog.chart_renderer
+            embed.add_field(
+                name="📑 Relatórios de Ponto",
+                value=(
+                    f"**Gráficos na fila:** `{renderer.pending}`\n**Gerados:** `{renderer.rendered}` | **Timeouts:** `{renderer.timeouts}`\n"
+                    f"**Cache:** `{relatorio_cog.cache_hits}` acertos / `{relatorio_cog.cache_misses}` falhas ({len(relatorio_cog.report_cache)} itens)"
+                ),
+                inline=True
+            )
+
         embed.add_field(name="🔧 Versões", value=f"**Python:** `{python_version}`\n**Discord.py:** `{discordpy_version}`", inline=False)
         
         if self.bot.user.avatar:
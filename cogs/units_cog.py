@@ -9,6 +9,7 @@ import random
 import string
 from datetime import datetime, timedelta
 import logging
+from cogs.__db_writer import get_writer
 
 # --- 1. Carregar Configurações ---
 try:
@@ -47,14 +48,21 @@ class JoinUnitModal(Modal, title="Entrar em uma Unidade"):
         async with aiosqlite.connect(DB_FILE) as db:
             async with db.execute("SELECT name FROM units WHERE unit_id = ?", (unit_id,)) as cursor:
                 unit = await cursor.fetchone()
-            if not unit:
-                await interaction.response.send_message(MESSAGES.get("ERROR_UNIT_NOT_FOUND"), ephemeral=True)
-                return
-            if await cog.get_user_unit_id(interaction.user.id):
-                await interaction.response.send_message(MESSAGES.get("ERROR_ALREADY_IN_UNIT"), ephemeral=True)
-                return
-            await db.execute("INSERT INTO unit_members (user_id, unit_id) VALUES (?, ?)", (interaction.user.id, unit_id))
-            await db.commit()
+        if not unit:
+            await interaction.response.send_message(MESSAGES.get("ERROR_UNIT_NOT_FOUND"), ephemeral=True)
+            return
+        if await cog.get_user_unit_id(interaction.user.id):
+            await interaction.response.send_message(MESSAGES.get("ERROR_ALREADY_IN_UNIT"), ephemeral=True)
+            return
+        # Só entra se a unidade ainda existir no momento da gravação (ela pode ter sido desfeita desde a leitura).
+        try:
+            cursor = await get_writer(DB_FILE).execute("INSERT INTO unit_members (user_id, unit_id) SELECT ?, unit_id FROM units WHERE unit_id = ?", (interaction.user.id, unit_id))
+        except aiosqlite.IntegrityError:
+            await interaction.response.send_message(MESSAGES.get("ERROR_ALREADY_IN_UNIT"), ephemeral=True)
+            return
+        if not cursor.rowcount:
+            await interaction.response.send_message(MESSAGES.get("ERROR_UNIT_NOT_FOUND"), ephemeral=True)
+            return
         
         cog.logger.info(f"Usuário {interaction.user.display_name} entrou na unidade '{unit[0]}'.")
         await interaction.response.send_message(MESSAGES.get("SUCCESS_JOIN_UNIT").format(unit_name=unit[0]), ephemeral=True)
@@ -132,20 +140,31 @@ class UnitsCog(commands.Cog, name="UnitsCog"):
             await interaction.followup.send("❌ Erro de configuração: Canal de log de unidades não definido.", ephemeral=True)
             return
 
-        async with aiosqlite.connect(DB_FILE) as db:
-            new_id = self.generate_unique_id()
-            now = discord.utils.utcnow()
-            
-            # Cria o embed inicial
-            embed = discord.Embed(title=f"✅ Unidade Ativa - {unit_name}", description=f"**ID da Unidade:** `{new_id}`", color=discord.Color.green(), timestamp=now)
-            embed.add_field(name="Líder", value=interaction.user.mention, inline=False)
-            embed.add_field(name="Membros", value=interaction.user.mention, inline=False)
-            log_message = await log_channel.send(embed=embed)
-            
-            # Salva no banco de dados
+        new_id = self.generate_unique_id()
+        now = discord.utils.utcnow()
+
+        # Cria o embed inicial
+        embed = discord.Embed(title=f"✅ Unidade Ativa - {unit_name}", description=f"**ID da Unidade:** `{new_id}`", color=discord.Color.green(), timestamp=now)
+        embed.add_field(name="Líder", value=interaction.user.mention, inline=False)
+        embed.add_field(name="Membros", value=interaction.user.mention, inline=False)
+        log_message = await log_channel.send(embed=embed)
+
+        async def create(db: aiosqlite.Connection):
             await db.execute("INSERT INTO units (unit_id, name, creator_id, created_at, log_message_id) VALUES (?, ?, ?, ?, ?)", (new_id, unit_name, interaction.user.id, now.isoformat(), log_message.id))
             await db.execute("INSERT INTO unit_members (user_id, unit_id) VALUES (?, ?)", (interaction.user.id, new_id))
-            await db.commit()
+
+        # Salva no banco de dados pelo escritor único; a unidade e o líder entram juntos ou nenhum dos dois.
+        try:
+            await get_writer(DB_FILE).run(create)
+        except aiosqlite.IntegrityError:
+            # O membro entrou em outra unidade desde a verificação, ou o ID gerado já existia.
+            try:
+                await log_message.delete()
+            except discord.HTTPException:
+                pass
+            already_in_unit = await self.get_user_unit_id(interaction.user.id)
+            await interaction.followup.send(MESSAGES.get("ERROR_ALREADY_IN_UNIT") if already_in_unit else "❌ Não foi possível criar a unidade. Tente novamente.", ephemeral=True)
+            return
         
         self.logger.info(f"Unidade '{unit_name}' (ID: {new_id}) criada por {interaction.user.display_name}.")
         await interaction.followup.send(MESSAGES.get("SUCCESS_UNIT_CREATED").format(unit_name=unit_name, unit_id=new_id), ephemeral=True)
@@ -159,20 +178,22 @@ class UnitsCog(commands.Cog, name="UnitsCog"):
         async with aiosqlite.connect(DB_FILE) as db:
             db.row_factory = aiosqlite.Row
             unit_info = await (await db.execute("SELECT * FROM units WHERE unit_id = ?", (unit_id,))).fetchone()
-            if not unit_info: return None, MESSAGES.get("ERROR_UNIT_NOT_FOUND")
-            
+        if not unit_info: return None, MESSAGES.get("ERROR_UNIT_NOT_FOUND")
+        unit_name = unit_info['name']
+
+        async def leave(db: aiosqlite.Connection) -> bool:
+            """Remove o membro e, se a unidade ficar vazia, a própria unidade. Retorna True se ela foi desfeita."""
             await db.execute("DELETE FROM unit_members WHERE user_id = ?", (member.id,))
-            remaining_members_rows = await (await db.execute("SELECT user_id FROM unit_members WHERE unit_id = ?", (unit_id,))).fetchall()
-            unit_name = unit_info['name']
-            
-            if not remaining_members_rows:
+            remaining = await (await db.execute("SELECT 1 FROM unit_members WHERE unit_id = ? LIMIT 1", (unit_id,))).fetchone()
+            if not remaining:
                 await db.execute("DELETE FROM units WHERE unit_id = ?", (unit_id,))
-                await self.update_unit_log_message(unit_id, is_finished=True, reason=reason, unit_info=unit_info)
-            else:
-                # CORREÇÃO: Atualiza o log da unidade se ainda houver membros
-                await self.update_unit_log_message(unit_id, unit_info=unit_info)
-            
-            await db.commit()
+            return not remaining
+
+        # A gravação vai para o escritor único do banco; as mensagens de log só são editadas depois do commit.
+        if await get_writer(DB_FILE).run(leave):
+            await self.update_unit_log_message(unit_id, is_finished=True, reason=reason, unit_info=unit_info)
+        else:
+            await self.update_unit_log_message(unit_id, unit_info=unit_info)
             
         self.logger.info(f"Usuário {member.display_name} saiu da unidade '{unit_name}'.")
         await self.update_dashboard_message()
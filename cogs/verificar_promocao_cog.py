@@ -6,6 +6,7 @@ import json
 import logging
 import aiosqlite
 import math
+from cogs.__ponto_db import get_display_names
 
 logger = logging.getLogger('discord_bot')
 
@@ -25,10 +26,11 @@ DB_PROMOTION = "promotions.sqlite"
 
 # --- View de Paginação ---
 class PromotionListView(ui.View):
-    def __init__(self, interaction: discord.Interaction, all_records: list):
+    def __init__(self, interaction: discord.Interaction, all_records: list, names: dict[int, str]):
         super().__init__(timeout=180) # A view expira após 3 minutos de inatividade
         self.interaction = interaction
         self.all_records = all_records
+        self.names = names
         self.current_page = 0
         self.total_pages = math.ceil(len(self.all_records) / MEMBERS_PER_PAGE)
 
@@ -47,7 +49,7 @@ class PromotionListView(ui.View):
         description_lines = []
         for record in records_on_page:
             member = self.interaction.guild.get_member(record['user_id'])
-            member_name = member.display_name if member else f"ID: {record['user_id']}"
+            member_name = self.names.get(record['user_id']) or (member.display_name if member else f"ID: {record['user_id']}")
             
             line = (
                 f"**- {member_name}**\n"
@@ -124,7 +126,9 @@ class VerificarPromocaoCog(commands.Cog, name="VerificarPromocaoCog"):
             await interaction.followup.send("ℹ️ Não há nenhum membro registrado no sistema de promoção no momento.", ephemeral=True)
             return
             
-        view = PromotionListView(interaction, all_records)
+        # Os nomes vêm do diretório de membros do ponto, que também cobre quem já saiu do servidor.
+        names = await get_display_names([record['user_id'] for record in all_records])
+        view = PromotionListView(interaction, all_records, names)
         initial_embed = await view.create_embed()
         
         await interaction.followup.send(embed=initial_embed, view=view, ephemeral=True)